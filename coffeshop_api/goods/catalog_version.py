@@ -0,0 +1,65 @@
+import time
+from datetime import datetime, timezone
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.http import HttpRequest
+
+from .models import CatalogVersion
+
+CATALOG_VERSION_PK = 1
+
+
+def get_catalog_version() -> int:
+    """
+    Return the current catalog version.
+
+    The version is the time of the last catalog change in nanoseconds.
+    It is stored in the database, so every process sees changes made by any other one.
+    If there is no version yet, the current time is used.
+    """
+    version = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).values_list("version", flat=True).first()
+    if version is None:
+        version = CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_PK, defaults={"version": time.time_ns()})[
+            0
+        ].version
+    return version
+
+
+def get_request_catalog_version(request: HttpRequest) -> int:
+    """
+    Return the catalog version read once per request.
+
+    ETag, Last-Modified and the response body of one request share the same version.
+    """
+    version = getattr(request, "catalog_version", None)
+    if version is None:
+        version = request.catalog_version = get_catalog_version()
+    return version
+
+
+def bump_catalog_version() -> None:
+    """
+    Set a new catalog version. Called whenever a category or a product is changed.
+
+    The version is increased by one update query, so concurrent bumps do not lose each other.
+    """
+    updated = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).update(
+        version=Greatest(F("version") + 1, Value(time.time_ns()))
+    )
+    if not updated:
+        CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_PK, defaults={"version": time.time_ns()})
+
+
+def catalog_etag(request: HttpRequest, *args, **kwargs) -> str:
+    """
+    ETag of catalog responses.
+    """
+    return f'"catalog-{get_request_catalog_version(request)}"'
+
+
+def catalog_last_modified(request: HttpRequest, *args, **kwargs) -> datetime:
+    """
+    Last-Modified of catalog responses.
+    """
+    return datetime.fromtimestamp(get_request_catalog_version(request) // 10**9, tz=timezone.utc)
@@ -0,0 +1,60 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Model
+from django.db.models.fields.files import FieldFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+VARIANT_UPLOAD_TO = "images/variants"
+# Telegram shows photos no larger than 1280 px on the longest side.
+VARIANT_MAX_SIZE = 1280
+VARIANT_QUALITY = 85
+
+
+def build_variant(picture: FieldFile) -> tuple[str, bytes] | None:
+    """
+    Build a resized and recompressed JPEG variant of a picture.
+
+    Return the storage name of the variant and its content. The name is the hash of the content,
+    so equal pictures share one variant and a changed picture gets a new URL.
+    Return None if the picture can not be read as an image.
+    """
+    try:
+        picture.open("rb")
+    except OSError:
+        return None
+    try:
+        with Image.open(picture) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGB")
+            image.thumbnail((VARIANT_MAX_SIZE, VARIANT_MAX_SIZE), Image.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, format="JPEG", quality=VARIANT_QUALITY, optimize=True, progressive=True)
+    except (OSError, UnidentifiedImageError):
+        return None
+    finally:
+        picture.seek(0)
+    content = buffer.getvalue()
+    return f"{VARIANT_UPLOAD_TO}/{hashlib.sha256(content).hexdigest()[:32]}.jpg", content
+
+
+def update_picture_variant(instance: Model) -> bool:
+    """
+    Set picture_variant of a category or a product to the variant of its picture.
+
+    The variant file is written only if the storage does not have it yet.
+    Return True if picture_variant was changed. The instance is not saved.
+    """
+    variant = build_variant(instance.picture) if instance.picture else None
+    if variant is None:
+        name = None
+    else:
+        name, content = variant
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+    if (instance.picture_variant.name or None) == name:
+        return False
+    instance.picture_variant = name
+    return True
@@ -0,0 +1,32 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from goods.catalog_version import bump_catalog_version
+from goods.image_variants import update_picture_variant
+from goods.models import CategoryModel, ProductModel
+
+
+class Command(BaseCommand):
+    """
+    Build picture variants for categories and products that were created before variants existed.
+    """
+
+    help = "Build resized picture variants for existing categories and products."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--force", action="store_true", help="Rebuild variants that already exist.")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        updated = 0
+        for model in (CategoryModel, ProductModel):
+            queryset = model.objects.exclude(picture="").exclude(picture=None)
+            if not options["force"]:
+                queryset = queryset.filter(picture_variant=None) | queryset.filter(picture_variant="")
+            for instance in queryset.only("pk", "picture", "picture_variant"):
+                if update_picture_variant(instance):
+                    # update() does not send signals, the catalog version is bumped once at the end.
+                    model.objects.filter(pk=instance.pk).update(picture_variant=instance.picture_variant.name)
+                    updated += 1
+        if updated:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"Picture variants updated: {updated}"))
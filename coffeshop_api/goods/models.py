@@ -13,6 +13,7 @@ class CategoryModel(MPTTModel):
     name = models.CharField(max_length=100, blank=False, null=False, unique=True)
     description = models.TextField(max_length=1000, blank=True, null=True)
     picture = models.ImageField(upload_to="images/categories", blank=True, null=True)
+    picture_variant = models.ImageField(upload_to="images/variants", blank=True, null=True, editable=False)
     parent = TreeForeignKey("self", on_delete=models.CASCADE, null=True, blank=True, related_name="children")
 
     class MPTTMeta:
@@ -32,6 +33,7 @@ class ProductModel(models.Model):
     name = models.CharField(max_length=100, blank=False, verbose_name="Название продукта")
     description = models.TextField(max_length=1000, blank=True, null=True)
     picture = models.ImageField(upload_to="images/categories", blank=True, null=True)
+    picture_variant = models.ImageField(upload_to="images/variants", blank=True, null=True, editable=False)
     category = models.ForeignKey(
         CategoryModel, on_delete=models.CASCADE, related_name="products", verbose_name="Категория", default=None
     )
@@ -39,3 +41,16 @@ class ProductModel(models.Model):
 
     def __str__(self) -> str:
         return f"{self.name} {self.price:.2f}"
+
+
+class CatalogVersion(models.Model):
+    """
+    Catalog version model
+
+    A single row shared by all API workers and management commands.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return str(self.version)
@@ -0,0 +1,71 @@
+import math
+from typing import Any, NamedTuple
+
+from django.db.models import QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+
+from .models import CategoryModel, ProductModel
+
+
+class CategoryPage(NamedTuple):
+    """
+    One page of the children and products of a category.
+    """
+
+    number: int
+    size: int
+    children: QuerySet[CategoryModel]
+    products: QuerySet[ProductModel]
+    children_count: int
+    products_count: int
+
+    @property
+    def info(self) -> dict[str, Any]:
+        return {
+            "page": self.number,
+            "page_size": self.size,
+            "num_pages": max(math.ceil(max(self.children_count, self.products_count) / self.size), 1),
+            "children_count": self.children_count,
+            "products_count": self.products_count,
+        }
+
+
+class CategoryPagination(PageNumberPagination):
+    """
+    Pagination of the children and products of a category.
+
+    Children and products are sliced by the same page, so a page of the bot keyboard is one request.
+    Only the rows of the page are fetched, the totals are counted by the database.
+    A page beyond the last one is empty.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_category(self, category: CategoryModel, request: Request) -> CategoryPage | None:
+        """
+        Returns the requested page of the category or None if the page is not requested.
+        """
+        if self.page_query_param not in request.query_params:
+            return None
+        try:
+            number = int(request.query_params[self.page_query_param])
+        except (TypeError, ValueError):
+            number = 0
+        if number < 1:
+            raise NotFound(self.invalid_page_message)
+        size = self.get_page_size(request)
+        offset = (number - 1) * size
+
+        children = category.children.all()
+        products = category.products.select_related("category").order_by("pk")
+        return CategoryPage(
+            number=number,
+            size=size,
+            children=children[offset : offset + size],
+            products=products[offset : offset + size],
+            children_count=children.count(),
+            products_count=products.count(),
+        )
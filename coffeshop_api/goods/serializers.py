@@ -3,12 +3,28 @@ from rest_framework import serializers
 from .models import CategoryModel, ProductModel
 
 
+class PictureVariantField(serializers.ImageField):
+    """
+    Read-only URL of the picture variant.
+
+    Falls back to the original picture while the variant is not built.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance.picture_variant or instance.picture
+
+
 class ProductSerializer(serializers.HyperlinkedModelSerializer):
     """
     Serializer for ProductModel
     """
 
     parent_id = serializers.CharField(source="category.id")
+    picture = PictureVariantField()
 
     class Meta:
         model = ProductModel
@@ -20,6 +36,8 @@ class SubCategorySerializer(serializers.HyperlinkedModelSerializer):
     Serializer for a CategoryModel when it is displayed inside another category.
     """
 
+    picture = PictureVariantField()
+
     class Meta:
         model = CategoryModel
         fields = ["id", "name", "url", "description", "picture"]
@@ -33,7 +51,48 @@ class CategorySerializer(serializers.HyperlinkedModelSerializer):
     children = SubCategorySerializer(many=True, read_only=True)
     products = ProductSerializer(many=True, read_only=True)
     parent_id = serializers.CharField(source="parent.id", default=None)
+    picture = PictureVariantField()
 
     class Meta:
         model = CategoryModel
         fields = ["id", "name", "url", "description", "picture", "children", "products", "parent", "parent_id"]
+
+
+class CategoryPageSerializer(CategorySerializer):
+    """
+    Serializer for one page of a CategoryModel.
+
+    Children and products are taken from the CategoryPage in the "page" context item,
+    the totals are returned in pagination.
+    """
+
+    children = serializers.SerializerMethodField()
+    products = serializers.SerializerMethodField()
+    pagination = serializers.SerializerMethodField()
+
+    class Meta(CategorySerializer.Meta):
+        fields = CategorySerializer.Meta.fields + ["pagination"]
+
+    def get_children(self, instance: CategoryModel) -> list:
+        return SubCategorySerializer(self.context["page"].children, many=True, context=self.context).data
+
+    def get_products(self, instance: CategoryModel) -> list:
+        return ProductSerializer(self.context["page"].products, many=True, context=self.context).data
+
+    def get_pagination(self, instance: CategoryModel) -> dict:
+        return self.context["page"].info
+
+
+class CatalogCategorySerializer(serializers.HyperlinkedModelSerializer):
+    """
+    Serializer for a CategoryModel inside the catalog snapshot.
+
+    Children and products are not nested, the tree is restored by parent_id.
+    """
+
+    parent_id = serializers.IntegerField(read_only=True)
+    picture = PictureVariantField()
+
+    class Meta:
+        model = CategoryModel
+        fields = ["id", "name", "url", "description", "picture", "parent_id"]
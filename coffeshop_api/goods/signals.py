@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .catalog_version import bump_catalog_version
+from .image_variants import update_picture_variant
+from .models import CategoryModel, ProductModel
+
+
+@receiver(post_save, sender=CategoryModel)
+@receiver(post_delete, sender=CategoryModel)
+@receiver(post_save, sender=ProductModel)
+@receiver(post_delete, sender=ProductModel)
+def catalog_changed(sender, **kwargs) -> None:
+    """
+    Bump the catalog version when a category or a product is saved or deleted.
+    """
+    bump_catalog_version()
+
+
+@receiver(pre_save, sender=CategoryModel)
+@receiver(pre_save, sender=ProductModel)
+def picture_changed(sender, instance, raw=False, update_fields=None, **kwargs) -> None:
+    """
+    Build the picture variant when a picture is uploaded, replaced or removed.
+
+    Fixtures are loaded as is, their variants are built by the make_picture_variants command.
+    """
+    if raw or (update_fields is not None and "picture" not in update_fields):
+        return
+    picture = instance.picture
+    if picture and picture._committed and instance.picture_variant:
+        old_picture = sender.objects.filter(pk=instance.pk).values_list("picture", flat=True).first()
+        if old_picture == picture.name:
+            return
+    update_picture_variant(instance)
@@ -1,8 +1,16 @@
 import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
 
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
 from django.urls import reverse
-from goods.models import CategoryModel, ProductModel
+from goods.catalog_version import get_catalog_version
+from goods.image_variants import VARIANT_MAX_SIZE, VARIANT_UPLOAD_TO
+from goods.models import CatalogVersion, CategoryModel, ProductModel
 from goods.serializers import (
     CategorySerializer,
     ProductSerializer,
@@ -10,6 +18,7 @@ from goods.serializers import (
 )
 from goods.urls import router
 from goods.views import CategoryViewSet
+from PIL import Image
 from rest_framework.test import APIClient, APIRequestFactory
 
 
@@ -153,3 +162,279 @@ class TestCategoryViewSet(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(json.loads(response.content), serializer.data)
+
+
+class TestCatalogVersion(TestCase):
+    """
+    Test catalog versioning and conditional requests.
+    """
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.category = CategoryModel.objects.create(name="category")
+        self.product = ProductModel.objects.create(name="product", category=self.category, price=10)
+
+    def test_version_is_bumped_by_signals(self):
+        """
+        Saving and deleting categories and products changes the catalog version.
+        """
+        version = get_catalog_version()
+        self.product.save()
+        self.assertGreater(get_catalog_version(), version)
+
+        version = get_catalog_version()
+        CategoryModel.objects.create(name="another category")
+        self.assertGreater(get_catalog_version(), version)
+
+        version = get_catalog_version()
+        self.product.delete()
+        self.assertGreater(get_catalog_version(), version)
+
+    def test_responses_have_etag(self):
+        """
+        Catalog responses carry ETag and Last-Modified headers.
+        """
+        etag = f'"catalog-{get_catalog_version()}"'
+        for url in (
+            reverse("categorymodel-list"),
+            reverse("categorymodel-detail", kwargs={"pk": self.category.pk}),
+            reverse("product", kwargs={"pk": self.product.pk}),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["ETag"], etag)
+            self.assertTrue(response.has_header("Last-Modified"))
+
+    def test_version_is_shared(self):
+        """
+        The version is stored in the database, so a change made by another process changes the ETag.
+        """
+        url = reverse("categorymodel-detail", kwargs={"pk": self.category.pk})
+        etag = self.client.get(url)["ETag"]
+
+        CatalogVersion.objects.update(version=F("version") + 1)
+        self.assertNotEqual(self.client.get(url)["ETag"], etag)
+        self.assertEqual(CatalogVersion.objects.count(), 1)
+
+    def test_not_modified(self):
+        """
+        A conditional request with the current version is answered with 304.
+        """
+        url = reverse("categorymodel-detail", kwargs={"pk": self.category.pk})
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        self.category.description = "changed"
+        self.category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class TestCatalogSnapshotView(TestCase):
+    """
+    Test CatalogSnapshotView
+    """
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.root = CategoryModel.objects.create(name="root")
+        self.coffee = CategoryModel.objects.create(name="coffee", parent=self.root)
+        self.tea = CategoryModel.objects.create(name="tea", parent=self.root)
+        self.espresso = ProductModel.objects.create(name="espresso", category=self.coffee, price=100)
+        self.latte = ProductModel.objects.create(name="latte", category=self.coffee, price=150)
+        self.green_tea = ProductModel.objects.create(name="green tea", category=self.tea, price=90)
+
+    def test_snapshot(self):
+        """
+        The snapshot contains the whole tree and all products.
+        """
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("catalog"))
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.content)
+        self.assertEqual(data["version"], get_catalog_version())
+        self.assertEqual(data["root_id"], self.root.id)
+        self.assertEqual(
+            [(category["name"], category["parent_id"]) for category in data["categories"]],
+            [("root", None), ("coffee", self.root.id), ("tea", self.root.id)],
+        )
+        self.assertEqual(
+            [(product["name"], int(product["parent_id"])) for product in data["products"]],
+            [("espresso", self.coffee.id), ("latte", self.coffee.id), ("green tea", self.tea.id)],
+        )
+        product_serializer = ProductSerializer(self.espresso, context={"request": response.wsgi_request})
+        self.assertEqual(data["products"][0], product_serializer.data)
+
+    def test_snapshot_not_modified(self):
+        """
+        The snapshot supports conditional requests.
+        """
+        etag = self.client.get(reverse("catalog"))["ETag"]
+        response = self.client.get(reverse("catalog"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class TestCategoryPagination(TestCase):
+    """
+    Test pages of category children and products.
+    """
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.root = CategoryModel.objects.create(name="root")
+        self.children = [CategoryModel.objects.create(name=f"child {i}", parent=self.root) for i in range(3)]
+        self.category = self.children[0]
+        self.products = [
+            ProductModel.objects.create(name=f"product {i}", category=self.category, price=100 + i) for i in range(5)
+        ]
+
+    def test_page(self):
+        """
+        Only the products of the page are returned together with the totals.
+        """
+        url = reverse("categorymodel-detail", kwargs={"pk": self.category.pk})
+        with self.assertNumQueries(7):
+            response = self.client.get(url, {"page": 2, "page_size": 2})
+        self.assertEqual(response.status_code, 200)
+
+        data = json.loads(response.content)
+        self.assertEqual([product["name"] for product in data["products"]], ["product 2", "product 3"])
+        self.assertEqual(data["children"], [])
+        self.assertEqual(
+            data["pagination"],
+            {"page": 2, "page_size": 2, "num_pages": 3, "children_count": 0, "products_count": 5},
+        )
+        product_serializer = ProductSerializer(self.products[2], context={"request": response.wsgi_request})
+        self.assertEqual(data["products"][0], product_serializer.data)
+
+        full_data = json.loads(self.client.get(url).content)
+        self.assertEqual(len(full_data["products"]), 5)
+        self.assertNotIn("pagination", full_data)
+        self.assertEqual(
+            {key: value for key, value in data.items() if key not in ("products", "pagination")},
+            {key: value for key, value in full_data.items() if key != "products"},
+        )
+
+    def test_root_page(self):
+        """
+        The root category is paginated too, a page beyond the last one is empty.
+        """
+        response = self.client.get(reverse("categorymodel-list"), {"page": 1, "page_size": 2})
+        data = json.loads(response.content)
+        self.assertEqual([child["name"] for child in data["children"]], ["child 0", "child 1"])
+        self.assertEqual(data["pagination"]["children_count"], 3)
+        self.assertEqual(data["pagination"]["num_pages"], 2)
+
+        response = self.client.get(reverse("categorymodel-list"), {"page": 3, "page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["children"], [])
+
+    def test_invalid_page(self):
+        """
+        A page that is not a positive number is not found.
+        """
+        url = reverse("categorymodel-detail", kwargs={"pk": self.category.pk})
+        for page in ("0", "-1", "last", ""):
+            self.assertEqual(self.client.get(url, {"page": page}).status_code, 404)
+
+
+def get_picture(name: str = "picture.png", size: tuple[int, int] = (3000, 2000)) -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new("RGB", size, color=(120, 80, 40)).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class TestPictureVariant(TestCase):
+    """
+    Test picture variants for Telegram.
+    """
+
+    def setUp(self) -> None:
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.request = APIRequestFactory().get("/")
+
+    def tearDown(self) -> None:
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_variant_is_built_on_upload(self):
+        """
+        An uploaded picture gets a resized JPEG variant with a content-hashed name.
+        """
+        category = CategoryModel.objects.create(name="category", picture=get_picture())
+
+        self.assertTrue(category.picture_variant.name.startswith(f"{VARIANT_UPLOAD_TO}/"))
+        with Image.open(category.picture_variant.path) as variant:
+            self.assertEqual(variant.format, "JPEG")
+            self.assertEqual(max(variant.size), VARIANT_MAX_SIZE)
+        self.assertLess(category.picture_variant.size, category.picture.size)
+
+        product = ProductModel.objects.create(name="product", category=category, price=10, picture=get_picture("p.png"))
+        self.assertEqual(product.picture_variant.name, category.picture_variant.name)
+
+    def test_variant_is_updated_with_picture(self):
+        """
+        The variant follows changes of the picture and is not rebuilt on other changes.
+        """
+        category = CategoryModel.objects.create(name="category", picture=get_picture())
+        variant_name = category.picture_variant.name
+
+        category.description = "changed"
+        # One more query bumps the catalog version.
+        with self.assertNumQueries(2):
+            category.save(update_fields=["description"])
+        with self.assertNumQueries(3):
+            category.save()
+        self.assertEqual(category.picture_variant.name, variant_name)
+
+        category.picture = get_picture(size=(100, 100))
+        category.save()
+        self.assertNotEqual(category.picture_variant.name, variant_name)
+
+        category.picture = None
+        category.save()
+        self.assertFalse(category.picture_variant)
+
+    def test_serializers_use_variant(self):
+        """
+        Serializers return the variant URL and the original picture while there is no variant.
+        """
+        category = CategoryModel.objects.create(name="category", picture=get_picture())
+        product = ProductModel.objects.create(name="product", category=category, price=10)
+        context = {"request": self.request}
+
+        data = CategorySerializer(category, context=context).data
+        self.assertEqual(data["picture"], self.request.build_absolute_uri(category.picture_variant.url))
+        self.assertIsNone(ProductSerializer(product, context=context).data["picture"])
+
+        CategoryModel.objects.filter(pk=category.pk).update(picture_variant=None)
+        category.refresh_from_db()
+        data = SubCategorySerializer(category, context=context).data
+        self.assertEqual(data["picture"], self.request.build_absolute_uri(category.picture.url))
+
+    def test_make_picture_variants_command(self):
+        """
+        The command builds variants for existing pictures.
+        """
+        category = CategoryModel.objects.create(name="category", picture=get_picture())
+        product = ProductModel.objects.create(name="product", category=category, price=10, picture=get_picture())
+        ProductModel.objects.filter(pk=product.pk).update(picture_variant=None)
+        version = get_catalog_version()
+        out = StringIO()
+
+        call_command("make_picture_variants", stdout=out)
+
+        product.refresh_from_db()
+        self.assertEqual(product.picture_variant.name, category.picture_variant.name)
+        self.assertIn("Picture variants updated: 1", out.getvalue())
+        self.assertGreater(get_catalog_version(), version)
+
+        call_command("make_picture_variants", "--force", stdout=out)
+        self.assertIn("Picture variants updated: 0", out.getvalue())
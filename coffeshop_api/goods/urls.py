@@ -9,4 +9,5 @@ router.register(r"categories", views.CategoryViewSet)
 urlpatterns = [
     path("", include(router.urls)),
     path("product/<int:pk>/", views.ProductView.as_view(), name="product"),
+    path("catalog/", views.CatalogSnapshotView.as_view(), name="catalog"),
 ]
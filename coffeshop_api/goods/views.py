@@ -1,35 +1,72 @@
 from typing import Any
 
 from django.shortcuts import get_object_or_404, render
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import viewsets
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .catalog_version import (
+    catalog_etag,
+    catalog_last_modified,
+    get_request_catalog_version,
+)
 from .models import CategoryModel, ProductModel
-from .serializers import CategorySerializer, ProductSerializer
+from .pagination import CategoryPagination
+from .serializers import (
+    CatalogCategorySerializer,
+    CategoryPageSerializer,
+    CategorySerializer,
+    ProductSerializer,
+)
+
+catalog_condition = method_decorator(
+    condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified), name="dispatch"
+)
 
 
 # Create your views here.
+@catalog_condition
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Vewset for CategoryModel
 
-    Readonly
+    Readonly. Responses carry the catalog version in ETag and Last-Modified headers
+    and a conditional request with an up-to-date version is answered with 304.
+    With the page and page_size query parameters a category is returned with one page of its children and products.
     """
 
     queryset = CategoryModel.objects.filter()
     serializer_class = CategorySerializer
+    pagination_class = CategoryPagination
 
     def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """
         Instead of displaying all categories, the root directory should be displayed.
         """
         object = get_object_or_404(self.queryset.model, parent=None)
-        serializer = CategorySerializer(object, context={"request": self.request})
+        return self.get_category_response(object)
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return self.get_category_response(self.get_object())
+
+    def get_category_response(self, category: CategoryModel) -> Response:
+        """
+        Returns the category with all its children and products
+        or, if the page query parameter is given, only with the children and products of the page.
+        """
+        page = self.paginator.paginate_category(category, self.request)
+        if page is None:
+            serializer = CategorySerializer(category, context=self.get_serializer_context())
+        else:
+            serializer = CategoryPageSerializer(category, context={**self.get_serializer_context(), "page": page})
         return Response(serializer.data)
 
 
+@catalog_condition
 class ProductView(RetrieveAPIView):
     """
     Vewset for ProductModel
@@ -37,3 +74,27 @@ class ProductView(RetrieveAPIView):
 
     queryset = ProductModel.objects.all()
     serializer_class = ProductSerializer
+
+
+@catalog_condition
+class CatalogSnapshotView(APIView):
+    """
+    View for the whole catalog in one document.
+
+    Returns the root category with all its descendants and all their products.
+    Categories are built from one get_descendants query and products from one more query.
+    """
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        root = get_object_or_404(CategoryModel, parent=None)
+        categories = root.get_descendants(include_self=True)
+        products = ProductModel.objects.filter(category__tree_id=root.tree_id).select_related("category").order_by("pk")
+        context = {"request": request}
+        return Response(
+            {
+                "version": get_request_catalog_version(request),
+                "root_id": root.id,
+                "categories": CatalogCategorySerializer(categories, many=True, context=context).data,
+                "products": ProductSerializer(products, many=True, context=context).data,
+            }
+        )
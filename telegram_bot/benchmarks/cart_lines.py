@@ -0,0 +1,65 @@
+# Сравнение разбора строк корзины из Redis через pydantic и через CartLine.
+# Запуск из каталога telegram_bot: python -m benchmarks.cart_lines
+import timeit
+from decimal import Decimal
+
+from filters.callback_factories import AddToCartCallbackFactory
+from models.cart import CartLine
+from models.models import ProductModel
+
+CART_SIZES = (1, 10, 25, 50)
+REPEAT = 5
+
+
+def get_cart_lines(count: int) -> dict[str, str]:
+    return {
+        str(product_id): CartLine(product_id, f"Товар {product_id}", Decimal("199.90"), product_id % 5 + 1).to_redis()
+        for product_id in range(1, count + 1)
+    }
+
+
+def parse_with_pydantic(cart_lines: dict[str, str]) -> dict[str, ProductModel]:
+    return {
+        key: ProductModel(**AddToCartCallbackFactory.unpack_from_redis(value).model_dump(), is_data_from_redis=True)
+        for key, value in cart_lines.items()
+    }
+
+
+def parse_with_cart_line(cart_lines: dict[str, str]) -> dict[str, CartLine]:
+    return {key: CartLine.from_redis(value) for key, value in cart_lines.items()}
+
+
+def serialize_with_pydantic(items: dict[str, ProductModel]) -> list[str]:
+    return [AddToCartCallbackFactory(**item.model_dump()).get_product_str_for_redis() for item in items.values()]
+
+
+def serialize_with_cart_line(items: dict[str, CartLine]) -> list[str]:
+    return [item.to_redis() for item in items.values()]
+
+
+def measure(function, argument, number: int) -> float:
+    """
+    Возвращает лучшее время одного вызова в микросекундах.
+    """
+    return min(timeit.repeat(lambda: function(argument), number=number, repeat=REPEAT)) / number * 1_000_000
+
+
+def main() -> None:
+    print(
+        f"{'lines':>5} {'parse pydantic':>15} {'parse slots':>12} {'x':>6} {'dump pydantic':>14} {'dump slots':>11} {'x':>6}"
+    )
+    for count in CART_SIZES:
+        cart_lines = get_cart_lines(count)
+        number = max(2000 // count, 20)
+        parse_pydantic = measure(parse_with_pydantic, cart_lines, number)
+        parse_slots = measure(parse_with_cart_line, cart_lines, number)
+        dump_pydantic = measure(serialize_with_pydantic, parse_with_pydantic(cart_lines), number)
+        dump_slots = measure(serialize_with_cart_line, parse_with_cart_line(cart_lines), number)
+        print(
+            f"{count:>5} {parse_pydantic:>12.1f} us {parse_slots:>9.1f} us {parse_pydantic / parse_slots:>6.1f}"
+            f" {dump_pydantic:>11.1f} us {dump_slots:>8.1f} us {dump_pydantic / dump_slots:>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
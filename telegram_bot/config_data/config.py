@@ -1,7 +1,8 @@
 import logging
+from typing import Literal
 
 from lexicon.lexicon_ru import LEXICON_RU
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic.types import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -25,6 +26,12 @@ class ApiConfig(BaseSettings):
     protocol: str
     host: str
     port: int
+    connection_limit: int = 100
+    connection_limit_per_host: int = 30
+    keepalive_timeout: float = 30
+    dns_cache_ttl: int = 300
+    total_timeout: float = 10
+    connect_timeout: float = 3
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -45,6 +52,11 @@ class RedisConfig(BaseSettings):
     port: int
     decode_responses: bool = True
     client_name: str = "telegram_bot_redissengleton"
+    max_connections: int = 50
+    pool_timeout: float = 5
+    health_check_interval: int = 30
+    socket_timeout: float = 5
+    socket_connect_timeout: float = 2
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -54,6 +66,106 @@ class RedisConfig(BaseSettings):
     )
 
 
+class CatalogCacheConfig(BaseSettings):
+    """
+    Класс с настройками кэша и снимка каталога.
+    """
+
+    max_size: int = 512
+    ttl: int = 300
+    redis_ttl: int = 3600
+    snapshot_refresh_interval: int = 60
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        env_prefix="CATALOG_CACHE_",
+    )
+
+
+class PhotoWarmupConfig(BaseSettings):
+    """
+    Класс с настройками предварительной загрузки изображений в Telegram.
+    """
+
+    chat_id: int | None = None
+    concurrency: int = 4
+    on_startup: bool = False
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        env_prefix="PHOTO_WARMUP_",
+    )
+
+
+class TelegramLimitsConfig(BaseSettings):
+    """
+    Класс с настройками лимитов исходящих запросов к Telegram.
+    """
+
+    global_rate: float = 30
+    chat_rate: float = 1
+    chat_burst: float = 3
+    max_retries: int = 3
+    max_retry_after: float = 60
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        env_prefix="TELEGRAM_LIMITS_",
+    )
+
+
+class UpdatesConfig(BaseSettings):
+    """
+    Класс с настройками получения обновлений от Telegram.
+
+    mode выбирает long polling или webhook. max_concurrent ограничивает количество обновлений, которые
+    обрабатываются одновременно, в обоих режимах. Для webhook нужны внешний адрес и секретный токен.
+
+    role выбирает, что делает процесс: standalone получает и обрабатывает обновления, receiver получает
+    обновления и записывает их в поток Redis, worker обрабатывает обновления из потока.
+    """
+
+    mode: Literal["polling", "webhook"] = "polling"
+    role: Literal["standalone", "receiver", "worker"] = "standalone"
+    max_concurrent: int = 100
+    webhook_base_url: str | None = None
+    webhook_path: str = "/webhook"
+    webhook_secret: SecretStr | None = None
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    stream_name: str = "updates"
+    stream_partitions: int = 16
+    stream_maxlen: int = 100_000
+    stream_group: str = "bot_workers"
+    stream_lease_ttl: float = 30
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        env_prefix="UPDATES_",
+    )
+
+    @model_validator(mode="after")
+    def check_webhook(self) -> "UpdatesConfig":
+        if (
+            self.mode == "webhook"
+            and self.role != "worker"
+            and (not self.webhook_base_url or self.webhook_secret is None)
+        ):
+            raise ValueError("Webhook mode requires webhook_base_url and webhook_secret")
+        return self
+
+    def get_webhook_url(self) -> str:
+        return f"{self.webhook_base_url.rstrip('/')}{self.webhook_path}"
+
+
 class Config(BaseSettings):
     """
     Совокупный класс настроек.
@@ -62,6 +174,10 @@ class Config(BaseSettings):
     bot: BotConfig
     api: ApiConfig
     redis: RedisConfig
+    catalog_cache: CatalogCacheConfig
+    photo_warmup: PhotoWarmupConfig
+    updates: UpdatesConfig
+    telegram_limits: TelegramLimitsConfig
 
 
 def load_config() -> Config:
@@ -77,10 +193,26 @@ def load_config() -> Config:
     redis_config = RedisConfig()
     logging.info(LEXICON_RU["system"]["redis_config_loaded"])
 
+    catalog_cache_config = CatalogCacheConfig()
+    logging.info(LEXICON_RU["system"]["catalog_cache_config_loaded"])
+
+    photo_warmup_config = PhotoWarmupConfig()
+    logging.info(LEXICON_RU["system"]["photo_warmup_config_loaded"])
+
+    updates_config = UpdatesConfig()
+    logging.info(LEXICON_RU["system"]["updates_config_loaded"])
+
+    telegram_limits_config = TelegramLimitsConfig()
+    logging.info(LEXICON_RU["system"]["telegram_limits_config_loaded"])
+
     config = Config(
         bot=bot_config,
         api=api_config,
         redis=redis_config,
+        catalog_cache=catalog_cache_config,
+        photo_warmup=photo_warmup_config,
+        updates=updates_config,
+        telegram_limits=telegram_limits_config,
     )
 
     return config
@@ -1,3 +1,25 @@
 PAGINATION_PAGE_SIZE: int = 4
 
-PHOTO_FILE_ID_HASH_NAME: str = "photo_file_id"
+# Хэш file_id изображений по хэшу содержимого изображения.
+PHOTO_FILE_ID_HASH_NAME: str = "photo_file_id:by_hash"
+
+# Хэш file_id по названиям, который использовался до хэша по содержимому. Удаляется при запуске бота.
+LEGACY_PHOTO_FILE_ID_HASH_NAME: str = "photo_file_id"
+
+# Хэш с хэшами содержимого изображений по ключам, с которыми их ищут хэндлеры (названия, "cart" и т.д.).
+PHOTO_NAME_INDEX_HASH_NAME: str = "photo_file_id:by_name"
+
+PHOTO_FILE_ID_CHANNEL_NAME: str = "photo_file_id:updates"
+
+# Окно после редактирования клавиатуры товара, за которое нажатия на одну кнопку корзины объединяются в одно
+# редактирование, в секундах.
+CART_TAP_WINDOW: float = 0.3
+
+# Сколько товаров со страниц категорий загружаются заранее одновременно.
+PREFETCH_MAX_CONCURRENT: int = 4
+
+# Время хранения состояния экрана сообщения, в секундах.
+SCREEN_STATE_TTL: int = 7 * 24 * 60 * 60
+
+# Как часто статистика компонентов бота (пула соединений Redis, кэшей и т.д.) пишется в лог, в секундах.
+STATS_LOG_INTERVAL: int = 60
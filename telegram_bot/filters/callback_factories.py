@@ -1,8 +1,31 @@
-from typing import Any
+import base64
+import binascii
+import struct
+from typing import Any, ClassVar
 
 from aiogram.filters.callback_data import CallbackData
 from pydantic import condecimal, conint, field_validator
 
+# Версия компактной упаковки колбэков корзины. Первый байт упакованных данных.
+COMPACT_CART_VERSION: int = 1
+# Версия, id товара и количество.
+COMPACT_CART_STRUCT = struct.Struct(">BIH")
+
+
+def split_cart_line(value: str, separator: str = ":") -> tuple[str, str, str, str, str]:
+    """
+    Разбирает строку корзины в Redis вида "id:name:price:quantity:cost".
+
+    Название товара может содержать разделитель, поэтому id отделяется слева, а цена, количество и стоимость
+    справа. Если частей меньше пяти, то выбрасывается ValueError.
+    """
+    id, _, rest = value.partition(separator)
+    parts = rest.rsplit(separator, 3)
+    if len(parts) != 4:
+        raise ValueError(f"Cart line {value!r} must have 5 parts")
+    name, price, quantity, cost = parts
+    return id, name, price, quantity, cost
+
 
 class UnpackFromRedisMixin:
     @classmethod
@@ -13,8 +36,8 @@ class UnpackFromRedisMixin:
         if separator is None:
             separator = cls.__separator__
 
-        value = cls.__prefix__ + cls.__separator__ + cls.__separator__.join(value.split(separator))
-        return super().unpack(value)
+        id, name, price, quantity, cost = split_cart_line(value, separator)
+        return cls(id=id, name=name, price=price, quantity=quantity, cost=cost)
 
 
 class GetProductStrForRedisMixin:
@@ -32,10 +55,59 @@ class GetProductStrForRedisMixin:
             separator = self.__separator__
 
         keys = template.split(separator)
-        values = [str(self.model_dump().get(key, "")) for key in keys]
+        values = [str(getattr(self, key, "")) for key in keys]
         return separator.join(values)
 
 
+class CompactCartCallbackMixin:
+    """
+    Миксин компактной упаковки колбэков корзины.
+
+    В колбэк попадают только версия упаковки, id товара и количество в виде base64, например "item:AQAAAAEAAQ".
+    Название и цену товара хэндлер берёт из каталога, поэтому длина колбэка не зависит от названия товара.
+    Упаковка и распаковка не проверяют поля через pydantic. Колбэки старых кнопок вида "item:1:name:10:1:10"
+    распаковываются как раньше.
+    """
+
+    min_quantity: ClassVar[int] = 0
+
+    def pack(self) -> str:
+        """
+        Возвращает компактный колбэк. Если id или количество не помещаются в упаковку, то возвращает колбэк
+        старого вида.
+        """
+        try:
+            payload = COMPACT_CART_STRUCT.pack(COMPACT_CART_VERSION, self.id, self.quantity)
+        except struct.error:
+            return super().pack()
+        return self.__prefix__ + self.__separator__ + base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+    @classmethod
+    def pack_compact(cls, id: int, quantity: int = 1) -> str:
+        """
+        Возвращает компактный колбэк без создания экземпляра фабрики.
+        """
+        return cls.model_construct(id=id, quantity=quantity).pack()
+
+    @classmethod
+    def unpack(cls, value: str) -> CallbackData:
+        prefix, separator, payload = value.partition(cls.__separator__)
+        if prefix != cls.__prefix__ or not separator or cls.__separator__ in payload:
+            return super().unpack(value)
+
+        try:
+            version, id, quantity = COMPACT_CART_STRUCT.unpack(
+                base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            )
+        except (binascii.Error, struct.error):
+            raise ValueError(f"Bad compact callback data {value!r}")
+        if version != COMPACT_CART_VERSION:
+            raise ValueError(f"Unknown version {version} of compact callback data {value!r}")
+        if quantity < cls.min_quantity:
+            raise ValueError(f"Quantity must be at least {cls.min_quantity}, got {quantity}")
+        return cls.model_construct(id=id, quantity=quantity)
+
+
 class CategoryCallbackFactory(CallbackData, prefix="category"):
     """
     Фабрика колбэков для категории.
@@ -92,28 +164,38 @@ class ProductCallbackFactory(CallbackData, prefix="product"):
         return value
 
 
-class AddToCartCallbackFactory(UnpackFromRedisMixin, GetProductStrForRedisMixin, CallbackData, prefix="item"):
+class AddToCartCallbackFactory(
+    CompactCartCallbackMixin, UnpackFromRedisMixin, GetProductStrForRedisMixin, CallbackData, prefix="item"
+):
     """
     Фабрика колбэков для добавляния товара в корзину.
+
+    В компактном колбэке нет названия, цены и стоимости товара, после распаковки они равны None.
     """
 
+    min_quantity: ClassVar[int] = 1
+
     id: int
-    name: str
-    price: condecimal(ge=0, max_digits=10, decimal_places=2)  # type: ignore
-    quantity: conint(ge=1)  # type: ignore
-    cost: condecimal(ge=0, max_digits=10, decimal_places=2)  # type: ignore # Возможно этот отрибут не нужен. Но пока пусть будет.
+    name: str | None = None
+    price: condecimal(ge=0, max_digits=10, decimal_places=2) | None = None  # type: ignore
+    quantity: conint(ge=1) = 1  # type: ignore
+    cost: condecimal(ge=0, max_digits=10, decimal_places=2) | None = None  # type: ignore # Возможно этот отрибут не нужен. Но пока пусть будет.
 
 
-class RemoveFromCartCallbackFactory(UnpackFromRedisMixin, GetProductStrForRedisMixin, CallbackData, prefix="remove"):
+class RemoveFromCartCallbackFactory(
+    CompactCartCallbackMixin, UnpackFromRedisMixin, GetProductStrForRedisMixin, CallbackData, prefix="remove"
+):
     """
     Фабрика колбэков для удаления товара из корзины.
+
+    В компактном колбэке нет названия, цены и стоимости товара, после распаковки они равны None.
     """
 
     id: int
-    name: str
-    price: condecimal(ge=0, max_digits=10, decimal_places=2)  # type: ignore
+    name: str | None = None
+    price: condecimal(ge=0, max_digits=10, decimal_places=2) | None = None  # type: ignore
     quantity: conint(ge=0) = 1  # type: ignore
-    cost: condecimal(ge=0, max_digits=10, decimal_places=2)  # type: ignore
+    cost: condecimal(ge=0, max_digits=10, decimal_places=2) | None = None  # type: ignore
 
 
 class EditCartCallbackFactory(CallbackData, prefix="edit_cart"):
@@ -1,7 +1,7 @@
 import logging
 from typing import Any, Literal
 
-from aiogram import F, Router
+from aiogram import Router
 from aiogram.types import CallbackQuery, FSInputFile, InputMediaPhoto
 from filters.callback_factories import (
     AddToCartCallbackFactory,
@@ -13,22 +13,33 @@ from filters.callback_factories import (
 from keyboards.callback_keyboards import get_start_keyboard
 from lexicon.lexicon_ru import LEXICON_RU
 from models.cart import Cart
+from models.models import PreloadedContext
 from services import cache_services, services
+from services.callback_dispatch import CallbackDispatcher
+from services.cart_taps import cart_tap_coalescer
+from services.prefetch import product_prefetcher
+from services.screen_state import screen_state_tracker
 
 logger = logging.getLogger(__name__)
 
 router: Router = Router()
 
+# Колбэки роутера направляются хэндлерам по таблице, а не проверкой фильтров каждого хэндлера по очереди.
+callback_dispatcher = CallbackDispatcher()
+callback_dispatcher.setup(router)
 
-@router.callback_query(F.data == "make_order")
-@router.callback_query(CategoryCallbackFactory.filter())
+
+@callback_dispatcher.register("make_order", CategoryCallbackFactory)
 async def process_category_callback(
     callback: CallbackQuery,
-    extra: dict[Literal["redis_connection", "api_url"], Any],
+    extra: dict[Literal["redis_connection", "api_url", "api_client"], Any],
     callback_data: CategoryCallbackFactory | None = None,
+    preloaded: PreloadedContext | None = None,
 ):
     """
     Хэндлер для обработки колбэков кнопок категорий.
+
+    Товары с открытой страницы загружаются заранее, пока редактируется сообщение.
     """
     logger.info("Handler for category")
     category_id = callback_data.category_id if callback_data else None
@@ -36,29 +47,29 @@ async def process_category_callback(
     logger.info("Callback data: %s", callback_data)
 
     cart = Cart(user_id=callback.from_user.id)
+    if preloaded is not None and preloaded.cart_info is not None:
+        cart.load_info(preloaded.cart_info, preloaded.cart_quantities)
 
-    category = await services.get_category_model_for_answer_callback(callback, extra["api_url"], category_id)
-    paginated_keyboard = services.pagination_keyboard(
-        keyboard=category.keyboard,
-        page=callback_data.page if callback_data else 1,
-        category_id=category_id,
-        factory=CategoryCallbackFactory,
+    category = await services.get_category_model_for_answer_callback(
+        callback, extra["api_client"], category_id, preloaded, page=callback_data.page if callback_data else 1
     )
-    keyboard_with_cart_button = await services.edit_category_inline_keyboard(
-        cart=cart, keyboard_list=paginated_keyboard.inline_keyboard
+    product_prefetcher.schedule(
+        callback, extra["api_client"], category.keyboard, preloaded.auth_token if preloaded is not None else None
     )
-    event = await callback.message.edit_media(
-        media=category.picture,
-        reply_markup=keyboard_with_cart_button,
+    keyboard_with_cart_button = await services.edit_category_inline_keyboard(
+        cart=cart, keyboard_list=category.keyboard.inline_keyboard
     )
-    await cache_services.save_photo_file_id(event)
+    picture, content_hash = await cache_services.resolve_photo(callback.bot, category.name, category.picture)
+    event = await screen_state_tracker.show(callback.message, picture, keyboard_with_cart_button, preloaded)
+    await cache_services.save_photo_file_id(event, key=category.name, content_hash=content_hash)
 
 
-@router.callback_query(ProductCallbackFactory.filter())
+@callback_dispatcher.register(ProductCallbackFactory)
 async def process_product_callback(
     callback: CallbackQuery,
-    extra: dict[Literal["redis_connection", "api_url"], Any],
+    extra: dict[Literal["redis_connection", "api_url", "api_client"], Any],
     callback_data: ProductCallbackFactory,
+    preloaded: PreloadedContext | None = None,
 ):
     """
     Хэндлер для обработки колбэков кнопок товаров.
@@ -67,21 +78,23 @@ async def process_product_callback(
     logger.info("Callback: %s", callback.data)
     logger.info("Product callback data: %s", callback_data)
 
-    product = await services.get_product_model_for_answer_callback(callback, extra["api_url"], callback_data.product_id)
+    product = await services.get_product_model_for_answer_callback(
+        callback, extra["api_client"], callback_data.product_id, preloaded
+    )
     logger.debug("Data for answer: %s", product)
 
     cart = Cart(user_id=callback.from_user.id)
+    if preloaded is not None and preloaded.cart_info is not None:
+        cart.load_info(preloaded.cart_info, preloaded.cart_quantities)
     keyboard = product.keyboard
     keyboard = await services.edit_product_inline_keyboard(cart, keyboard_list=keyboard.inline_keyboard)
 
-    answer = await callback.message.edit_media(
-        media=product.picture,
-        reply_markup=keyboard,
-    )
-    await cache_services.save_photo_file_id(answer)
+    picture, content_hash = await cache_services.resolve_photo(callback.bot, product.name, product.picture)
+    answer = await screen_state_tracker.show(callback.message, picture, keyboard, preloaded)
+    await cache_services.save_photo_file_id(answer, key=product.name, content_hash=content_hash)
 
 
-@router.callback_query(F.data == "pass")
+@callback_dispatcher.register("pass")
 async def process_pass_callback(callback: CallbackQuery):
     """
     Хэндлер для обработки колбэков с кнопок, которые еще не готовы.
@@ -91,46 +104,83 @@ async def process_pass_callback(callback: CallbackQuery):
     await callback.answer(text=LEXICON_RU["system"]["wip"], show_alert=True)
 
 
-@router.callback_query(AddToCartCallbackFactory.filter())
+@callback_dispatcher.register(AddToCartCallbackFactory)
 async def add_to_cart(callback: CallbackQuery, callback_data: AddToCartCallbackFactory, extra: dict[str, Any]):
     """
     Хэндлер для обработки колбэков кнопок добавления товара в корзину.
+
+    Товар добавляется сразу, а редактирования клавиатуры при быстрых нажатиях объединяются. Название и цена товара
+    из компактного колбэка берутся из каталога.
     """
     logger.info("Handler for add cart")
     logger.info("Callback: %s", callback.data)
     logger.info("Callback data: %s", callback_data)
-    cart = Cart(user_id=callback.from_user.id)
-    await cart.add_product_in_cart(callback_data)
-    keyboard = await services.edit_product_inline_keyboard(cart, callback.message.reply_markup.inline_keyboard)
-    if callback.message.reply_markup != keyboard:
-        await callback.message.edit_reply_markup(reply_markup=keyboard)
+    async with cart_tap_coalescer.lock(callback.from_user.id):
+        cart = Cart(user_id=callback.from_user.id)
+        await cart.add_product_in_cart(
+            await services.get_add_to_cart_callback_data(
+                callback, extra["api_client"], callback_data, callback_data.quantity
+            )
+        )
+        edit_now = cart_tap_coalescer.claim_edit(callback.from_user.id, callback.message.message_id)
+    if edit_now:
+        await _edit_product_keyboard(callback, cart)
     await callback.answer(text=LEXICON_RU["inline"]["added"])
+    if not edit_now:
+        await _edit_product_keyboard_later(callback, cart)
 
 
-@router.callback_query(RemoveFromCartCallbackFactory.filter())
+@callback_dispatcher.register(RemoveFromCartCallbackFactory)
 async def remove_from_cart(
     callback: CallbackQuery, callback_data: RemoveFromCartCallbackFactory, extra: dict[str, Any]
 ):
     """
     Хэндлер обработки колбэков с кнопок удаления товара из корзины.
+
+    Товар удаляется сразу, а редактирования клавиатуры при быстрых нажатиях объединяются так же, как при добавлении.
+    Наличие товара в корзине проверяет скрипт удаления в Redis, отдельно корзина не читается.
     """
     logger.info("Handler for remove from cart")
     logger.info("Callback: %s", callback.data)
     logger.info("Callback data: %s", callback_data)
-    cart = Cart(user_id=callback.from_user.id)
-    await cart.get_items_from_redis()
-    if str(callback_data.id) not in cart.items or cart.items[str(callback_data.id)].quantity <= 0:
-        await callback.answer(text=LEXICON_RU["inline"]["item_is_not_in_cart"])
-    else:
-        await cart.remove_product_from_cart(callback_data)
-        keyboard = await services.edit_product_inline_keyboard(cart, callback.message.reply_markup.inline_keyboard)
-        if callback.message.reply_markup != keyboard:
-            await callback.message.edit_reply_markup(reply_markup=keyboard)
-        await callback.answer(text=LEXICON_RU["inline"]["removed"])
+    async with cart_tap_coalescer.lock(callback.from_user.id):
+        cart = Cart(user_id=callback.from_user.id)
+        try:
+            await cart.remove_product_from_cart(callback_data)
+        except ValueError:
+            await callback.answer(text=LEXICON_RU["inline"]["item_is_not_in_cart"])
+            return
+        edit_now = cart_tap_coalescer.claim_edit(callback.from_user.id, callback.message.message_id)
+    if edit_now:
+        await _edit_product_keyboard(callback, cart)
+    await callback.answer(text=LEXICON_RU["inline"]["removed"])
+    if not edit_now:
+        await _edit_product_keyboard_later(callback, cart)
+
+
+async def _edit_product_keyboard(callback: CallbackQuery, cart: Cart) -> None:
+    keyboard = await services.edit_product_inline_keyboard(cart, callback.message.reply_markup.inline_keyboard)
+    if callback.message.reply_markup != keyboard:
+        await callback.message.edit_reply_markup(reply_markup=keyboard)
+
+
+async def _edit_product_keyboard_later(callback: CallbackQuery, cart: Cart) -> None:
+    """
+    Редактирует клавиатуру товара в конце окна объединения нажатий, если её не отредактирует другое нажатие.
+
+    Блокировка корзины держится только на время чтения корзины, а не на время запроса к Telegram.
+    """
+    if not await cart_tap_coalescer.delay_edit(callback.from_user.id, callback.message.message_id):
+        return
+    async with cart_tap_coalescer.lock(callback.from_user.id):
+        await cart.get_items_from_redis()
+    await _edit_product_keyboard(callback, cart)
 
 
-@router.callback_query(F.data == "cart")
-async def process_cart_callback(callback: CallbackQuery, extra: dict[str, Any]):
+@callback_dispatcher.register("cart")
+async def process_cart_callback(
+    callback: CallbackQuery, extra: dict[str, Any], preloaded: PreloadedContext | None = None
+):
     """
     Хэндлер для обработки колбэков кнопоки корзины.
     """
@@ -138,18 +188,27 @@ async def process_cart_callback(callback: CallbackQuery, extra: dict[str, Any]):
     logger.info("Callback: %s", callback.data)
 
     cart = Cart(user_id=callback.from_user.id)
+    if preloaded is not None and preloaded.cart_lines is not None:
+        await cart.load_items(preloaded.cart_lines)
+    else:
+        await cart.get_items_from_redis()
     keyboard = cart.get_cart_inline_keyboard()
-    await cart.get_items_from_redis()
     caption = cart.get_cart_text()
-    photo = await cache_services.get_photo_file_id("cart") or InputMediaPhoto(media=FSInputFile("images/cart.jpg"))
+    photo = await cache_services.get_photo_file_id("cart", preloaded) or InputMediaPhoto(
+        media=FSInputFile("images/cart.jpg")
+    )
     photo.caption = caption
-    answer = await callback.message.edit_media(media=photo, reply_markup=keyboard)
-    await cache_services.save_photo_file_id(answer, key="cart")
+    photo, content_hash = await cache_services.resolve_photo(callback.bot, "cart", photo)
+    answer = await screen_state_tracker.show(callback.message, photo, keyboard, preloaded)
+    await cache_services.save_photo_file_id(answer, key="cart", content_hash=content_hash)
 
 
-@router.callback_query(EditCartCallbackFactory.filter())
+@callback_dispatcher.register(EditCartCallbackFactory)
 async def process_edit_cart_callback(
-    callback: CallbackQuery, extra: dict[str, Any], callback_data: EditCartCallbackFactory
+    callback: CallbackQuery,
+    extra: dict[str, Any],
+    callback_data: EditCartCallbackFactory,
+    preloaded: PreloadedContext | None = None,
 ):
     """
     Хэндлер для обработки колбэков кнопоки редактирования корзины.
@@ -158,7 +217,10 @@ async def process_edit_cart_callback(
     logger.info("Callback: %s", callback.data)
     logger.info("Callback data: %s", callback_data)
     cart = Cart(user_id=callback.from_user.id)
-    await cart.get_items_from_redis()
+    if preloaded is not None and preloaded.cart_lines is not None:
+        await cart.load_items(preloaded.cart_lines)
+    else:
+        await cart.get_items_from_redis()
     keyboard = await services.get_edit_cart_inline_keyboard(cart)
     await callback.message.edit_reply_markup(
         reply_markup=services.pagination_keyboard(
@@ -170,23 +232,22 @@ async def process_edit_cart_callback(
     )
 
 
-@router.callback_query(F.data == "clear_cart")
-async def process_cart_clear_callback(callback: CallbackQuery, extra: dict[str, Any]):
+@callback_dispatcher.register("clear_cart")
+async def process_cart_clear_callback(
+    callback: CallbackQuery, extra: dict[str, Any], preloaded: PreloadedContext | None = None
+):
     """
     Хэндлер для обработки колбэка очистки корзины
     """
     logger.info("Handler for clear cart")
     logger.info("Callback: %s", callback.data)
     cart = Cart(user_id=callback.from_user.id)
-    photo = await cache_services.get_photo_file_id("clear_cart") or FSInputFile("images/cart.jpg")
-    photo.caption = LEXICON_RU["messages"]["cart_is_empty"]
-    await cart.clear()
-    answer = await callback.message.edit_media(
-        media=(
-            InputMediaPhoto(media=photo, caption=LEXICON_RU["messages"]["cart_is_empty"])
-            if isinstance(photo, FSInputFile)
-            else photo
-        ),
-        reply_markup=await get_start_keyboard(),
+    photo = await cache_services.get_photo_file_id("clear_cart", preloaded) or InputMediaPhoto(
+        media=FSInputFile("images/cart.jpg")
     )
-    await cache_services.save_photo_file_id(answer, key="clear_cart")
+    photo.caption = LEXICON_RU["messages"]["cart_is_empty"]
+    photo, content_hash = await cache_services.resolve_photo(callback.bot, "clear_cart", photo)
+    async with cart_tap_coalescer.lock(callback.from_user.id):
+        await cart.clear()
+    answer = await screen_state_tracker.show(callback.message, photo, await get_start_keyboard(), preloaded)
+    await cache_services.save_photo_file_id(answer, key="clear_cart", content_hash=content_hash)
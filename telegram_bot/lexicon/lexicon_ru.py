@@ -5,15 +5,30 @@ LEXICON_RU: dict[Literal["system", "commands", "inline", "messages"], Any] = {
     "system": {
         "config_loaded": "Configuration loaded.",
         "bot_created": "Bot created.",
+        "request_scheduler_registred": "Request scheduler registred.",
         "dispatcher_created": "Dispatcher created.",
         "bot_config_loaded": "Bot config loaded.",
         "api_config_loaded": "API config loaded.",
         "redis_config_loaded": "Redis config loaded.",
+        "catalog_cache_config_loaded": "Catalog cache config loaded.",
+        "photo_warmup_config_loaded": "Photo warmup config loaded.",
+        "updates_config_loaded": "Updates config loaded.",
+        "telegram_limits_config_loaded": "Telegram limits config loaded.",
         "redis_connection_created": "Redis connection created.",
         "redis_pool_created": "Redis connection pool created.",
+        "photo_file_id_cache_loaded": "Photo file id cache loaded.",
+        "photo_file_id_writer_started": "Photo file id writer started.",
+        "photo_warmup_started": "Photo warmup started.",
+        "api_client_created": "API client created.",
+        "catalog_cache_configured": "Catalog cache configured.",
+        "catalog_snapshot_started": "Catalog snapshot started.",
         "workflow_data_updated": "Workflow data updated.",
         "main_menu_set": "Main menu installed.",
+        "polling_started": "Polling started.",
+        "webhook_started": "Webhook server started.",
+        "stream_worker_started": "Update stream worker started.",
         "routers_registred": "Routers registred.",
+        "middlewares_registred": "Middlewares registred.",
         "wrong": "Something went wrong. ❌",
         "wip": "Work in progress. 🚧",
         "not_found": "Не найдено",
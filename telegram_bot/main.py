@@ -1,13 +1,35 @@
 import asyncio
 import logging
+from contextlib import suppress
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from config_data import constants
 from config_data.config import Config, load_config
 from handlers import callback_handlers, command_handlers
 from keyboards.set_main_menu import set_main_menu
 from lexicon.lexicon_ru import LEXICON_RU
+from middlewares.callback_middlewares import PreloadContextMiddleware
+from middlewares.update_middlewares import (
+    ConcurrencyLimitMiddleware,
+    StreamPublishMiddleware,
+)
+from services.api_client import ApiClient
+from services.cache_services import delete_legacy_photo_file_ids, photo_file_id_writer
+from services.cart_taps import cart_tap_coalescer
+from services.catalog_cache import catalog_cache
+from services.catalog_snapshot import catalog_snapshot
+from services.keyboard_cache import category_keyboard_cache
+from services.photo_file_id_cache import photo_file_id_cache
+from services.photo_warmup import warm_up_photos
+from services.prefetch import product_prefetcher
 from services.redis_services import get_redis_connection, redis_singleton
+from services.request_scheduler import RequestScheduler
+from services.screen_state import screen_state_tracker
+from services.single_flight import catalog_single_flight
+from services.stats_reporter import stats_reporter
+from services.update_stream import UpdateStream, UpdateStreamWorker, run_stream_worker
+from services.webhook_services import run_polling, run_webhook
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +53,25 @@ async def main():
         logging.info(f"Ping Redis: {ping_redis_result}")
     logging.info(LEXICON_RU["system"]["redis_pool_created"])
 
+    # Log Redis pool stats periodically to size the pool.
+    stats_reporter.register("redis_pool", redis_singleton.get_stats, redis_singleton.start_stats_window)
+    stats_reporter.start(constants.STATS_LOG_INTERVAL)
+
+    # Delete photo file ids saved before the content hash index.
+    await delete_legacy_photo_file_ids()
+
+    # Load photo file ids and subscribe to their changes.
+    await photo_file_id_cache.start()
+    logging.info(LEXICON_RU["system"]["photo_file_id_cache_loaded"])
+
+    # Start background saving of photo file ids.
+    photo_file_id_writer.start()
+    logging.info(LEXICON_RU["system"]["photo_file_id_writer_started"])
+
+    # Configure catalog cache.
+    catalog_cache.configure(config.catalog_cache)
+    logging.info(LEXICON_RU["system"]["catalog_cache_configured"])
+
     # Create Bot
     bot: Bot = Bot(
         token=config.bot.bot_token.get_secret_value(),
@@ -38,6 +79,11 @@ async def main():
     )
     logging.info(LEXICON_RU["system"]["bot_created"])
 
+    # Schedule outgoing requests within Telegram limits.
+    request_scheduler = RequestScheduler(**config.telegram_limits.model_dump())
+    bot.session.middleware(request_scheduler)
+    logging.info(LEXICON_RU["system"]["request_scheduler_registred"])
+
     # Create Dispatcher.
     dp: Dispatcher = Dispatcher()
     logging.info(LEXICON_RU["system"]["dispatcher_created"])
@@ -47,11 +93,67 @@ async def main():
     dp.include_router(callback_handlers.router)
     logging.info(LEXICON_RU["system"]["routers_registred"])
 
+    # Register middlewares.
+    update_stream = UpdateStream(
+        config.updates.stream_name, config.updates.stream_partitions, config.updates.stream_maxlen
+    )
+    if config.updates.role == "receiver":
+        dp.update.outer_middleware(StreamPublishMiddleware(update_stream))
+    concurrency_limit = ConcurrencyLimitMiddleware(config.updates.max_concurrent)
+    dp.update.outer_middleware(concurrency_limit)
+    callback_handlers.router.callback_query.outer_middleware(
+        PreloadContextMiddleware(callback_handlers.callback_dispatcher)
+    )
+    logging.info(LEXICON_RU["system"]["middlewares_registred"])
+
+    # Create API client with shared connection pool.
+    api_client = ApiClient.from_config(config.api)
+    dp.startup.register(api_client.start)
+    logging.info(LEXICON_RU["system"]["api_client_created"])
+
+    # Load catalog snapshot for navigation without API requests.
+    await catalog_snapshot.start(api_client, config.catalog_cache.snapshot_refresh_interval)
+    logging.info(LEXICON_RU["system"]["catalog_snapshot_started"])
+
+    # Upload pictures to Telegram in background to get their file ids.
+    if config.photo_warmup.on_startup and config.photo_warmup.chat_id is not None:
+        photo_warmup_task = asyncio.create_task(
+            warm_up_photos(bot, config.photo_warmup.chat_id, catalog_snapshot, config.photo_warmup.concurrency)
+        )
+
+        async def stop_photo_warmup() -> None:
+            photo_warmup_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await photo_warmup_task
+
+        dp.shutdown.register(stop_photo_warmup)
+        logging.info(LEXICON_RU["system"]["photo_warmup_started"])
+
+    # Log stats of caches, request coalescing and limits together with Redis pool stats.
+    stats_reporter.register("catalog_cache", catalog_cache.get_stats)
+    stats_reporter.register("catalog_single_flight", catalog_single_flight.get_stats)
+    stats_reporter.register("category_keyboard_cache", lambda: dict(category_keyboard_cache.stats))
+    stats_reporter.register("screen_state", lambda: dict(screen_state_tracker.stats))
+    stats_reporter.register("product_prefetcher", lambda: dict(product_prefetcher.stats))
+    stats_reporter.register("cart_taps", lambda: dict(cart_tap_coalescer.stats))
+    stats_reporter.register("request_scheduler", lambda: dict(request_scheduler.stats))
+    stats_reporter.register("concurrency_limit", concurrency_limit.get_stats)
+
+    # Register shutdown callbacks.
+    dp.shutdown.register(product_prefetcher.stop)
+    dp.shutdown.register(catalog_snapshot.stop)
+    dp.shutdown.register(api_client.close)
+    dp.shutdown.register(photo_file_id_writer.stop)
+    dp.shutdown.register(photo_file_id_cache.stop)
+    dp.shutdown.register(stats_reporter.stop)
+    dp.shutdown.register(redis_singleton.close)
+
     # Update workflow data.
     dp.workflow_data.update(
         {
             "extra": {
                 "api_url": config.api.get_api_url(),
+                "api_client": api_client,
             }
         }
     )
@@ -61,8 +163,23 @@ async def main():
     await set_main_menu(bot)
     logging.info(LEXICON_RU["system"]["main_menu_set"])
 
-    # Start polling.
-    await dp.start_polling(bot)
+    # Start receiving updates.
+    # Receiver writes updates to the stream in the order they come, workers handle them.
+    handle_in_order = config.updates.role == "receiver"
+    if config.updates.role == "worker":
+        # A worker handles updates of one user one by one, so the next tap never comes within the window.
+        cart_tap_coalescer.window = 0
+        logging.info(LEXICON_RU["system"]["stream_worker_started"])
+        worker = UpdateStreamWorker(
+            update_stream, dp, bot, group=config.updates.stream_group, lease_ttl=config.updates.stream_lease_ttl
+        )
+        await run_stream_worker(dp, bot, worker)
+    elif config.updates.mode == "webhook":
+        logging.info(LEXICON_RU["system"]["webhook_started"])
+        await run_webhook(dp, bot, config.updates, handle_in_background=not handle_in_order)
+    else:
+        logging.info(LEXICON_RU["system"]["polling_started"])
+        await run_polling(dp, bot, handle_as_tasks=not handle_in_order)
 
 
 if __name__ == "__main__":
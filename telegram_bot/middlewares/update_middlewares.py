@@ -0,0 +1,72 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from services.update_stream import UpdateStream
+
+logger = getLogger(__name__)
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений, который ограничивает количество одновременно обрабатываемых обновлений.
+
+    И polling, и webhook запускают обработку каждого обновления в отдельной задаче без ограничений. Обновления сверх
+    лимита ждут, пока освободится место, поэтому всплеск обновлений не исчерпывает пул соединений Redis и API.
+    """
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if self._semaphore.locked():
+            logger.debug("Update waits for a free slot. In flight %s", self.in_flight)
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> dict[str, int]:
+        """
+        Возвращает лимит, количество обрабатываемых и ожидающих обновлений.
+        """
+        return {"max_concurrent": self.max_concurrent, "in_flight": self.in_flight, "waiting": self.waiting}
+
+
+class StreamPublishMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений для приёмника: записывает обновление в поток Redis вместо обработки.
+
+    Обновления обрабатывают процессы-обработчики, которые читают поток.
+    """
+
+    def __init__(self, update_stream: UpdateStream):
+        self.update_stream = update_stream
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update):
+            await self.update_stream.publish(event.model_dump(mode="json", by_alias=True, exclude_unset=True))
+            return None
+        return await handler(event, data)
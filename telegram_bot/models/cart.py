@@ -7,24 +7,188 @@ from filters.callback_factories import (
     AddToCartCallbackFactory,
     EditCartCallbackFactory,
     RemoveFromCartCallbackFactory,
+    split_cart_line,
 )
 from lexicon.lexicon_ru import LEXICON_RU
-from models.models import ProductModel
 from pydantic import BaseModel, Field
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
 from services.redis_services import get_redis_connection
 
 logger = logging.getLogger(__name__)
 
 
+class CartScript:
+    """
+    Скрипт корзины в Redis.
+
+    Объект скрипта redis создаётся один раз, при первом вызове, и затем выполняется на переданном соединении.
+    Поэтому хэш скрипта не считается заново при каждом изменении корзины.
+    """
+
+    def __init__(self, script: str):
+        self.script = script
+        self._registered_script: AsyncScript | None = None
+
+    async def __call__(self, redis_connection: Redis, keys: list[str], args: tuple = ()) -> Any:
+        if self._registered_script is None:
+            self._registered_script = redis_connection.register_script(self.script)
+        return await self._registered_script(keys=keys, args=args, client=redis_connection)
+
+
+# Скрипты выполняются в Redis атомарно и сразу возвращают обновлённую корзину.
+# Строка товара в корзине имеет вид "id:name:price:quantity:cost". Название может содержать ":", поэтому id
+# отделяется слева, а остальные поля справа. Строка, которая не разбирается, в корзину не записывается.
+# Рядом с корзиной хранится хэш с итогами: количество товаров (item_count) и общая стоимость в копейках
+# (total_cost_cents). Итоги меняются в том же скрипте, что и строки корзины. Если хэша с итогами нет,
+# то он пересчитывается по строкам корзины.
+CART_INFO_FUNCTIONS = """
+local function parse_line(line)
+    return string.match(line, '^([^:]*):(.*):([^:]*):([^:]*):([^:]*)$')
+end
+local function to_cents(price)
+    return math.floor(tonumber(price) * 100 + 0.5)
+end
+local function line_cost(price, quantity)
+    local decimals = #(string.match(price, '%.(%d*)$') or '')
+    return string.format('%.' .. decimals .. 'f', to_cents(price) * quantity / 100)
+end
+local function ensure_info()
+    if redis.call('EXISTS', KEYS[2]) == 1 then
+        return
+    end
+    local item_count, total_cost_cents = 0, 0
+    for _, line in ipairs(redis.call('HVALS', KEYS[1])) do
+        local _, _, price, quantity = parse_line(line)
+        item_count = item_count + tonumber(quantity)
+        total_cost_cents = total_cost_cents + to_cents(price) * tonumber(quantity)
+    end
+    redis.call('HSET', KEYS[2], 'item_count', item_count, 'total_cost_cents', total_cost_cents)
+end
+local function update_info(price, delta)
+    redis.call('HINCRBY', KEYS[2], 'item_count', delta)
+    redis.call('HINCRBY', KEYS[2], 'total_cost_cents', to_cents(price) * delta)
+end
+"""
+
+CHANGE_PRODUCT_QUANTITY_SCRIPT = CartScript(CART_INFO_FUNCTIONS + """
+ensure_info()
+local line = redis.call('HGET', KEYS[1], ARGV[1])
+if not line then
+    if ARGV[3] == '' then
+        return false
+    end
+    local _, _, price, quantity = parse_line(ARGV[3])
+    if not tonumber(price) or not tonumber(quantity) then
+        return redis.error_reply('Bad cart line')
+    end
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[3])
+    update_info(price, tonumber(quantity))
+    return redis.call('HGETALL', KEYS[1])
+end
+local id, name, price, quantity = parse_line(line)
+local new_quantity = tonumber(quantity) + tonumber(ARGV[2])
+if new_quantity <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    update_info(price, -tonumber(quantity))
+else
+    local new_line = table.concat({id, name, price, new_quantity, line_cost(price, new_quantity)}, ':')
+    redis.call('HSET', KEYS[1], ARGV[1], new_line)
+    update_info(price, new_quantity - tonumber(quantity))
+end
+return redis.call('HGETALL', KEYS[1])
+""")
+
+DELETE_PRODUCT_SCRIPT = CartScript(CART_INFO_FUNCTIONS + """
+ensure_info()
+local line = redis.call('HGET', KEYS[1], ARGV[1])
+if line then
+    local _, _, price, quantity = parse_line(line)
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    update_info(price, -tonumber(quantity))
+end
+return redis.call('HGETALL', KEYS[1])
+""")
+
+CART_INFO_SCRIPT = CartScript(CART_INFO_FUNCTIONS + """
+ensure_info()
+return {
+    redis.call('HLEN', KEYS[1]),
+    redis.call('HGET', KEYS[2], 'item_count'),
+    redis.call('HGET', KEYS[2], 'total_cost_cents'),
+}
+""")
+
+
+class CartLine:
+    """
+    Строка корзины.
+
+    Строки корзины пишет только бот, поэтому они разбираются и собираются напрямую, без проверок pydantic.
+    Стоимость строки пишется в Redis, чтобы сохранить формат строки "id:name:price:quantity:cost", но при чтении
+    она не используется: атрибутом не хранится и считается по цене и количеству.
+    """
+
+    __slots__ = ("id", "name", "price", "quantity")
+
+    def __init__(self, id: int, name: str, price: Decimal, quantity: int):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.quantity = quantity
+
+    @classmethod
+    def from_redis(cls, value: str, separator: str = AddToCartCallbackFactory.__separator__) -> "CartLine":
+        """
+        Создаёт строку корзины из строки Redis вида "id:name:price:quantity:cost".
+        """
+        id, name, price, quantity, _ = split_cart_line(value, separator)
+        return cls(int(id), name, Decimal(price), int(quantity))
+
+    def to_redis(self, separator: str = AddToCartCallbackFactory.__separator__) -> str:
+        """
+        Возвращает строку для корзины в Redis.
+        """
+        return separator.join((str(self.id), self.name, str(self.price), str(self.quantity), str(self.cost)))
+
+    @property
+    def cost(self) -> Decimal:
+        return self.price * self.quantity
+
+    def model_dump(self, by_alias: bool = False) -> dict[str, Any]:
+        """
+        Возвращает данные строки в виде словаря с теми же ключами, что и у модели товара.
+        """
+        return {
+            "product_id" if by_alias else "id": self.id,
+            "product_name" if by_alias else "name": self.name,
+            "price": self.price,
+            "quantity": self.quantity,
+            "cost": self.cost,
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CartLine):
+            return NotImplemented
+        return (self.id, self.name, self.price, self.quantity) == (other.id, other.name, other.price, other.quantity)
+
+    def __repr__(self) -> str:
+        return f"CartLine(id={self.id!r}, name={self.name!r}, price={self.price!r}, quantity={self.quantity!r})"
+
+
 class Cart(BaseModel):
     """
     Класс корзины, которая хранит свои данные в Redis.
     """
 
-    items: dict[str | int, ProductModel] = {}
+    items: dict[str | int, CartLine] = {}
     user_id: int = Field(exclude=True)
     cart_name: str = Field(exclude=True)
+    cart_info_name: str = Field(exclude=True)
+    is_items_loaded: bool = Field(default=False, exclude=True)
+    info: dict | None = Field(default=None, exclude=True)
+    quantities: dict[str, int] = Field(default={}, exclude=True)
     redis_connection_provider: Callable = Field(exclude=True)
 
     class Config:
@@ -34,10 +198,12 @@ class Cart(BaseModel):
         super().__init__(
             user_id=user_id,
             cart_name=f"cart:{user_id}",
+            cart_info_name=f"cart:{user_id}:info",
             redis_connection_provider=redis_connection_provider,
         )
         self.user_id = user_id
         self.cart_name = f"cart:{self.user_id}"
+        self.cart_info_name = f"{self.cart_name}:info"
         self.redis_connection_provider = redis_connection_provider
 
     @property
@@ -84,23 +250,71 @@ class Cart(BaseModel):
         ]
         return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-    # TODO: Возможно это не метод корзины. Ну или скрытый метод.
-    async def get_product_model_from_string(self, product_string_from_redis: str) -> ProductModel:
+    async def get_items_from_redis(self) -> None:
         """
-        Метод преобразовывает сроку с данными из Redis в модель товара.
+        Метод берёт все данные товаров из Redis, преобразовывает их в строки корзины, формирует словарь и присваивает атрибуту items.
         """
-        product_dict = AddToCartCallbackFactory.unpack_from_redis(product_string_from_redis).model_dump()
-        return ProductModel(**product_dict, is_data_from_redis=True)
+        product_strings_from_redis = await self._get_cart_data_from_redis()
+        await self._set_items(product_strings_from_redis)
 
-    async def get_items_from_redis(self) -> None:
+    async def _set_items(self, product_strings_from_redis: dict) -> None:
         """
-        Метод берёт все данные товаров из Redis, преобразовывает их в модели товаров, формирует словарь и присваивает атрибуту items.
+        Метод преобразовывает строки корзины из Redis в строки корзины и присваивает их атрибуту items.
         """
-        product_strings_from_redis = await self._get_cart_data_from_redis()
-        items = {
-            key: await self.get_product_model_from_string(value) for key, value in product_strings_from_redis.items()
+        self.items = {key: CartLine.from_redis(value) for key, value in product_strings_from_redis.items()}
+        self.is_items_loaded = True
+
+    async def load_items(self, product_strings_from_redis: dict) -> None:
+        """
+        Метод заполняет корзину строками, уже прочитанными из Redis, без обращения к Redis.
+        """
+        await self._set_items(product_strings_from_redis)
+
+    def load_info(self, cart_info: dict, quantities: dict[str, int] | None = None) -> None:
+        """
+        Метод запоминает итоги корзины и количества отдельных товаров, уже прочитанные из Redis.
+
+        Они используются, пока строки корзины не загружены.
+        """
+        self.info = cart_info
+        self.quantities = quantities or {}
+
+    async def queue_info(self, pipe: Pipeline) -> None:
+        """
+        Метод добавляет в конвейер чтение итогов корзины. Результат разбирается методом parse_info.
+        """
+        await CART_INFO_SCRIPT(pipe, keys=[self.cart_name, self.cart_info_name])
+
+    @staticmethod
+    def parse_info(result: list) -> dict[Literal["len", "item_count", "total_cost"], Any]:
+        """
+        Метод возвращает итоги корзины из результата скрипта итогов.
+        """
+        lines_count, item_count, total_cost_cents = result
+        return {
+            "len": int(lines_count),
+            "item_count": int(item_count),
+            "total_cost": Decimal(int(total_cost_cents)).scaleb(-2),
         }
-        self.items = items
+
+    @staticmethod
+    def parse_quantity(product_string_from_redis: str | None) -> int:
+        """
+        Метод возвращает количество товара из строки корзины. Если строки нет, то возвращает 0.
+        """
+        if product_string_from_redis is None:
+            return 0
+        return int(split_cart_line(product_string_from_redis, AddToCartCallbackFactory.__separator__)[3])
+
+    async def _run_cart_script(self, script: CartScript, *args: str | int) -> dict | None:
+        """
+        Метод выполняет скрипт изменения корзины в Redis и возвращает обновлённую корзину.
+        """
+        async with self.redis_connection_provider() as redis_connection:
+            result = await script(redis_connection, keys=[self.cart_name, self.cart_info_name], args=args)
+        if result is None:
+            return None
+        return dict(zip(result[::2], result[1::2]))
 
     # TODO: Метод вообще не используется нигде.
     async def save_cart(self) -> None:
@@ -108,17 +322,16 @@ class Cart(BaseModel):
         Метод сохраняет данные из атрибута items в Redis в виде строк.
         """
         async with self.redis_connection_provider() as redis_connection:
+            await redis_connection.delete(self.cart_info_name)
             for key, value in self.items.items():
-                await redis_connection.hset(
-                    self.cart_name, key, AddToCartCallbackFactory(**value.model_dump()).get_product_str_for_redis()
-                )
+                await redis_connection.hset(self.cart_name, key, value.to_redis())
 
     async def clear(self) -> None:
         """
         Метод очищает корзину.
         """
         async with self.redis_connection_provider() as redis_connection:
-            await redis_connection.delete(self.cart_name)
+            await redis_connection.delete(self.cart_name, self.cart_info_name)
         await self.get_items_from_redis()
 
     async def check_cart_exist(self) -> bool:
@@ -133,19 +346,17 @@ class Cart(BaseModel):
     async def add_product_in_cart(self, callback_data: AddToCartCallbackFactory) -> None:
         """
         Метод добавляет в корзину новый товар или увеличивает количество уже существующего.
+
+        Проверка наличия товара, изменение количества и чтение корзины выполняются одним скриптом в Redis.
         """
-        async with self.redis_connection_provider() as redis_connection:
-            if await redis_connection.hexists(self.cart_name, callback_data.id):
-                await self.change_product_quantity(callback_data, quantity=callback_data.quantity)
-                logger.debug("Product %s incremented in cart", callback_data.name)
-            else:
-                await redis_connection.hset(
-                    name=self.cart_name,
-                    key=str(callback_data.id),
-                    value=callback_data.get_product_str_for_redis(),
-                )
-                logger.debug("Product %s added to cart", callback_data.get_product_str_for_redis())
-        await self.get_items_from_redis()
+        product_strings_from_redis = await self._run_cart_script(
+            CHANGE_PRODUCT_QUANTITY_SCRIPT,
+            str(callback_data.id),
+            callback_data.quantity,
+            callback_data.get_product_str_for_redis(),
+        )
+        logger.debug("Product %s added to cart", callback_data.get_product_str_for_redis())
+        await self._set_items(product_strings_from_redis)
 
     async def remove_product_from_cart(self, callback_data: RemoveFromCartCallbackFactory) -> None:
         """
@@ -162,26 +373,19 @@ class Cart(BaseModel):
         """
         self._validate_callback_data_and_quantity(callback_data, quantity)
 
-        async with self.redis_connection_provider() as redis_connection:
-            string_product_from_redis: str = await redis_connection.hget(self.cart_name, callback_data.id)
-
-            if string_product_from_redis is None:
-                raise ValueError("Product not exists in cart")
-
-            product_from_redis = callback_data.unpack_from_redis(string_product_from_redis)
-            product_from_redis.quantity += quantity
-            if product_from_redis.quantity <= 0:
-                await redis_connection.hdel(
-                    self.cart_name,
-                    callback_data.id,
-                )
-            else:
-                await redis_connection.hset(
-                    name=self.cart_name,
-                    key=callback_data.id,
-                    value=product_from_redis.get_product_str_for_redis(),
-                )
-        await self.get_items_from_redis()
+        product_strings_from_redis = await self._run_cart_script(
+            CHANGE_PRODUCT_QUANTITY_SCRIPT, str(callback_data.id), quantity, ""
+        )
+        if product_strings_from_redis is None:
+            raise ValueError("Product not exists in cart")
+        await self._set_items(product_strings_from_redis)
+
+    async def delete_product_from_cart(self, product_id: int | str) -> None:
+        """
+        Метод удаляет товар из корзины независимо от его количества.
+        """
+        product_strings_from_redis = await self._run_cart_script(DELETE_PRODUCT_SCRIPT, str(product_id))
+        await self._set_items(product_strings_from_redis)
 
     async def _get_cart_data_from_redis(self) -> dict:
         """
@@ -190,15 +394,37 @@ class Cart(BaseModel):
         async with self.redis_connection_provider() as redis_connection:
             return await redis_connection.hgetall(self.cart_name)
 
-    async def get_cart_info(self) -> dict[Literal["len", "total_cost"], Any]:
+    async def get_cart_info(self) -> dict[Literal["len", "item_count", "total_cost"], Any]:
         """
         Метод возвращает словарь со свойствами корзины.
+
+        Если товары корзины уже загружены, то итоги считаются по ним. Если итоги уже прочитаны, то они возвращаются
+        без обращения к Redis. Иначе итоги читаются из Redis одним запросом, без чтения и разбора строк корзины.
         """
-        await self.get_items_from_redis()
-        return {
-            "len": len(self.items),
-            "total_cost": self.total_cost,
-        }
+        if self.is_items_loaded:
+            return {
+                "len": len(self.items),
+                "item_count": sum(product.quantity for product in self.items.values()),
+                "total_cost": self.total_cost,
+            }
+        if self.info is not None:
+            return dict(self.info)
+        async with self.redis_connection_provider() as redis_connection:
+            result = await CART_INFO_SCRIPT(redis_connection, keys=[self.cart_name, self.cart_info_name])
+        return self.parse_info(result)
+
+    async def get_product_quantity(self, product_id: int | str) -> int:
+        """
+        Метод возвращает количество товара в корзине.
+        """
+        if self.is_items_loaded:
+            product = self.items.get(str(product_id))
+            return product.quantity if product is not None else 0
+        if str(product_id) in self.quantities:
+            return self.quantities[str(product_id)]
+        async with self.redis_connection_provider() as redis_connection:
+            product_string_from_redis = await redis_connection.hget(self.cart_name, str(product_id))
+        return self.parse_quantity(product_string_from_redis)
 
     def model_dump(self, **kwargs):
         """
@@ -71,12 +71,12 @@ class ProductModel(BaseModel):
             [
                 InlineKeyboardButton(
                     text=LEXICON_RU["inline"]["add_cart"],
-                    callback_data=AddToCartCallbackFactory(**self.model_dump()).pack(),
+                    callback_data=AddToCartCallbackFactory.pack_compact(self.id),
                 ),
             ],
             [
-                InlineKeyboardButton(text="-", callback_data=RemoveFromCartCallbackFactory(**self.model_dump()).pack()),
-                InlineKeyboardButton(text="+", callback_data=AddToCartCallbackFactory(**self.model_dump()).pack()),
+                InlineKeyboardButton(text="-", callback_data=RemoveFromCartCallbackFactory.pack_compact(self.id)),
+                InlineKeyboardButton(text="+", callback_data=AddToCartCallbackFactory.pack_compact(self.id)),
             ],
             [
                 InlineKeyboardButton(
@@ -133,7 +133,8 @@ class CategoryModel(BaseModel):
     def __init__(self, /, **data: Any) -> None:
         super().__init__(**data)
         self.picture = self.get_picture(data)
-        self.keyboard = self.get_category_inline_keyboard(data)
+        if data.get("keyboard") is None:
+            self.keyboard = self.get_category_inline_keyboard(data)
 
     def get_category_inline_keyboard(self, data: dict) -> InlineKeyboardMarkup:
         """
@@ -188,3 +189,34 @@ class CategoryModel(BaseModel):
             return InputMediaPhoto(media=URLInputFile(data["picture"]), caption=self.name)
         logger.info("Category model: Image from Redis is used.")
         return InputMediaPhoto(media=data["picture"], caption=self.name)
+
+
+class PreloadedContext(BaseModel):
+    """
+    Модель данных, прочитанных для обработки колбэка до вызова хэндлера.
+
+    В photo_file_ids хранятся все запрошенные ключи изображений. Если file_id не найден, то значение равно None.
+    В cart_info хранятся итоги корзины, а в cart_quantities - количества отдельных товаров в корзине.
+    Значение None у cart_lines, cart_info, cart_quantities, catalog_data и screen_state означает, что эти данные
+    не загружались.
+    """
+
+    auth_token: str | None = None
+    cart_lines: dict[str, str] | None = None
+    cart_info: dict[str, Any] | None = None
+    cart_quantities: dict[str, int] | None = None
+    photo_file_ids: dict[str, str | None] = {}
+    catalog_data: dict | None = None
+    screen_state: dict[str, str] | None = None
+
+    def has_photo_key(self, key: str | None) -> bool:
+        """
+        Метод возвращает True, если наличие file_id для ключа уже проверено.
+        """
+        return key in self.photo_file_ids
+
+    def get_photo_file_id(self, key: str | None) -> str | None:
+        """
+        Метод возвращает загруженный file_id изображения.
+        """
+        return self.photo_file_ids.get(key)
@@ -0,0 +1,84 @@
+import logging
+
+import aiohttp
+from config_data.config import ApiConfig
+
+logger = logging.getLogger(__name__)
+
+
+class ApiClient:
+    """
+    Клиент API с общим пулом keep-alive соединений.
+
+    Создаётся один раз при старте диспетчера и закрывается при его остановке.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 30,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        total_timeout: float = 10,
+        connect_timeout: float = 3,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self._session: aiohttp.ClientSession | None = None
+
+    @classmethod
+    def from_config(cls, api_config: ApiConfig) -> "ApiClient":
+        """
+        Создаёт клиент по настройкам доступа к API.
+        """
+        return cls(
+            base_url=api_config.get_api_url(),
+            connection_limit=api_config.connection_limit,
+            connection_limit_per_host=api_config.connection_limit_per_host,
+            keepalive_timeout=api_config.keepalive_timeout,
+            dns_cache_ttl=api_config.dns_cache_ttl,
+            total_timeout=api_config.total_timeout,
+            connect_timeout=api_config.connect_timeout,
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Возвращает общую сессию. Сессия создаётся при первом обращении, чтобы быть привязанной к работающему циклу событий.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            logger.info("API client session created for %s", self.base_url)
+        return self._session
+
+    def get_url(self, path: str) -> str:
+        """
+        Возвращает полный адрес эндпоинта API.
+        """
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    async def start(self) -> None:
+        """
+        Открывает сессию. Регистрируется на старт диспетчера.
+        """
+        self.session
+
+    async def close(self) -> None:
+        """
+        Закрывает сессию и все соединения пула. Регистрируется на остановку диспетчера.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("API client session closed")
+        self._session = None
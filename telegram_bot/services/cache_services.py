@@ -1,19 +1,153 @@
+import asyncio
+import hashlib
 import logging
+from contextlib import suppress
 
-from aiogram.types import CallbackQuery, InputMediaPhoto, Message
+from aiogram import Bot
+from aiogram.types import (
+    BufferedInputFile,
+    CallbackQuery,
+    InputFile,
+    InputMediaPhoto,
+    Message,
+)
 from config_data import constants
+from models.models import PreloadedContext
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from services.photo_file_id_cache import get_file_ids_from_redis, photo_file_id_cache
 from services.redis_services import get_redis_connection
 
 logger = logging.getLogger(__name__)
 
 
-async def get_photo_file_id(key: str) -> InputMediaPhoto | None:
+class PhotoFileIdWriter:
+    """
+    Фоновая запись file_id изображений в Redis.
+
+    Хэндлеры только ставят file_id в очередь и не ждут записи. Фоновая задача забирает из очереди всё, что в ней
+    накопилось, и записывает одним конвейером. file_id записывается по хэшу содержимого изображения командой HSETNX,
+    поэтому уже сохранённый file_id не перезаписывается. Ключ изображения записывается в индекс. Изменения
+    публикуются в канал, чтобы их получили все процессы бота.
+    """
+
+    def __init__(self, batch_size: int = 100, max_queue_size: int = 1000):
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue[tuple[str | None, str, str | None]] = asyncio.Queue(maxsize=max_queue_size)
+        self._pending_keys: set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None
+
+    def enqueue(self, key: str | None, content_hash: str, file_id: str | None = None) -> None:
+        """
+        Ставит в очередь на запись ключ изображения и file_id для хэша его содержимого.
+
+        Если ключ уже ждёт записи, то повторно он не ставится. Если file_id равен None, то записывается только индекс.
+        """
+        pending_key = key or content_hash
+        if pending_key in self._pending_keys:
+            return
+        try:
+            self._queue.put_nowait((key, content_hash, file_id))
+        except asyncio.QueueFull:
+            logger.warning("Photo file id queue is full. Key %s is skipped", pending_key)
+            return
+        self._pending_keys.add(pending_key)
+
+    async def write(self, batch: list[tuple[str | None, str, str | None]]) -> None:
+        """
+        Записывает в Redis индекс ключей изображений и file_id, если для хэша содержимого ещё нет file_id.
+        """
+        async with get_redis_connection() as redis_connection:
+            pipe = redis_connection.pipeline(transaction=False)
+            for key, content_hash, file_id in batch:
+                if file_id is not None:
+                    pipe.hsetnx(constants.PHOTO_FILE_ID_HASH_NAME, content_hash, file_id)
+                if key is not None:
+                    pipe.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, key, content_hash)
+            results = iter(await pipe.execute())
+
+            changes = []
+            for key, content_hash, file_id in batch:
+                is_saved = next(results) if file_id is not None else False
+                if key is not None:
+                    next(results)
+                changes.append((key, content_hash, file_id if is_saved else None))
+
+            pipe = redis_connection.pipeline(transaction=False)
+            for key, content_hash, file_id in changes:
+                pipe.publish(
+                    constants.PHOTO_FILE_ID_CHANNEL_NAME, photo_file_id_cache.get_message(key, content_hash, file_id)
+                )
+            await pipe.execute()
+
+        for key, content_hash, file_id in changes:
+            if photo_file_id_cache.is_loaded:
+                photo_file_id_cache.update(key, content_hash, file_id)
+            logger.info("File ID saved in Redis with key %s and hash %s", key, content_hash)
+
+    def start(self) -> None:
+        """
+        Запускает фоновую запись.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую запись и записывает то, что осталось в очереди.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        while not self._queue.empty():
+            await self._write_batch(self._get_batch())
+
+    def _get_batch(
+        self, batch: list[tuple[str | None, str, str | None]] | None = None
+    ) -> list[tuple[str | None, str, str | None]]:
+        batch = batch or []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write_batch(self, batch: list[tuple[str | None, str, str | None]]) -> None:
+        try:
+            await self.write(batch)
+        except RedisError as e:
+            logger.error("Photo file ids were not saved. %s", e)
+        finally:
+            for key, content_hash, _ in batch:
+                self._pending_keys.discard(key or content_hash)
+
+    async def _run(self) -> None:
+        while True:
+            batch = self._get_batch([await self._queue.get()])
+            await self._write_batch(batch)
+
+
+photo_file_id_writer = PhotoFileIdWriter()
+
+
+async def get_photo_file_id(key: str, preloaded: PreloadedContext | None = None) -> InputMediaPhoto | None:
     """
     Возвращает file_id изображения из Redis.
+
+    Если file_id уже загружен вместе с контекстом колбэка или хэш с file_id загружен в память процесса,
+    то запрос к Redis не выполняется.
     """
-    async with get_redis_connection() as redis_connection:
-        result = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, key)
+    if preloaded is not None and preloaded.has_photo_key(key):
+        result = preloaded.get_photo_file_id(key)
+    elif photo_file_id_cache.is_loaded:
+        result = photo_file_id_cache.get(key)
+    else:
+        async with get_redis_connection() as redis_connection:
+            result = (await get_file_ids_from_redis(redis_connection, [key]))[key]
     if not result is None:
         logger.info("File ID found in Redis with key %s", key)
         logger.info("File ID %s got from Redis", result)
@@ -22,11 +156,89 @@ async def get_photo_file_id(key: str) -> InputMediaPhoto | None:
     return None
 
 
-async def save_photo_file_id(event: Message | CallbackQuery, key: str | None = None) -> None:
+def get_content_hash(content: bytes) -> str:
+    """
+    Возвращает хэш содержимого изображения.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+async def read_input_file(bot: Bot, input_file: InputFile) -> bytes:
+    """
+    Возвращает содержимое файла. Изображения по адресу скачиваются через сессию бота.
+    """
+    if isinstance(input_file, BufferedInputFile):
+        return input_file.data
+    return b"".join([chunk async for chunk in input_file.read(bot)])
+
+
+async def get_file_id_by_hash(content_hash: str) -> str | None:
+    """
+    Возвращает file_id изображения по хэшу его содержимого.
+    """
+    if photo_file_id_cache.is_loaded:
+        return photo_file_id_cache.get_by_hash(content_hash)
+    async with get_redis_connection() as redis_connection:
+        return await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, content_hash)
+
+
+async def delete_legacy_photo_file_ids() -> bool:
+    """
+    Удаляет хэш file_id по названиям, который использовался до хэша по содержимому.
+
+    Его записи нельзя перенести в новый индекс: для этого нужен хэш содержимого изображения, а в старом хэше
+    хранятся только file_id. Хэш удаляется командой UNLINK, поэтому Redis освобождает память в фоне.
+    """
+    async with get_redis_connection() as redis_connection:
+        deleted = await redis_connection.unlink(constants.LEGACY_PHOTO_FILE_ID_HASH_NAME)
+    if deleted:
+        logger.info("Legacy photo file id hash %s is deleted", constants.LEGACY_PHOTO_FILE_ID_HASH_NAME)
+    return bool(deleted)
+
+
+async def resolve_photo(bot: Bot, key: str, photo: InputMediaPhoto) -> tuple[InputMediaPhoto, str | None]:
+    """
+    Подготавливает изображение к отправке и возвращает его вместе с хэшем содержимого, если изображение нужно
+    загрузить в Telegram.
+
+    Если изображение уже задано через file_id, то оно возвращается без изменений. Иначе содержимое изображения
+    читается один раз и по его хэшу ищется file_id: такое же изображение могло быть загружено под другим ключом.
+    Если file_id найден, то изображение отправляется по нему, а ключ записывается в индекс. Если нет, то
+    возвращается прочитанное содержимое и хэш, по которому после отправки нужно сохранить file_id.
     """
-    Сохраняет file id изображения в Redis.
+    if isinstance(photo.media, str):
+        return photo, None
+    content = await read_input_file(bot, photo.media)
+    content_hash = get_content_hash(content)
+    file_id = await get_file_id_by_hash(content_hash)
+    if file_id is not None:
+        logger.info("File ID found by content hash for key %s", key)
+        await _save(key, content_hash)
+        return photo.model_copy(update={"media": file_id}), None
+    filename = photo.media.filename or f"{content_hash}.jpg"
+    return photo.model_copy(update={"media": BufferedInputFile(content, filename=filename)}), content_hash
+
+
+async def _save(key: str | None, content_hash: str, file_id: str | None = None) -> None:
+    if photo_file_id_writer.is_running:
+        photo_file_id_writer.enqueue(key, content_hash, file_id)
+        return
+    try:
+        await photo_file_id_writer.write([(key, content_hash, file_id)])
+    except RedisError as e:
+        logger.error(str(e))
+
+
+async def save_photo_file_id(
+    event: Message | CallbackQuery, key: str | None = None, content_hash: str | None = None
+) -> None:
+    """
+    Сохраняет file id изображения в Redis по хэшу содержимого изображения.
 
     Если параметр key не указан, то в качестве ключа используется описание фотографии из event.
+    Хэш содержимого возвращает resolve_photo. Если его нет, то изображение было отправлено по file_id из кэша,
+    и запись не выполняется. Если запущена фоновая запись, то file_id только ставится в очередь, и ответ
+    пользователю не ждёт записи в Redis.
     """
     file_id = False
     # TODO по идеее можно просто вытаскивать message из callback и пускать его дальше.
@@ -43,18 +255,10 @@ async def save_photo_file_id(event: Message | CallbackQuery, key: str | None = N
     logger.debug("Key is %s", key)
     logger.debug("File ID is %s", file_id)
     if all([key, file_id]):
-        async with get_redis_connection() as redis_connection:
-            is_key_exist = await redis_connection.hexists(constants.PHOTO_FILE_ID_HASH_NAME, key)
-            logger.debug("Is key exist %s", is_key_exist)
-            try:
-                if not is_key_exist:
-                    await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, key, file_id)
-                    logger.info("File ID saved in Redis with key %s", key)
-                else:
-                    logger.info("Key %s already exists", key)
-            # TODO слишком широкий диапазон перехватываемых ошибок. Надо сузить до разумного минимума
-            except Exception as e:
-                logger.error(str(e))
+        if content_hash is None:
+            logger.info("Photo for key %s was sent from cache", key)
+            return
+        await _save(key, content_hash, file_id)
     else:
         logger.error("Key is %s", key)
         logger.error("File ID is %s", file_id)
@@ -0,0 +1,96 @@
+import logging
+from typing import Any, Callable, TypeVar
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+HandlerType = TypeVar("HandlerType", bound=Callable[..., Any])
+
+
+class CallbackDispatcher:
+    """
+    Таблица хэндлеров колбэков.
+
+    Хэндлер ищется в словаре по всем данным колбэка (для колбэков-команд вроде "cart") или по их префиксу (для
+    фабрик колбэков), поэтому время поиска не зависит от количества хэндлеров. Данные колбэка распаковываются
+    фабрикой один раз и передаются хэндлеру в параметре callback_data. Остальные параметры передаются хэндлеру так же,
+    как их передаёт aiogram: только те, которые есть в его сигнатуре.
+
+    Если хэндлер уже найден в middleware, то он передаётся в параметре callback_route и данные колбэка не
+    распаковываются ещё раз.
+    """
+
+    def __init__(self, separator: str = ":"):
+        self.separator = separator
+        self._literals: dict[str, CallableObject] = {}
+        self._prefixes: dict[str, tuple[type[CallbackData], CallableObject]] = {}
+
+    def register(self, *keys: str | type[CallbackData]) -> Callable[[HandlerType], HandlerType]:
+        """
+        Декоратор, который регистрирует хэндлер для колбэков-команд и фабрик колбэков из keys.
+        """
+
+        def decorator(handler: HandlerType) -> HandlerType:
+            callable_object = CallableObject(handler)
+            for key in keys:
+                if isinstance(key, str):
+                    if key in self._literals:
+                        raise ValueError(f"Handler for callback {key!r} is already registered")
+                    self._literals[key] = callable_object
+                    continue
+                if key.__separator__ != self.separator:
+                    raise ValueError(f"{key.__name__} must use separator {self.separator!r}")
+                if key.__prefix__ in self._prefixes:
+                    raise ValueError(f"Handler for prefix {key.__prefix__!r} is already registered")
+                self._prefixes[key.__prefix__] = (key, callable_object)
+            return handler
+
+        return decorator
+
+    def resolve(self, data: str | None) -> tuple[CallableObject, CallbackData | None] | None:
+        """
+        Возвращает хэндлер колбэка и распакованные данные колбэка. Для колбэков-команд данные равны None.
+
+        Если хэндлера нет или данные не распаковываются, то возвращает None.
+        """
+        if data is None:
+            return None
+        handler = self._literals.get(data)
+        if handler is not None:
+            return handler, None
+        prefix, separator, _ = data.partition(self.separator)
+        entry = self._prefixes.get(prefix)
+        if entry is None or not separator:
+            return None
+        factory, handler = entry
+        try:
+            return handler, factory.unpack(data)
+        except (TypeError, ValueError) as e:
+            logger.warning("Callback data %s was not unpacked. %s", data, e)
+            return None
+
+    async def dispatch(self, callback: CallbackQuery, **kwargs: Any) -> Any:
+        """
+        Вызывает хэндлер колбэка. Если хэндлера нет, то колбэк передаётся дальше.
+        """
+        if "callback_route" in kwargs:
+            route = kwargs.pop("callback_route")
+        else:
+            route = self.resolve(callback.data)
+        if route is None:
+            raise SkipHandler()
+        handler, callback_data = route
+        if callback_data is not None:
+            kwargs["callback_data"] = callback_data
+        return await handler.call(callback, **kwargs)
+
+    def setup(self, router: Router) -> None:
+        """
+        Регистрирует в роутере единственный хэндлер колбэков, который вызывает хэндлеры из таблицы.
+        """
+        router.callback_query.register(self.dispatch)
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable
+
+from config_data import constants
+
+logger = logging.getLogger(__name__)
+
+
+class CartTapCoalescer:
+    """
+    Выполняет изменения корзины одного пользователя по очереди и объединяет редактирования клавиатуры при быстрых
+    нажатиях на кнопки корзины.
+
+    Корзина изменяется сразу при каждом нажатии. Клавиатура после нажатия редактируется сразу, если за последнее
+    окно window её не редактировали. Нажатия на ту же кнопку в течение окна после редактирования объединяются в одно
+    редактирование в конце окна, которое показывает корзину после всех нажатий. Изменения корзины одного
+    пользователя выполняются под его блокировкой, изменения корзин разных пользователей друг друга не ждут.
+
+    Если обновления одного пользователя обрабатываются по очереди (воркеры потока обновлений), то следующее нажатие
+    не придёт, пока предыдущее ждёт конца окна, поэтому окно нужно отключить (window=0).
+    """
+
+    def __init__(self, window: float = constants.CART_TAP_WINDOW):
+        self.window = window
+        self._edited_at: dict[tuple[int, Hashable], float] = {}
+        self._pending: set[tuple[int, Hashable]] = set()
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._lock_users: dict[int, int] = {}
+        self.stats = {"taps": 0, "edits": 0, "coalesced": 0}
+
+    def claim_edit(self, user_id: int, key: Hashable) -> bool:
+        """
+        Регистрирует нажатие пользователя на кнопку key.
+
+        Возвращает True, если клавиатуру можно отредактировать сразу: за последнее окно её не редактировали, и
+        отложенного редактирования нет. Иначе нужно вызвать delay_edit.
+        """
+        tap_key = (user_id, key)
+        self.stats["taps"] += 1
+        if self.window > 0 and (tap_key in self._edited_at or tap_key in self._pending):
+            return False
+        self._mark_edited(tap_key)
+        return True
+
+    async def delay_edit(self, user_id: int, key: Hashable) -> bool:
+        """
+        Ждёт конца окна после последнего редактирования клавиатуры.
+
+        Возвращает True, если клавиатуру нужно отредактировать, и False сразу, если её отредактирует другое нажатие,
+        которое уже ждёт. Корзину для редактирования нужно прочитать после ожидания.
+        """
+        tap_key = (user_id, key)
+        if tap_key in self._pending:
+            self.stats["coalesced"] += 1
+            logger.debug("Tap %s of user %s is coalesced", key, user_id)
+            return False
+        self._pending.add(tap_key)
+        try:
+            edited_at = self._edited_at.get(tap_key)
+            if edited_at is not None:
+                await asyncio.sleep(max(edited_at + self.window - time.monotonic(), 0))
+        finally:
+            self._pending.discard(tap_key)
+        self._mark_edited(tap_key)
+        return True
+
+    def _mark_edited(self, tap_key: tuple[int, Hashable]) -> None:
+        self.stats["edits"] += 1
+        if self.window <= 0:
+            return
+        edited_at = self._edited_at[tap_key] = time.monotonic()
+        asyncio.get_running_loop().call_later(self.window, self._expire, tap_key, edited_at)
+
+    def _expire(self, tap_key: tuple[int, Hashable], edited_at: float) -> None:
+        if self._edited_at.get(tap_key) == edited_at:
+            del self._edited_at[tap_key]
+
+    @asynccontextmanager
+    async def lock(self, user_id: int) -> AsyncIterator[None]:
+        """
+        Блокировка корзины пользователя. Удаляется, когда её никто не ждёт.
+        """
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        self._lock_users[user_id] = self._lock_users.get(user_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[user_id] -= 1
+            if not self._lock_users[user_id]:
+                del self._lock_users[user_id]
+                del self._locks[user_id]
+
+
+cart_tap_coalescer = CartTapCoalescer()
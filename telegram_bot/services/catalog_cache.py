@@ -0,0 +1,164 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from config_data.config import CatalogCacheConfig
+from redis.exceptions import RedisError
+from services.redis_services import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CatalogCacheEntry:
+    """
+    Запись кэша каталога: данные, их версия (ETag) и время, до которого данные считаются свежими.
+    """
+
+    data: dict
+    etag: str | None
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class CatalogCache:
+    """
+    Двухуровневый кэш данных каталога.
+
+    Первый уровень - ограниченный по размеру LRU в памяти процесса с временем жизни записей.
+    Второй уровень - Redis, общий для всех реплик бота.
+
+    Устаревшие записи не удаляются сразу: их ETag используется для условного запроса к API.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: int = 300, redis_ttl: int = 3600, key_prefix: str = "catalog"):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.key_prefix = key_prefix
+        self._items: OrderedDict[str, CatalogCacheEntry] = OrderedDict()
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "revalidated": 0}
+
+    def configure(self, catalog_cache_config: CatalogCacheConfig) -> None:
+        """
+        Применяет настройки кэша.
+        """
+        self.max_size = catalog_cache_config.max_size
+        self.ttl = catalog_cache_config.ttl
+        self.redis_ttl = catalog_cache_config.redis_ttl
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def get_redis_key(self, key: str) -> str:
+        """
+        Возвращает имя ключа в Redis.
+        """
+        return f"{self.key_prefix}:{key}"
+
+    def get_local(self, key: str) -> dict | None:
+        """
+        Возвращает данные из памяти процесса, если запись есть и ещё не устарела.
+        """
+        entry = self._items.get(key)
+        if entry is None or not entry.is_fresh:
+            return None
+        self._items.move_to_end(key)
+        return entry.data
+
+    def set_local(self, key: str, data: dict, etag: str | None = None) -> CatalogCacheEntry:
+        """
+        Сохраняет данные в памяти процесса, вытесняя самые давно использованные записи.
+        """
+        entry = CatalogCacheEntry(data=data, etag=etag, expires_at=time.time() + self.ttl)
+        self._put_local(key, entry)
+        return entry
+
+    def _put_local(self, key: str, entry: CatalogCacheEntry) -> None:
+        self._items[key] = entry
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def get_entry(self, key: str) -> CatalogCacheEntry | None:
+        """
+        Возвращает запись сначала из памяти процесса, затем из Redis. Запись может быть устаревшей.
+        """
+        entry = self._items.get(key)
+        if entry is not None and entry.is_fresh:
+            self._items.move_to_end(key)
+            self.stats["l1_hits"] += 1
+            return entry
+
+        try:
+            async with get_redis_connection() as redis_connection:
+                raw_entry = await redis_connection.get(self.get_redis_key(key))
+        except RedisError as e:
+            logger.warning("Catalog cache: Redis is unavailable. %s", e)
+            raw_entry = None
+
+        if raw_entry is not None:
+            redis_entry = CatalogCacheEntry(**json.loads(raw_entry))
+            if entry is None or redis_entry.expires_at > entry.expires_at:
+                entry = redis_entry
+                self._put_local(key, entry)
+
+        if entry is not None and entry.is_fresh:
+            self.stats["l2_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            logger.debug("Catalog cache miss %s", key)
+        return entry
+
+    async def get(self, key: str) -> dict | None:
+        """
+        Возвращает свежие данные из кэша или None.
+        """
+        entry = await self.get_entry(key)
+        if entry is None or not entry.is_fresh:
+            return None
+        return entry.data
+
+    async def set(self, key: str, data: dict, etag: str | None = None) -> None:
+        """
+        Сохраняет данные в оба уровня кэша.
+        """
+        entry = self.set_local(key, data, etag)
+        try:
+            async with get_redis_connection() as redis_connection:
+                await redis_connection.set(self.get_redis_key(key), json.dumps(asdict(entry)), ex=self.redis_ttl)
+        except RedisError as e:
+            logger.warning("Catalog cache: Redis is unavailable. %s", e)
+
+    async def revalidate(self, key: str, entry: CatalogCacheEntry) -> None:
+        """
+        Продлевает время жизни записи, если API подтвердил, что данные не изменились.
+        """
+        self.stats["revalidated"] += 1
+        await self.set(key, entry.data, entry.etag)
+
+    def clear_local(self) -> None:
+        """
+        Очищает кэш в памяти процесса.
+        """
+        self._items.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Возвращает счётчики попаданий и промахов кэша.
+        """
+        requests_count = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return {
+            **self.stats,
+            "size": len(self._items),
+            "hit_ratio": hits / requests_count if requests_count else 0.0,
+        }
+
+
+catalog_cache = CatalogCache()
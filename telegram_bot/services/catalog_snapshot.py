@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from contextlib import suppress
+
+import aiohttp
+from services.api_client import ApiClient
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshot:
+    """
+    Полный снимок каталога в памяти процесса.
+
+    Загружается одним запросом к API при старте бота и периодически перепроверяется условным запросом.
+    Когда снимок загружен, экраны категорий и товаров строятся без обращений к API.
+    """
+
+    def __init__(self):
+        self.version: int | None = None
+        self.etag: str | None = None
+        self.root_id: int | None = None
+        self._categories: dict[int, dict] = {}
+        self._children: dict[int, list[int]] = {}
+        self._products: dict[int, dict] = {}
+        self._category_products: dict[int, list[dict]] = {}
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.root_id is not None
+
+    def load(self, data: dict, etag: str | None = None) -> None:
+        """
+        Заменяет снимок каталога данными, полученными от API.
+        """
+        categories = {category["id"]: category for category in data["categories"]}
+        children: dict[int, list[int]] = {category_id: [] for category_id in categories}
+        for category in data["categories"]:
+            if category["parent_id"] in children:
+                children[category["parent_id"]].append(category["id"])
+
+        products = {}
+        category_products: dict[int, list[dict]] = {category_id: [] for category_id in categories}
+        for product in data["products"]:
+            products[product["id"]] = product
+            category_products.setdefault(int(product["parent_id"]), []).append(product)
+
+        self._categories = categories
+        self._children = children
+        self._products = products
+        self._category_products = category_products
+        self.root_id = data["root_id"]
+        self.version = data.get("version")
+        self.etag = etag
+        logger.info(
+            "Catalog snapshot loaded. Version %s, categories %s, products %s",
+            self.version,
+            len(categories),
+            len(products),
+        )
+
+    def get_category_data(self, category_id: str | int | None = None) -> dict | None:
+        """
+        Возвращает данные категории в том же виде, в каком их отдаёт API. Если данных нет, то возвращает None.
+        """
+        if not self.is_loaded:
+            return None
+        category = self._categories.get(int(category_id) if category_id else self.root_id)
+        if category is None:
+            return None
+        parent = self._categories.get(category["parent_id"])
+        return {
+            "id": category["id"],
+            "name": category["name"],
+            "url": category["url"],
+            "description": category["description"],
+            "picture": category["picture"],
+            "children": [
+                {
+                    "id": child["id"],
+                    "name": child["name"],
+                    "url": child["url"],
+                    "description": child["description"],
+                    "picture": child["picture"],
+                }
+                for child in (self._categories[child_id] for child_id in self._children[category["id"]])
+            ],
+            "products": list(self._category_products[category["id"]]),
+            "parent": parent["url"] if parent else None,
+            "parent_id": category["parent_id"],
+        }
+
+    def get_product_data(self, product_id: str | int) -> dict | None:
+        """
+        Возвращает данные товара в том же виде, в каком их отдаёт API. Если данных нет, то возвращает None.
+        """
+        if not self.is_loaded:
+            return None
+        product = self._products.get(int(product_id))
+        return dict(product) if product is not None else None
+
+    def has_product(self, product_id: str | int) -> bool:
+        """
+        Возвращает True, если данные товара есть в снимке.
+        """
+        return self.is_loaded and int(product_id) in self._products
+
+    def get_pictures(self) -> dict[str, str | None]:
+        """
+        Возвращает изображения всех категорий и товаров по их названиям. Если изображения нет, то значение равно None.
+        """
+        pictures: dict[str, str | None] = {}
+        for item in [*self._categories.values(), *self._products.values()]:
+            pictures.setdefault(item["name"], item["picture"])
+        return pictures
+
+    async def refresh(self, api_client: ApiClient) -> bool:
+        """
+        Запрашивает снимок каталога у API. Возвращает True, если снимок был обновлён.
+
+        Если снимок уже загружен, то отправляется условный запрос с его ETag.
+        """
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        async with api_client.session.get(
+            api_client.get_url("/catalog/"), headers=headers, raise_for_status=True
+        ) as response:
+            if response.status == 304:
+                logger.debug("Catalog snapshot not modified")
+                return False
+            data = await response.json()
+            etag = response.headers.get("ETag")
+        self.load(data, etag)
+        return True
+
+    async def start(self, api_client: ApiClient, refresh_interval: int) -> None:
+        """
+        Загружает снимок и запускает его периодическую перепроверку.
+
+        Если API недоступно, то бот продолжает работать с запросами к API, а снимок загрузится при следующей проверке.
+        """
+        try:
+            await self.refresh(api_client)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Catalog snapshot was not loaded. %s", e)
+        if refresh_interval > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(api_client, refresh_interval))
+
+    async def stop(self) -> None:
+        """
+        Останавливает перепроверку снимка.
+        """
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+
+    async def _refresh_loop(self, api_client: ApiClient, refresh_interval: int) -> None:
+        while True:
+            await asyncio.sleep(refresh_interval)
+            try:
+                await self.refresh(api_client)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Catalog snapshot was not refreshed. %s", e)
+
+
+catalog_snapshot = CatalogSnapshot()
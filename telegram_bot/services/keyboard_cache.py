@@ -0,0 +1,52 @@
+import logging
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+logger = logging.getLogger(__name__)
+
+KeyboardRows = tuple[tuple[InlineKeyboardButton, ...], ...]
+
+
+class CategoryKeyboardCache:
+    """
+    Готовые клавиатуры всех страниц категорий для одной версии каталога.
+
+    Клавиатура страницы хранится кортежем кортежей кнопок, поэтому хэндлер не может изменить её по ошибке: он получает
+    новую клавиатуру со списками тех же кнопок. При смене версии каталога все клавиатуры удаляются.
+    """
+
+    def __init__(self):
+        self.version: int | None = None
+        self._pages: dict[int, tuple[KeyboardRows, ...]] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, version: int | None, category_id: int, page: int) -> InlineKeyboardMarkup | None:
+        """
+        Возвращает клавиатуру страницы категории. Если версия каталога неизвестна или не совпадает с версией кэша,
+        или клавиатуры нет, то возвращает None.
+        """
+        pages = self._pages.get(category_id) if version is not None and version == self.version else None
+        if pages is None or not 1 <= page <= len(pages):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return InlineKeyboardMarkup.model_construct(inline_keyboard=[list(row) for row in pages[page - 1]])
+
+    def set(self, version: int | None, category_id: int, pages: list[InlineKeyboardMarkup]) -> None:
+        """
+        Сохраняет клавиатуры всех страниц категории. Если версия каталога неизвестна, то ничего не сохраняет.
+        """
+        if version is None:
+            return
+        if version != self.version:
+            logger.info("Category keyboards are reset for catalog version %s", version)
+            self._pages = {}
+            self.version = version
+        self._pages[category_id] = tuple(tuple(tuple(row) for row in page.inline_keyboard) for page in pages)
+
+    def clear(self) -> None:
+        self.version = None
+        self._pages = {}
+
+
+category_keyboard_cache = CategoryKeyboardCache()
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+from contextlib import suppress
+
+from config_data import constants
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+from services.redis_services import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+async def get_file_ids_from_redis(redis_connection: Redis, keys: list[str]) -> dict[str, str | None]:
+    """
+    Возвращает file_id изображений по их ключам. Если file_id не найден, то значение равно None.
+
+    Сначала по индексу находятся хэши содержимого изображений, затем по ним file_id.
+    """
+    if not keys:
+        return {}
+    content_hashes = await redis_connection.hmget(constants.PHOTO_NAME_INDEX_HASH_NAME, keys)
+    known_hashes = [content_hash for content_hash in content_hashes if content_hash]
+    file_ids = {}
+    if known_hashes:
+        file_ids = dict(
+            zip(known_hashes, await redis_connection.hmget(constants.PHOTO_FILE_ID_HASH_NAME, known_hashes))
+        )
+    return {key: file_ids.get(content_hash) for key, content_hash in zip(keys, content_hashes)}
+
+
+class PhotoFileIdCache:
+    """
+    Копия хэшей с file_id изображений в памяти процесса.
+
+    file_id хранятся по хэшу содержимого изображения, а отдельный индекс связывает ключи изображений (названия
+    категорий и товаров, "cart" и т.д.) с хэшем содержимого. Поэтому одно и то же изображение под разными ключами
+    загружается в Telegram один раз.
+
+    Хэши загружаются целиком при старте бота. После этого каждый процесс бота получает изменения через канал
+    Redis, в который их публикует тот, кто записал их в хэши. Поэтому получение file_id не требует запросов к Redis.
+    Если соединение с каналом теряется, то после переподключения хэши загружаются заново, чтобы не пропустить
+    изменения.
+    """
+
+    def __init__(
+        self,
+        channel_name: str = constants.PHOTO_FILE_ID_CHANNEL_NAME,
+        reconnect_delay: float = 1,
+        poll_timeout: float = 1,
+    ):
+        self.channel_name = channel_name
+        self.reconnect_delay = reconnect_delay
+        self.poll_timeout = poll_timeout
+        self.is_loaded = False
+        self._file_ids: dict[str, str] = {}
+        self._index: dict[str, str] = {}
+        self._listen_task: asyncio.Task | None = None
+
+    def get(self, key: str | None) -> str | None:
+        """
+        Возвращает file_id изображения по его ключу из памяти процесса.
+        """
+        return self._file_ids.get(self._index.get(key))
+
+    def get_by_hash(self, content_hash: str) -> str | None:
+        """
+        Возвращает file_id изображения по хэшу его содержимого из памяти процесса.
+        """
+        return self._file_ids.get(content_hash)
+
+    def update(self, key: str | None, content_hash: str, file_id: str | None = None) -> None:
+        """
+        Изменяет индекс и file_id в памяти процесса. Если key или file_id равны None, то они не изменяются.
+        """
+        if file_id is not None:
+            self._file_ids[content_hash] = file_id
+        if key is not None:
+            self._index[key] = content_hash
+
+    @staticmethod
+    def get_message(key: str | None, content_hash: str, file_id: str | None = None) -> str:
+        """
+        Возвращает сообщение об изменении для публикации в канал.
+        """
+        return json.dumps({"key": key, "hash": content_hash, "file_id": file_id})
+
+    def handle_message(self, message: str) -> None:
+        """
+        Применяет сообщение об изменении, полученное из канала.
+        """
+        try:
+            data = json.loads(message)
+            self.update(data["key"], data["hash"], data["file_id"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Wrong photo file id message %s. %s", message, e)
+
+    async def load(self) -> None:
+        """
+        Загружает из Redis все file_id и индекс ключей изображений.
+        """
+        async with get_redis_connection() as redis_connection:
+            pipe = redis_connection.pipeline(transaction=False)
+            pipe.hgetall(constants.PHOTO_FILE_ID_HASH_NAME)
+            pipe.hgetall(constants.PHOTO_NAME_INDEX_HASH_NAME)
+            self._file_ids, self._index = await pipe.execute()
+        self.is_loaded = True
+        logger.info("Photo file id cache loaded. File ids %s, keys %s", len(self._file_ids), len(self._index))
+
+    async def start(self) -> None:
+        """
+        Подписывается на канал с изменениями, загружает хэш и запускает получение изменений.
+
+        Подписка выполняется до загрузки хэша, чтобы не пропустить изменения, сделанные во время загрузки.
+        """
+        pubsub = await self._subscribe()
+        await self.load()
+        self._listen_task = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        """
+        Останавливает получение изменений.
+        """
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listen_task
+            self._listen_task = None
+
+    async def _subscribe(self) -> PubSub:
+        async with get_redis_connection() as redis_connection:
+            pubsub = redis_connection.pubsub()
+        await pubsub.subscribe(self.channel_name)
+        return pubsub
+
+    async def _listen(self, pubsub: PubSub | None) -> None:
+        try:
+            while True:
+                try:
+                    if pubsub is None:
+                        pubsub = await self._subscribe()
+                        await self.load()
+                    # Ожидание ограничено, чтобы не срабатывал таймаут чтения соединений пула.
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=self.poll_timeout)
+                    if message is not None:
+                        self.handle_message(message["data"])
+                except RedisError as e:
+                    logger.warning("Photo file id channel is unavailable. %s", e)
+                    if pubsub is not None:
+                        await self._close_pubsub(pubsub)
+                    pubsub = None
+                    await asyncio.sleep(self.reconnect_delay)
+        finally:
+            if pubsub is not None:
+                await self._close_pubsub(pubsub)
+
+    async def _close_pubsub(self, pubsub: PubSub) -> None:
+        with suppress(RedisError):
+            await pubsub.aclose()
+
+
+photo_file_id_cache = PhotoFileIdCache()
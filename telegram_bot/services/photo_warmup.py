@@ -0,0 +1,145 @@
+import asyncio
+import logging
+
+import aiohttp
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiogram.types import BufferedInputFile, FSInputFile, InputFile, URLInputFile
+from lexicon.lexicon_ru import LEXICON_RU
+from services.cache_services import (
+    get_content_hash,
+    get_file_id_by_hash,
+    photo_file_id_writer,
+    read_input_file,
+)
+from services.catalog_snapshot import CatalogSnapshot
+from services.photo_file_id_cache import get_file_ids_from_redis, photo_file_id_cache
+from services.redis_services import get_redis_connection
+from services.request_scheduler import background_requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PICTURE_PATH: str = "images/default.jpg"
+
+# Изображения интерфейса бота по ключам, с которыми их ищут хэндлеры.
+UI_PICTURES: dict[str, str] = {
+    LEXICON_RU["commands"]["start"]: "images/welcome.jpg",
+    "cart": "images/cart.jpg",
+    "clear_cart": "images/cart.jpg",
+}
+
+
+def get_warmup_pictures(catalog_snapshot: CatalogSnapshot) -> dict[str, str]:
+    """
+    Возвращает все изображения, которые показывает бот, по ключам в хэше file_id.
+
+    Значение - адрес изображения или путь к файлу. Для категорий и товаров без изображения используется
+    изображение-заглушка.
+    """
+    pictures = dict(UI_PICTURES)
+    if not catalog_snapshot.is_loaded:
+        logger.warning("Catalog snapshot is not loaded. Only UI pictures will be uploaded")
+    for name, picture in catalog_snapshot.get_pictures().items():
+        pictures.setdefault(name, picture or DEFAULT_PICTURE_PATH)
+    return pictures
+
+
+def get_input_file(picture: str) -> InputFile:
+    """
+    Возвращает файл для отправки в Telegram.
+    """
+    if picture.startswith(("http://", "https://")):
+        return URLInputFile(picture)
+    return FSInputFile(picture)
+
+
+async def _get_missing_keys(keys: list[str]) -> list[str]:
+    if photo_file_id_cache.is_loaded:
+        return [key for key in keys if photo_file_id_cache.get(key) is None]
+    async with get_redis_connection() as redis_connection:
+        file_ids = await get_file_ids_from_redis(redis_connection, keys)
+    return [key for key in keys if file_ids[key] is None]
+
+
+async def upload_picture(bot: Bot, chat_id: int, content: bytes, filename: str) -> str:
+    """
+    Отправляет изображение в чат и возвращает его file_id.
+
+    Если Telegram просит подождать, то отправка повторяется после паузы.
+    """
+    while True:
+        try:
+            message = await bot.send_photo(
+                chat_id=chat_id, photo=BufferedInputFile(content, filename=filename), disable_notification=True
+            )
+            return message.photo[-1].file_id
+        except TelegramRetryAfter as e:
+            logger.info("Photo warmup: retry after %s seconds", e.retry_after)
+            await asyncio.sleep(e.retry_after)
+
+
+async def warm_up_photos(
+    bot: Bot, chat_id: int, catalog_snapshot: CatalogSnapshot, concurrency: int = 4
+) -> dict[str, int]:
+    """
+    Загружает в Telegram все изображения, для которых ещё нет file_id, и сохраняет их file_id.
+
+    Содержимое изображений читается и хэшируется, поэтому одинаковые изображения отправляются один раз, даже если
+    у них разные адреса. Если для хэша file_id уже есть, то изображение не отправляется, а в индекс записывается
+    только ключ. Изображения отправляются в служебный чат не более чем concurrency одновременно. Возвращает
+    количество загруженных, пропущенных и не загруженных изображений.
+    """
+    pictures = get_warmup_pictures(catalog_snapshot)
+    missing_keys = await _get_missing_keys(list(pictures))
+    keys_by_picture: dict[str, list[str]] = {}
+    for key in missing_keys:
+        keys_by_picture.setdefault(pictures[key], []).append(key)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"uploaded": 0, "skipped": len(pictures) - len(missing_keys), "failed": 0}
+    contents: dict[str, bytes] = {}
+    keys_by_hash: dict[str, list[str]] = {}
+    filenames: dict[str, str] = {}
+
+    async def read(picture: str, keys: list[str]) -> None:
+        async with semaphore:
+            input_file = get_input_file(picture)
+            try:
+                content = await read_input_file(bot, input_file)
+            except (OSError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Photo warmup: %s was not read. %s", picture, e)
+                stats["failed"] += len(keys)
+                return
+        content_hash = get_content_hash(content)
+        contents[content_hash] = content
+        filenames.setdefault(content_hash, input_file.filename or f"{content_hash}.jpg")
+        keys_by_hash.setdefault(content_hash, []).extend(keys)
+
+    await asyncio.gather(*(read(picture, keys) for picture, keys in keys_by_picture.items()))
+
+    file_ids: list[tuple[str, str, str | None]] = []
+    for content_hash, keys in keys_by_hash.items():
+        if await get_file_id_by_hash(content_hash) is not None:
+            file_ids.extend((key, content_hash, None) for key in keys)
+            stats["skipped"] += len(keys)
+            del contents[content_hash]
+
+    async def upload(content_hash: str, content: bytes) -> None:
+        keys = keys_by_hash[content_hash]
+        async with semaphore:
+            try:
+                file_id = await upload_picture(bot, chat_id, content, filenames[content_hash])
+            except (TelegramAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Photo warmup: %s was not uploaded. %s", keys, e)
+                stats["failed"] += len(keys)
+                return
+        file_ids.extend((key, content_hash, file_id) for key in keys)
+        stats["uploaded"] += len(keys)
+
+    # Загрузка не должна задерживать ответы пользователям.
+    with background_requests():
+        await asyncio.gather(*(upload(content_hash, content) for content_hash, content in contents.items()))
+    if file_ids:
+        await photo_file_id_writer.write(file_ids)
+    logger.info("Photo warmup finished. %s", stats)
+    return stats
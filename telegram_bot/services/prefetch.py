@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from contextlib import suppress
+
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
+from config_data import constants
+from filters.callback_factories import ProductCallbackFactory
+from services import services
+from services.api_client import ApiClient
+from services.catalog_snapshot import catalog_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class ProductPrefetcher:
+    """
+    Заранее загружает в кэш каталога товары со страницы категории, которую открыл пользователь.
+
+    Товары, которые есть в снимке каталога, не загружаются. Для остальных в кэш каталога сохраняются данные из API,
+    модели и клавиатуры товаров не создаются. Запрос к API использует уже прочитанный токен пользователя.
+    Одновременно загружается не больше max_concurrent товаров всех пользователей. Когда пользователь открывает другую
+    страницу, загрузка товаров прежней страницы отменяется. Запросы к API выполняются через общий single flight,
+    поэтому отмена не прерывает запрос, который уже ждёт хэндлер.
+    """
+
+    def __init__(self, max_concurrent: int = constants.PREFETCH_MAX_CONCURRENT):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._tasks: dict[int, asyncio.Task] = {}
+        self.stats = {"scheduled": 0, "prefetched": 0, "failed": 0, "cancelled": 0}
+
+    @staticmethod
+    def get_product_ids(keyboard: InlineKeyboardMarkup) -> list[int]:
+        """
+        Возвращает id товаров, кнопки которых есть в клавиатуре.
+        """
+        prefix = ProductCallbackFactory.__prefix__ + ProductCallbackFactory.__separator__
+        product_ids = []
+        for row in keyboard.inline_keyboard:
+            for button in row:
+                if not button.callback_data or not button.callback_data.startswith(prefix):
+                    continue
+                try:
+                    product_ids.append(ProductCallbackFactory.unpack(button.callback_data).product_id)
+                except (TypeError, ValueError):
+                    continue
+        return product_ids
+
+    def schedule(
+        self,
+        callback: CallbackQuery,
+        api_client: ApiClient,
+        keyboard: InlineKeyboardMarkup,
+        auth_token: services.AuthToken = None,
+    ) -> asyncio.Task | None:
+        """
+        Запускает в фоне загрузку товаров из клавиатуры, которых нет в снимке каталога, и отменяет прежнюю загрузку
+        пользователя.
+        """
+        user_id = callback.from_user.id
+        self.cancel(user_id)
+        product_ids = [
+            product_id for product_id in self.get_product_ids(keyboard) if not catalog_snapshot.has_product(product_id)
+        ]
+        if not product_ids:
+            return None
+        self.stats["scheduled"] += len(product_ids)
+        task = asyncio.create_task(self._prefetch(callback, api_client, product_ids, auth_token))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda done_task: self._forget(user_id, done_task))
+        return task
+
+    def cancel(self, user_id: int) -> None:
+        """
+        Отменяет загрузку товаров пользователя.
+        """
+        task = self._tasks.pop(user_id, None)
+        if task is not None and not task.done():
+            task.cancel()
+            self.stats["cancelled"] += 1
+
+    async def stop(self) -> None:
+        """
+        Отменяет все загрузки.
+        """
+        tasks = list(self._tasks.values())
+        for user_id in list(self._tasks):
+            self.cancel(user_id)
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _prefetch(
+        self, callback: CallbackQuery, api_client: ApiClient, product_ids: list[int], auth_token: services.AuthToken
+    ) -> None:
+        await asyncio.gather(
+            *(self._prefetch_product(callback, api_client, product_id, auth_token) for product_id in product_ids)
+        )
+
+    async def _prefetch_product(
+        self, callback: CallbackQuery, api_client: ApiClient, product_id: int, auth_token: services.AuthToken
+    ) -> None:
+        async with self._semaphore:
+            try:
+                await services.get_catalog_data(callback, api_client, f"/product/{product_id}/", auth_token)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.debug("Product %s was not prefetched. %s", product_id, e)
+                return
+        self.stats["prefetched"] += 1
+        logger.debug("Product %s is prefetched", product_id)
+
+    def _forget(self, user_id: int, task: asyncio.Task) -> None:
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+
+
+product_prefetcher = ProductPrefetcher()
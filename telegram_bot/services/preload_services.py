@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from typing import NamedTuple
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+from filters.callback_factories import (
+    CategoryCallbackFactory,
+    EditCartCallbackFactory,
+    ProductCallbackFactory,
+)
+from models.cart import Cart
+from models.models import PreloadedContext
+from services.api_client import ApiClient
+from services.catalog_snapshot import catalog_snapshot
+from services.photo_file_id_cache import get_file_ids_from_redis, photo_file_id_cache
+from services.redis_services import get_redis_connection
+from services.screen_state import screen_state_tracker
+from services.services import AuthToken, get_catalog_data, get_category_path
+
+logger = logging.getLogger(__name__)
+
+# Колбэки-команды, хэндлерам которых нужны все строки корзины.
+CART_LINES_CALLBACKS = {"cart"}
+
+# Ключи изображений, которые используются экранами корзины.
+CALLBACK_PHOTO_KEYS: dict[str, str] = {
+    "cart": "cart",
+    "clear_cart": "clear_cart",
+}
+
+
+class CatalogPath(NamedTuple):
+    """
+    Объект каталога, который показывает колбэк: вид ("category" или "product"), id и страница категории.
+    """
+
+    kind: str
+    object_id: str | None
+    page: int = 1
+
+
+def get_catalog_path(data: str | None, callback_data: CallbackData | None = None) -> CatalogPath | None:
+    """
+    Возвращает объект каталога для колбэка с данными data, уже распакованными в callback_data.
+
+    Если колбэк не показывает категорию или товар, то возвращает None.
+    """
+    if data == "make_order":
+        return CatalogPath("category", None)
+    if isinstance(callback_data, CategoryCallbackFactory):
+        category_id = callback_data.category_id
+        return CatalogPath("category", str(category_id) if category_id else None, callback_data.page)
+    if isinstance(callback_data, ProductCallbackFactory):
+        return CatalogPath("product", str(callback_data.product_id))
+    return None
+
+
+async def _get_catalog_data(
+    callback: CallbackQuery, api_client: ApiClient, catalog_path: CatalogPath, auth_token: AuthToken
+) -> dict:
+    if catalog_path.kind == "product":
+        return await get_catalog_data(callback, api_client, f"/product/{catalog_path.object_id}/", auth_token)
+    return await get_catalog_data(
+        callback, api_client, get_category_path(catalog_path.object_id, catalog_path.page), auth_token
+    )
+
+
+class RedisContext(NamedTuple):
+    """
+    Данные колбэка, прочитанные из Redis. Значение None у данных корзины означает, что они не читались.
+    """
+
+    auth_token: str | None
+    screen_state: dict
+    cart_lines: dict | None = None
+    cart_info: dict | None = None
+    cart_quantities: dict[str, int] | None = None
+
+
+def needs_cart_lines(data: str | None, callback_data: CallbackData | None = None) -> bool:
+    """
+    Возвращает True, если хэндлеру колбэка нужны все строки корзины.
+    """
+    return data in CART_LINES_CALLBACKS or isinstance(callback_data, EditCartCallbackFactory)
+
+
+async def _read_redis_context(
+    cart: Cart, screen_name: str, catalog_path: CatalogPath | None, read_cart_lines: bool
+) -> RedisContext:
+    """
+    Читает токен, состояние экрана сообщения и нужные хэндлеру данные корзины одним конвейером.
+
+    Экранам корзины нужны все строки корзины. Экранам каталога нужны только итоги корзины, а экрану товара ещё и
+    количество этого товара в корзине. Для остальных колбэков корзина не читается.
+    """
+    async with get_redis_connection() as redis_connection:
+        pipe = redis_connection.pipeline(transaction=False)
+        pipe.get(f"token:{cart.user_id}")
+        pipe.hgetall(screen_name)
+        if read_cart_lines:
+            pipe.hgetall(cart.cart_name)
+        elif catalog_path is not None:
+            await cart.queue_info(pipe)
+            if catalog_path.kind == "product":
+                pipe.hget(cart.cart_name, catalog_path.object_id)
+        auth_token, screen_state, *cart_data = await pipe.execute()
+    if read_cart_lines:
+        return RedisContext(auth_token, screen_state, cart_lines=cart_data[0])
+    if catalog_path is None:
+        return RedisContext(auth_token, screen_state)
+    cart_quantities = {}
+    if catalog_path.kind == "product":
+        cart_quantities[catalog_path.object_id] = Cart.parse_quantity(cart_data[1])
+    return RedisContext(
+        auth_token, screen_state, cart_info=Cart.parse_info(cart_data[0]), cart_quantities=cart_quantities
+    )
+
+
+async def _get_photo_file_ids(photo_keys: list[str]) -> dict[str, str | None]:
+    """
+    Возвращает file_id изображений по их ключам.
+
+    Если хэши с file_id загружены в память процесса, то file_id берутся из них без запросов к Redis.
+    """
+    if photo_file_id_cache.is_loaded:
+        return {key: photo_file_id_cache.get(key) for key in photo_keys}
+    async with get_redis_connection() as redis_connection:
+        return await get_file_ids_from_redis(redis_connection, photo_keys)
+
+
+async def preload_callback_context(
+    callback: CallbackQuery, api_client: ApiClient, callback_data: CallbackData | None = None
+) -> PreloadedContext:
+    """
+    Загружает данные, которые понадобятся хэндлеру колбэка.
+
+    callback_data - данные колбэка, уже распакованные при поиске хэндлера. Повторно они не распаковываются.
+
+    Токен, нужные хэндлеру данные корзины и состояние экрана сообщения читаются из Redis одним конвейером
+    одновременно с получением данных каталога. Если данные каталога берутся из снимка, то имя изображения известно
+    заранее и его file_id читается одновременно с конвейером. Иначе file_id читается после получения данных. Если хэши
+    с file_id загружены в память процесса, то file_id берутся из них без запросов к Redis. Запрос к API берёт токен
+    из результата конвейера, а не читает его из Redis ещё раз.
+    """
+    catalog_path = get_catalog_path(callback.data, callback_data)
+    screen_name = screen_state_tracker.get_name(callback.message.chat.id, callback.message.message_id)
+    redis_context = asyncio.ensure_future(
+        _read_redis_context(
+            Cart(user_id=callback.from_user.id),
+            screen_name,
+            catalog_path,
+            needs_cart_lines(callback.data, callback_data),
+        )
+    )
+
+    async def get_auth_token() -> str | None:
+        return (await asyncio.shield(redis_context)).auth_token
+
+    photo_keys = []
+    catalog_data = None
+    fetch_catalog = None
+    if catalog_path is not None:
+        if catalog_path.kind == "product":
+            catalog_data = catalog_snapshot.get_product_data(catalog_path.object_id)
+        else:
+            catalog_data = catalog_snapshot.get_category_data(catalog_path.object_id)
+        if catalog_data is None:
+            fetch_catalog = _get_catalog_data(callback, api_client, catalog_path, get_auth_token)
+        else:
+            photo_keys.append(catalog_data["name"])
+    elif callback.data in CALLBACK_PHOTO_KEYS:
+        photo_keys.append(CALLBACK_PHOTO_KEYS[callback.data])
+
+    if fetch_catalog is None:
+        redis_data, photo_file_ids = await asyncio.gather(redis_context, _get_photo_file_ids(photo_keys))
+    else:
+        redis_data, catalog_data = await asyncio.gather(redis_context, fetch_catalog)
+        photo_file_ids = await _get_photo_file_ids([catalog_data["name"]])
+
+    logger.debug("Context preloaded for callback %s", callback.data)
+    return PreloadedContext(
+        auth_token=redis_data.auth_token,
+        cart_lines=redis_data.cart_lines,
+        cart_info=redis_data.cart_info,
+        cart_quantities=redis_data.cart_quantities,
+        photo_file_ids=photo_file_ids,
+        catalog_data=catalog_data,
+        screen_state=redis_data.screen_state,
+    )
@@ -1,12 +1,70 @@
+import logging
+import time
 from contextlib import asynccontextmanager
+from typing import Any
 
 from config_data.config import RedisConfig
-from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool, Redis
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Пул соединений с Redis, который считает свою статистику.
+
+    Если все соединения заняты, то ожидает освобождения соединения не дольше timeout секунд.
+    Каждая команда или конвейер команд берёт из пула одно соединение, поэтому количество команд
+    считается по количеству выданных соединений.
+    """
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.commands_count = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self._rate_started_at = time.monotonic()
+        self._rate_commands_count = 0
+
+    async def get_connection(self, command_name, *keys, **options):
+        started_at = time.perf_counter()
+        connection = await super().get_connection(command_name, *keys, **options)
+        wait_time = time.perf_counter() - started_at
+        self.commands_count += 1
+        self.acquire_wait_total += wait_time
+        self.acquire_wait_max = max(self.acquire_wait_max, wait_time)
+        return connection
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Возвращает статистику пула.
+
+        Количество команд в секунду считается с начала текущего окна. Чтение статистики окно не меняет,
+        новое окно начинает метод start_window.
+        """
+        elapsed = time.monotonic() - self._rate_started_at
+        commands_per_second = (self.commands_count - self._rate_commands_count) / elapsed if elapsed > 0 else 0.0
+        return {
+            "max_connections": self.max_connections,
+            "in_use_connections": len(self._in_use_connections),
+            "idle_connections": len(self._available_connections),
+            "commands": self.commands_count,
+            "commands_per_second": commands_per_second,
+            "acquire_wait_avg": self.acquire_wait_total / self.commands_count if self.commands_count else 0.0,
+            "acquire_wait_max": self.acquire_wait_max,
+        }
+
+    def start_window(self) -> None:
+        """
+        Начинает новое окно подсчёта команд в секунду.
+        """
+        self._rate_started_at = time.monotonic()
+        self._rate_commands_count = self.commands_count
 
 
 class RedisSengleton:
     """
-    Класс предоставляет пул соединений с Redis.
+    Класс предоставляет пул соединений с Redis и общий клиент, который работает через этот пул.
     """
 
     _instance = None
@@ -21,7 +79,11 @@ class RedisSengleton:
         Метод создаёт и возвращает пул соединений.
         """
         if not hasattr(self, "_redis_pool"):
-            self._redis_pool = ConnectionPool(**redis_config.model_dump())
+            self._redis_pool = InstrumentedConnectionPool(
+                **redis_config.model_dump(exclude={"pool_timeout"}),
+                timeout=redis_config.pool_timeout,
+            )
+            self._redis_client = Redis(connection_pool=self._redis_pool)
         return self._redis_pool
 
     def get_pool(self):
@@ -30,6 +92,34 @@ class RedisSengleton:
         """
         return self._redis_pool
 
+    def get_client(self) -> Redis:
+        """
+        Метод возвращает общий клиент Redis.
+        """
+        return self._redis_client
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Метод возвращает статистику пула соединений.
+        """
+        return self._redis_pool.get_stats()
+
+    def start_stats_window(self) -> None:
+        """
+        Метод начинает новое окно подсчёта команд в секунду пула соединений.
+        """
+        self._redis_pool.start_window()
+
+    async def close(self) -> None:
+        """
+        Метод закрывает общий клиент и все соединения пула.
+        """
+        if hasattr(self, "_redis_pool"):
+            await self._redis_client.aclose()
+            await self._redis_pool.disconnect()
+            del self._redis_client
+            del self._redis_pool
+
 
 redis_singleton = RedisSengleton()
 
@@ -37,11 +127,9 @@ redis_singleton = RedisSengleton()
 @asynccontextmanager
 async def get_redis_connection():
     """
-    Функция генератор преобоазованная в асинхронный контекстный менеджер. Возвращает соединение Redis из пула.
+    Функция генератор преобоазованная в асинхронный контекстный менеджер. Возвращает общий клиент Redis.
+
+    Клиент не закрывается после использования: соединения берутся из пула на время выполнения команды
+    и сразу возвращаются в него.
     """
-    connection_pool: ConnectionPool = redis_singleton.get_pool()
-    redis_connection = Redis(connection_pool=connection_pool, client_name="")
-    try:
-        yield redis_connection
-    finally:
-        await redis_connection.close()
+    yield redis_singleton.get_client()
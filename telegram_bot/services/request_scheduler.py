@@ -0,0 +1,181 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import TYPE_CHECKING, Iterator
+
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """
+    Приоритет запроса к Telegram. Чем меньше значение, тем раньше запрос получает место в лимите.
+    """
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+request_priority: ContextVar[RequestPriority] = ContextVar("request_priority", default=RequestPriority.INTERACTIVE)
+
+# Методы, которые отправляют или изменяют сообщения. Только на них действуют лимиты Telegram.
+LIMITED_METHOD_PREFIXES: tuple[str, ...] = ("send", "edit", "copy", "forward")
+
+
+@contextmanager
+def background_requests() -> Iterator[None]:
+    """
+    Запросы к Telegram внутри блока уступают место в лимите запросам, которые ждёт пользователь.
+
+    Задачи, созданные внутри блока, наследуют приоритет.
+    """
+    token = request_priority.set(RequestPriority.BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Ограничение частоты запросов: rate запросов в секунду с накоплением не больше capacity.
+
+    Место получают по очереди: сначала запросы с меньшим приоритетом, при равном приоритете - раньше пришедшие.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiters: list[tuple[int, int]] = []
+        self._counter = itertools.count()
+
+    @property
+    def is_idle(self) -> bool:
+        self._refill()
+        return not self._waiters and self.tokens >= self.capacity and self.blocked_until <= time.monotonic()
+
+    def block(self, seconds: float) -> None:
+        """
+        Запрещает запросы на seconds секунд. Накопленные места сгорают.
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    async def acquire(self, priority: int = RequestPriority.INTERACTIVE) -> None:
+        """
+        Ждёт свободного места и занимает его.
+        """
+        waiter = (priority, next(self._counter))
+        heapq.heappush(self._waiters, waiter)
+        try:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                if self._waiters[0] == waiter and self.tokens >= 1 and self.blocked_until <= now:
+                    heapq.heappop(self._waiters)
+                    self.tokens -= 1
+                    return
+                if self.blocked_until > now:
+                    delay = self.blocked_until - now
+                else:
+                    delay = max((1 - self.tokens) / self.rate, 1 / self.rate / 10)
+                await asyncio.sleep(delay)
+        except BaseException:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class RequestScheduler(BaseRequestMiddleware):
+    """
+    Middleware сессии бота, который планирует исходящие запросы с учётом лимитов Telegram.
+
+    Запросы, которые отправляют или изменяют сообщения, ждут места в общем лимите бота и в лимите своего чата.
+    Остальные запросы (ответы на колбэки, getUpdates и т.д.) отправляются сразу. Фоновые запросы (см.
+    background_requests) уступают место запросам, которые ждёт пользователь.
+
+    Если Telegram отвечает RetryAfter, то чат запроса блокируется на указанное время, и запрос повторяется.
+    Если ждать нужно дольше max_retry_after или попытки кончились, то ошибка передаётся дальше.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+        max_retry_after: float = 60,
+        max_idle_buckets: int = 10_000,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.max_idle_buckets = max_idle_buckets
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+        self.stats = {"scheduled": 0, "retried": 0}
+
+    @staticmethod
+    def is_limited(method: TelegramMethod) -> bool:
+        return method.__api_method__.startswith(LIMITED_METHOD_PREFIXES)
+
+    def get_chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.max_idle_buckets:
+                self._chat_buckets = {key: value for key, value in self._chat_buckets.items() if not value.is_idle}
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not self.is_limited(method):
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        chat_bucket = self.get_chat_bucket(chat_id) if chat_id is not None else None
+        priority = request_priority.get()
+        attempt = 0
+        while True:
+            if chat_bucket is not None:
+                await chat_bucket.acquire(priority)
+            await self.global_bucket.acquire(priority)
+            self.stats["scheduled"] += 1
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries or e.retry_after > self.max_retry_after:
+                    raise
+                logger.warning("Flood wait %s s for %s in chat %s", e.retry_after, method.__api_method__, chat_id)
+                self.stats["retried"] += 1
+                (chat_bucket or self.global_bucket).block(e.retry_after)
@@ -0,0 +1,152 @@
+import hashlib
+import logging
+from typing import NamedTuple
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto, Message
+from config_data import constants
+from models.models import PreloadedContext
+from redis.exceptions import RedisError
+from services.redis_services import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenState(NamedTuple):
+    """
+    Последнее состояние экрана в сообщении: file_id изображения, подпись и хэш клавиатуры.
+    """
+
+    media: str | None
+    caption: str | None
+    markup_hash: str | None
+
+
+def get_markup_hash(reply_markup: InlineKeyboardMarkup | None) -> str | None:
+    """
+    Возвращает хэш клавиатуры. Если клавиатуры нет, то возвращает None.
+    """
+    if not isinstance(reply_markup, InlineKeyboardMarkup):
+        return None
+    return hashlib.sha1(reply_markup.model_dump_json(exclude_none=True).encode()).hexdigest()
+
+
+class ScreenStateTracker:
+    """
+    Хранит в Redis последнее состояние экрана каждого сообщения бота и обновляет экран самым дешёвым запросом.
+
+    Если изображение не изменилось, то вместо edit_media отправляется edit_caption или edit_reply_markup, а если
+    не изменилось ничего, то запрос не отправляется. edit_media - самый медленный запрос, и на него сильнее всего
+    действуют лимиты Telegram. Клавиатура сравнивается с клавиатурой, которую Telegram прислал вместе с колбэком,
+    потому что её меняют и другие хэндлеры. Если состояние неизвестно, то отправляется edit_media.
+    """
+
+    def __init__(self, ttl: int = constants.SCREEN_STATE_TTL):
+        self.ttl = ttl
+        self.stats = {"edit_media": 0, "edit_caption": 0, "edit_reply_markup": 0, "skipped": 0}
+
+    @staticmethod
+    def get_name(chat_id: int, message_id: int) -> str:
+        return f"screen:{chat_id}:{message_id}"
+
+    @staticmethod
+    def parse(data: dict[str, str] | None) -> ScreenState | None:
+        """
+        Преобразует хэш состояния экрана из Redis в состояние. Если хэш пустой, то возвращает None.
+        """
+        if not data:
+            return None
+        return ScreenState(data.get("media") or None, data.get("caption"), data.get("markup_hash") or None)
+
+    async def get(self, message: Message, preloaded: PreloadedContext | None = None) -> ScreenState | None:
+        """
+        Возвращает состояние экрана сообщения из предзагруженного контекста колбэка или из Redis.
+        """
+        if preloaded is not None and preloaded.screen_state is not None:
+            return self.parse(preloaded.screen_state)
+        try:
+            async with get_redis_connection() as redis_connection:
+                return self.parse(await redis_connection.hgetall(self.get_name(message.chat.id, message.message_id)))
+        except RedisError as e:
+            logger.warning("Screen state was not read. %s", e)
+            return None
+
+    async def save(self, message: Message, state: ScreenState) -> None:
+        """
+        Записывает состояние экрана сообщения в Redis.
+        """
+        name = self.get_name(message.chat.id, message.message_id)
+        mapping = {"media": state.media or "", "caption": state.caption or "", "markup_hash": state.markup_hash or ""}
+        try:
+            async with get_redis_connection() as redis_connection:
+                pipe = redis_connection.pipeline(transaction=False)
+                pipe.hset(name, mapping=mapping)
+                pipe.expire(name, self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Screen state was not saved. %s", e)
+
+    async def remember(
+        self, message: Message, photo: InputMediaPhoto, reply_markup: InlineKeyboardMarkup | None = None
+    ) -> None:
+        """
+        Записывает состояние экрана нового сообщения, отправленного с изображением photo.
+        """
+        await self.save(
+            message, ScreenState(self._get_file_id(message, photo), photo.caption, get_markup_hash(reply_markup))
+        )
+
+    async def show(
+        self,
+        message: Message,
+        photo: InputMediaPhoto,
+        reply_markup: InlineKeyboardMarkup,
+        preloaded: PreloadedContext | None = None,
+    ) -> Message:
+        """
+        Показывает в сообщении изображение photo с клавиатурой reply_markup и возвращает изменённое сообщение.
+
+        Если запрос не отправлялся, то возвращает исходное сообщение.
+        """
+        state = await self.get(message, preloaded)
+        media = photo.media if isinstance(photo.media, str) else None
+        markup_hash = get_markup_hash(reply_markup)
+        try:
+            if state is None or media is None or state.media != media:
+                method = "edit_media"
+                result = await message.edit_media(media=photo, reply_markup=reply_markup)
+            elif state.caption != photo.caption:
+                method = "edit_caption"
+                result = await message.edit_caption(caption=photo.caption, reply_markup=reply_markup)
+            elif self._get_current_markup_hash(message, state) != markup_hash:
+                method = "edit_reply_markup"
+                result = await message.edit_reply_markup(reply_markup=reply_markup)
+            else:
+                method, result = "skipped", None
+        except TelegramBadRequest as e:
+            if "message is not modified" not in e.message:
+                raise
+            method, result = "skipped", None
+        self.stats[method] += 1
+        logger.debug("Screen of message %s is updated with %s", message.message_id, method)
+
+        answer = result if isinstance(result, Message) else message
+        await self.save(message, ScreenState(media or self._get_file_id(answer, photo), photo.caption, markup_hash))
+        return answer
+
+    @staticmethod
+    def _get_current_markup_hash(message: Message, state: ScreenState) -> str | None:
+        if isinstance(message.reply_markup, InlineKeyboardMarkup):
+            return get_markup_hash(message.reply_markup)
+        return state.markup_hash
+
+    @staticmethod
+    def _get_file_id(message: Message, photo: InputMediaPhoto) -> str | None:
+        if isinstance(photo.media, str):
+            return photo.media
+        if isinstance(message, Message) and message.photo:
+            return message.photo[-1].file_id
+        return None
+
+
+screen_state_tracker = ScreenStateTracker()
@@ -1,5 +1,7 @@
 import logging
 import math
+from decimal import Decimal
+from typing import Awaitable, Callable
 
 import aiohttp
 import redis.asyncio as redis
@@ -13,16 +15,26 @@ from aiogram.types import (
 from config_data import constants
 from filters.callback_factories import (
     AddToCartCallbackFactory,
+    CategoryCallbackFactory,
     EditCartCallbackFactory,
     ProductCallbackFactory,
 )
 from lexicon.lexicon_ru import LEXICON_RU
 from models.cart import Cart
-from models.models import CategoryModel, ProductModel
+from models.models import CategoryModel, PreloadedContext, ProductModel
+from services.api_client import ApiClient
+from services.catalog_cache import CatalogCacheEntry, catalog_cache
+from services.catalog_snapshot import catalog_snapshot
+from services.keyboard_cache import category_keyboard_cache
+from services.photo_file_id_cache import get_file_ids_from_redis, photo_file_id_cache
 from services.redis_services import get_redis_connection
+from services.single_flight import catalog_single_flight
 
 logger = logging.getLogger(__name__)
 
+# Токен пользователя или функция, которая его возвращает. None - токен нужно прочитать из Redis.
+AuthToken = str | Callable[[], Awaitable[str | None]] | None
+
 
 async def set_auth_token(token: str, user_id: int) -> None:
     """
@@ -67,98 +79,274 @@ async def authorize_user(user_id: int, session: aiohttp.ClientSession, api_url:
     return token
 
 
-async def get_category_model_for_answer_callback(
+async def get_catalog_data(
+    callback: CallbackQuery, api_client: ApiClient, path: str, auth_token: AuthToken = None
+) -> dict:
+    """
+    Возвращает данные каталога.
+
+    Сначала ищет данные в кэше каталога. Если их там нет или они устарели, то запрашивает их у API.
+    Одновременные запросы одного и того же адреса объединяются в один.
+    Возвращается копия данных, поэтому её можно изменять, не затрагивая кэш.
+
+    auth_token - токен пользователя или функция, которая его возвращает. Он нужен только для запроса к API.
+    Если токен не передан, то он читается из Redis.
+    """
+    cache_key = path.strip("/")
+    entry = await catalog_cache.get_entry(cache_key)
+    if entry is not None and entry.is_fresh:
+        return dict(entry.data)
+
+    url = api_client.get_url(path)
+    response_data = await catalog_single_flight.do(
+        url, lambda: _fetch_catalog_data(callback, api_client, url, cache_key, entry, auth_token)
+    )
+    return dict(response_data)
+
+
+async def _fetch_catalog_data(
     callback: CallbackQuery,
-    api_url: str,
-    category_id: str | int | None = None,
-) -> CategoryModel:
+    api_client: ApiClient,
+    url: str,
+    cache_key: str,
+    entry: CatalogCacheEntry | None,
+    auth_token: AuthToken = None,
+) -> dict:
     """
-    Возвращает модель категории.
+    Запрашивает данные каталога у API и сохраняет их в кэш.
 
-    Запрашивает данные категории у API. Из полученных данных создает модель категории.
+    Для устаревших данных отправляется условный запрос с заголовком If-None-Match: если API отвечает 304,
+    то используются данные из кэша.
     """
-    if category_id:
-        url = f"{api_url}/categories/{category_id}/"
-    else:
-        url = f"{api_url}/categories/"
     logger.debug("Url is %s", url)
 
+    if auth_token is None:
+        auth_token = await get_auth_token(callback.from_user.id)
+    elif callable(auth_token):
+        auth_token = await auth_token()
     headers = {
-        "Authorization": f"Token {await get_auth_token(callback.from_user.id)}",
+        "Authorization": f"Token {auth_token}",
     }
+    if entry is not None and entry.etag:
+        headers["If-None-Match"] = entry.etag
     logger.debug("Headers are %s", headers)
     logger.debug("Callback data is %s", callback.data)
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers, raise_for_status=True) as response:
-            response_data = await response.json()
-            # logger.debug("Response data is %s", response_data)
+    async with api_client.session.get(url, headers=headers, raise_for_status=True) as response:
+        if response.status == 304 and entry is not None:
+            logger.debug("Catalog data not modified %s", url)
+            await catalog_cache.revalidate(cache_key, entry)
+            return entry.data
+        response_data = await response.json()
+        etag = response.headers.get("ETag")
+        # logger.debug("Response data is %s", response_data)
 
-    async with get_redis_connection() as redis_connection:
-        if await redis_connection.hexists(constants.PHOTO_FILE_ID_HASH_NAME, response_data.get("name")):
-            logger.info("Photo file id exists in Redis")
-            photo_file_id = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, response_data.get("name"))
-            logger.info("Photo file id is %s", photo_file_id)
-            response_data["picture"] = photo_file_id
+    await catalog_cache.set(cache_key, response_data, etag)
+    return response_data
+
+
+def _get_preloaded_auth_token(preloaded: PreloadedContext | None) -> str | None:
+    return preloaded.auth_token if preloaded is not None else None
+
+
+async def _set_photo_file_id(response_data: dict, preloaded: PreloadedContext | None = None) -> None:
+    """
+    Заменяет изображение в данных каталога на file_id из Redis, если он есть.
+
+    Если file_id уже загружен вместе с контекстом колбэка или хэш с file_id загружен в память процесса,
+    то запрос к Redis не выполняется.
+    """
+    name = response_data.get("name")
+    if preloaded is not None and preloaded.has_photo_key(name):
+        photo_file_id = preloaded.get_photo_file_id(name)
+    elif photo_file_id_cache.is_loaded:
+        photo_file_id = photo_file_id_cache.get(name)
+    else:
+        async with get_redis_connection() as redis_connection:
+            photo_file_id = (await get_file_ids_from_redis(redis_connection, [name]))[name]
+    if photo_file_id is not None:
+        logger.info("Photo file id is %s", photo_file_id)
+        response_data["picture"] = photo_file_id
+
+
+async def get_category_model_for_answer_callback(
+    callback: CallbackQuery,
+    api_client: ApiClient,
+    category_id: str | int | None = None,
+    preloaded: PreloadedContext | None = None,
+    page: int = 1,
+) -> CategoryModel:
+    """
+    Возвращает модель категории с клавиатурой страницы page.
+
+    Берёт данные категории из предзагруженного контекста колбэка или из снимка каталога. Если их там нет,
+    то получает из кэша каталога или у API только страницу page категории. Из полученных данных создает
+    модель категории.
+
+    Клавиатура страницы берётся из кэша клавиатур текущей версии каталога. Тогда модель создаётся без подкатегорий
+    и товаров. Если клавиатуры там нет, то строятся и сохраняются в кэш клавиатуры всех страниц категории.
+    """
+    if preloaded is not None and preloaded.catalog_data is not None:
+        response_data = dict(preloaded.catalog_data)
+    else:
+        response_data = catalog_snapshot.get_category_data(category_id)
+    if response_data is None:
+        response_data = await get_catalog_data(
+            callback, api_client, get_category_path(category_id, page), _get_preloaded_auth_token(preloaded)
+        )
+
+    await _set_photo_file_id(response_data, preloaded)
+
+    if response_data.get("pagination") is not None:
+        category = CategoryModel(**response_data)
+        category.keyboard = get_category_page_keyboard(category, response_data["pagination"])
+        return category
+
+    keyboard = category_keyboard_cache.get(catalog_snapshot.version, response_data["id"], page)
+    if keyboard is not None:
+        # Подкатегории и товары нужны только для построения клавиатуры, поэтому их модели не создаются.
+        category_data = {key: value for key, value in response_data.items() if key not in ("children", "products")}
+        return CategoryModel(**category_data, keyboard=keyboard)
 
     category = CategoryModel(**response_data)
+    pages = get_category_keyboard_pages(category)
+    category_keyboard_cache.set(catalog_snapshot.version, category.id, pages)
+    if 1 <= page <= len(pages):
+        category.keyboard = pages[page - 1]
+    else:
+        category.keyboard = pagination_keyboard(category.keyboard, page, category.id, CategoryCallbackFactory)
 
     return category
 
 
+def get_category_path(category_id: str | int | None, page: int = 1) -> str:
+    """
+    Возвращает адрес страницы page категории в API. Если category_id не указан, то возвращает адрес корневой категории.
+
+    Размер страницы равен PAGINATION_PAGE_SIZE, поэтому API возвращает только товары или подкатегории этой страницы.
+    """
+    path = f"/categories/{category_id}/" if category_id else "/categories/"
+    return f"{path}?page={page}&page_size={constants.PAGINATION_PAGE_SIZE}"
+
+
+def get_category_page_keyboard(category: CategoryModel, pagination: dict) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру страницы категории, полученной у API постранично.
+
+    Кнопки страницы уже есть в клавиатуре категории, к ним добавляются кнопки навигации по количеству товаров
+    или подкатегорий из pagination. Клавиатура совпадает с той, которую возвращает pagination_keyboard.
+    """
+    total = pagination["products_count"] or pagination["children_count"]
+    if total <= constants.PAGINATION_PAGE_SIZE:
+        return category.keyboard
+    buttons = list(category.keyboard.inline_keyboard)
+    if buttons and buttons[-1][0].text == LEXICON_RU["inline"]["back"]:
+        back_button = buttons.pop(-1)
+    else:
+        back_button = []
+    page = pagination["page"]
+    navigation_buttons = []
+    if page > 1:
+        navigation_buttons.append(
+            InlineKeyboardButton(
+                text=LEXICON_RU["inline"]["previous"],
+                callback_data=CategoryCallbackFactory(category_id=category.id, page=page - 1).pack(),
+            )
+        )
+    if math.ceil(total / constants.PAGINATION_PAGE_SIZE) > page:
+        navigation_buttons.append(
+            InlineKeyboardButton(
+                text=LEXICON_RU["inline"]["next"],
+                callback_data=CategoryCallbackFactory(category_id=category.id, page=page + 1).pack(),
+            )
+        )
+    buttons.append(navigation_buttons)
+    buttons.append(back_button)
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_category_keyboard_pages(category: CategoryModel) -> list[InlineKeyboardMarkup]:
+    """
+    Возвращает клавиатуры всех страниц категории.
+    """
+    buttons = category.keyboard.inline_keyboard
+    if len(buttons) > constants.PAGINATION_PAGE_SIZE and buttons[-1][0].text == LEXICON_RU["inline"]["back"]:
+        buttons = buttons[:-1]
+    pages_count = max(math.ceil(len(buttons) / constants.PAGINATION_PAGE_SIZE), 1)
+    return [
+        pagination_keyboard(category.keyboard, page, category.id, CategoryCallbackFactory)
+        for page in range(1, pages_count + 1)
+    ]
+
+
 async def get_product_model_for_answer_callback(
     callback: CallbackQuery,
-    api_url: str,
+    api_client: ApiClient,
     product_id: str | int | None,
+    preloaded: PreloadedContext | None = None,
 ) -> ProductModel:
     """
     Возвращает модель товара.
 
-    Запрашивает данные категории у API. Из полученных данных создает модель товара.
+    Берёт данные товара из предзагруженного контекста колбэка или из снимка каталога. Если их там нет,
+    то получает их из кэша каталога или у API. Из полученных данных создает модель товара.
     """
-    url = f"{api_url}/product/{product_id}/"
-    logger.debug("Url is %s", url)
-
-    headers = {
-        "Authorization": f"Token {await get_auth_token(callback.from_user.id)}",
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers, raise_for_status=True) as response:
-            response_data = await response.json()
-            logger.debug("Response data is %s", response_data)
+    if preloaded is not None and preloaded.catalog_data is not None:
+        response_data = dict(preloaded.catalog_data)
+    else:
+        response_data = catalog_snapshot.get_product_data(product_id)
+    if response_data is None:
+        response_data = await get_catalog_data(
+            callback, api_client, f"/product/{product_id}/", _get_preloaded_auth_token(preloaded)
+        )
+    logger.debug("Response data is %s", response_data)
 
-    async with get_redis_connection() as redis_connection:
-        if await redis_connection.hexists(constants.PHOTO_FILE_ID_HASH_NAME, response_data.get("name")):
-            logger.info("Photo file id exists in Redis")
-            photo_file_id = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, response_data.get("name"))
-            logger.info("Photo file id is %s", photo_file_id)
-            response_data["picture"] = photo_file_id
+    await _set_photo_file_id(response_data, preloaded)
 
     product = ProductModel(**response_data)
 
     return product
 
 
+async def get_add_to_cart_callback_data(
+    callback: CallbackQuery, api_client: ApiClient, callback_data: AddToCartCallbackFactory, quantity: int
+) -> AddToCartCallbackFactory:
+    """
+    Возвращает данные колбэка добавления товара в корзину с количеством quantity.
+
+    В компактном колбэке нет названия и цены товара. Их берёт из снимка каталога, а если товара там нет, то из кэша
+    каталога или у API. Колбэки старых кнопок уже содержат название и цену, поэтому в них меняется только количество.
+    """
+    update = {"quantity": quantity}
+    if callback_data.name is None or callback_data.price is None:
+        product_data = catalog_snapshot.get_product_data(callback_data.id)
+        if product_data is None:
+            product_data = await get_catalog_data(callback, api_client, f"/product/{callback_data.id}/")
+        price = Decimal(str(product_data["price"]))
+        update.update(name=product_data["name"], price=price, cost=price)
+    return callback_data.model_copy(update=update)
+
+
 def pagination_keyboard(
     keyboard: InlineKeyboardMarkup, page: int, category_id: int | None, factory: CallbackData
 ) -> InlineKeyboardMarkup:
     """
     Функция возвращает инлайн-клавиатуру пагинированую на количество кнопок указанных в констате PAGINATION_PAGE_SIZE.
 
-    В клавиатуку добавляются кнопки навигации по страницам.
+    В клавиатуку добавляются кнопки навигации по страницам. Исходная клавиатура не изменяется.
     """
     logger.debug("Buttons %s", keyboard.inline_keyboard)
     if len(keyboard.inline_keyboard) > constants.PAGINATION_PAGE_SIZE:
-        if keyboard.inline_keyboard[-1][0].text == LEXICON_RU["inline"]["back"]:
-            back_button = keyboard.inline_keyboard.pop(-1)
+        all_buttons = list(keyboard.inline_keyboard)
+        if all_buttons[-1][0].text == LEXICON_RU["inline"]["back"]:
+            back_button = all_buttons.pop(-1)
         elif factory is EditCartCallbackFactory:
-            back_button = keyboard.inline_keyboard.pop(-1)
+            back_button = all_buttons.pop(-1)
         else:
             back_button = []
         start_index = (constants.PAGINATION_PAGE_SIZE * page) - constants.PAGINATION_PAGE_SIZE
         end_index = start_index + constants.PAGINATION_PAGE_SIZE
-        buttons = keyboard.inline_keyboard[start_index:end_index]
+        buttons = all_buttons[start_index:end_index]
         if not category_id is None:
             navigation_buttons = []
             if page > 1:
@@ -167,7 +355,7 @@ def pagination_keyboard(
                     callback_data=factory(category_id=category_id, page=page - 1).pack(),
                 )
                 navigation_buttons.append(buttont_previous)
-            if math.ceil(len(keyboard.inline_keyboard) / constants.PAGINATION_PAGE_SIZE) > page:
+            if math.ceil(len(all_buttons) / constants.PAGINATION_PAGE_SIZE) > page:
                 buttont_next = InlineKeyboardButton(
                     text=LEXICON_RU["inline"]["next"],
                     callback_data=factory(category_id=category_id, page=page + 1).pack(),
@@ -182,7 +370,7 @@ def pagination_keyboard(
                     callback_data=factory(page=page - 1).pack(),
                 )
                 navigation_buttons.append(buttont_previous)
-            if math.ceil(len(keyboard.inline_keyboard) / constants.PAGINATION_PAGE_SIZE) > page:
+            if math.ceil(len(all_buttons) / constants.PAGINATION_PAGE_SIZE) > page:
                 buttont_next = InlineKeyboardButton(
                     text=LEXICON_RU["inline"]["next"],
                     callback_data=factory(page=page + 1).pack(),
@@ -221,9 +409,8 @@ async def _edit_product_button(
     """
     product_button: InlineKeyboardButton = buttons_list[0][0]
     current_product_id = AddToCartCallbackFactory.unpack(product_button.callback_data).id
-    current_product = cart.items.get(str(current_product_id))
     product_button.text = LEXICON_RU["inline"]["product_quantity_in_cart"].substitute(
-        count=current_product.quantity if not current_product is None else 0
+        count=await cart.get_product_quantity(current_product_id)
     )
 
     return buttons_list
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые запросы.
+
+    Пока запрос с некоторым ключом выполняется, все остальные вызовы с тем же ключом не запускают свой запрос,
+    а ждут результат уже выполняющегося. Запрос выполняется в отдельной задаче, поэтому отмена одного из ожидающих
+    не отменяет его для остальных.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self.stats = {"executed": 0, "collapsed": 0}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Возвращает результат func. Одновременные вызовы с одинаковым ключом получают один и тот же результат.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.stats["executed"] += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done_task: self._forget(key, done_task))
+        else:
+            self.stats["collapsed"] += 1
+            logger.debug("Request %s joined the in-flight one", key)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Request %s failed: %s", key, task.exception())
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Возвращает количество выполненных и объединённых запросов.
+        """
+        calls_count = self.stats["executed"] + self.stats["collapsed"]
+        return {
+            **self.stats,
+            "in_flight": len(self._calls),
+            "collapsed_ratio": self.stats["collapsed"] / calls_count if calls_count else 0.0,
+        }
+
+
+catalog_single_flight = SingleFlight()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class StatsReporter:
+    """
+    Периодически пишет в лог статистику компонентов бота.
+
+    Компонент регистрируется функцией, которая возвращает его статистику и ничего не меняет. Если часть статистики
+    считается за окно времени (например, команды в секунду), то вместе с ней регистрируется функция, которая начинает
+    новое окно. Она вызывается после записи статистики в лог.
+    """
+
+    def __init__(self):
+        self._sources: dict[str, tuple[Callable[[], dict[str, Any]], Callable[[], None] | None]] = {}
+        self._report_task: asyncio.Task | None = None
+
+    def register(
+        self, name: str, get_stats: Callable[[], dict[str, Any]], start_window: Callable[[], None] | None = None
+    ) -> None:
+        """
+        Добавляет компонент, статистика которого пишется в лог.
+        """
+        self._sources[name] = (get_stats, start_window)
+
+    def collect(self) -> dict[str, dict[str, Any]]:
+        """
+        Возвращает статистику всех компонентов. Компонент, статистику которого не удалось получить, пропускается.
+        """
+        stats = {}
+        for name, (get_stats, _) in self._sources.items():
+            try:
+                stats[name] = get_stats()
+            except Exception as e:
+                logger.warning("Stats of %s were not collected. %s", name, e)
+        return stats
+
+    def report(self) -> None:
+        """
+        Пишет в лог статистику всех компонентов и начинает новые окна.
+        """
+        for name, stats in self.collect().items():
+            logger.info("Stats of %s: %s", name, stats)
+        for _, start_window in self._sources.values():
+            if start_window is not None:
+                start_window()
+
+    def start(self, interval: float) -> None:
+        """
+        Запускает запись статистики в лог каждые interval секунд.
+        """
+        if interval > 0 and self._report_task is None:
+            self._report_task = asyncio.create_task(self._report_loop(interval))
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодическую запись и пишет статистику в лог последний раз.
+        """
+        if self._report_task is not None:
+            self._report_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._report_task
+            self._report_task = None
+        self.report()
+
+    async def _report_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.report()
+
+
+stats_reporter = StatsReporter()
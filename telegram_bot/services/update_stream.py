@@ -0,0 +1,325 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import time
+from contextlib import suppress
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from redis.exceptions import RedisError, ResponseError
+from services.redis_services import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# Продлевает аренду раздела, только если она принадлежит этому обработчику.
+RENEW_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Освобождает аренду раздела, только если она принадлежит этому обработчику.
+RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+def get_update_user_id(update: dict[str, Any]) -> int:
+    """
+    Возвращает id пользователя или чата, от которого пришло обновление. Если его нет, то возвращает 0.
+    """
+    for key, event in update.items():
+        if key == "update_id" or not isinstance(event, dict):
+            continue
+        for field in ("from", "user", "chat"):
+            source = event.get(field)
+            if isinstance(source, dict) and "id" in source:
+                return source["id"]
+    return 0
+
+
+class UpdateStream:
+    """
+    Поток Redis с обновлениями Telegram, разделённый на разделы по id пользователя.
+
+    Все обновления одного пользователя попадают в один раздел, поэтому сохраняют порядок.
+    """
+
+    def __init__(self, name: str = "updates", partitions: int = 16, maxlen: int = 100_000):
+        self.name = name
+        self.partitions = partitions
+        self.maxlen = maxlen
+
+    def get_partition(self, user_id: int) -> int:
+        return user_id % self.partitions
+
+    def get_stream_name(self, partition: int) -> str:
+        return f"{self.name}:{partition}"
+
+    async def publish(self, update: dict[str, Any]) -> str:
+        """
+        Записывает обновление в раздел его пользователя и возвращает id записи.
+        """
+        stream_name = self.get_stream_name(self.get_partition(get_update_user_id(update)))
+        async with get_redis_connection() as redis_connection:
+            return await redis_connection.xadd(
+                stream_name, {"update": json.dumps(update)}, maxlen=self.maxlen, approximate=True
+            )
+
+
+class UpdateStreamWorker:
+    """
+    Обработчик обновлений из потока Redis.
+
+    Каждый раздел в любой момент читает только один обработчик: он берёт раздел в аренду и продлевает её, пока
+    работает. Разделы делятся между живыми обработчиками поровну, лишние освобождаются для новых обработчиков.
+    Обновления читаются через группу потребителей и подтверждаются после обработки. Обновления разных
+    пользователей обрабатываются параллельно, одного пользователя - по порядку.
+
+    Если обработчик умер, то его аренда истекает, и раздел берёт другой обработчик. Сначала он забирает себе
+    неподтверждённые обновления раздела и обрабатывает их, а уже потом читает новые.
+    """
+
+    def __init__(
+        self,
+        update_stream: UpdateStream,
+        dp: Dispatcher,
+        bot: Bot,
+        group: str = "bot_workers",
+        consumer: str | None = None,
+        batch_size: int = 100,
+        block_ms: int | None = 1000,
+        lease_ttl: float = 30,
+    ):
+        self.update_stream = update_stream
+        self.dp = dp
+        self.bot = bot
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.lease_ttl = lease_ttl
+        self._partition_tasks: dict[int, asyncio.Task] = {}
+        self._stopping: set[int] = set()
+        self._balance_task: asyncio.Task | None = None
+
+    @property
+    def partitions(self) -> list[int]:
+        return sorted(self._partition_tasks)
+
+    def get_lease_name(self, partition: int) -> str:
+        return f"{self.update_stream.get_stream_name(partition)}:owner"
+
+    def get_workers_name(self) -> str:
+        return f"{self.update_stream.name}:workers"
+
+    async def create_groups(self) -> None:
+        """
+        Создаёт группы потребителей во всех разделах, если их ещё нет.
+        """
+        async with get_redis_connection() as redis_connection:
+            for partition in range(self.update_stream.partitions):
+                with suppress(ResponseError):
+                    await redis_connection.xgroup_create(
+                        self.update_stream.get_stream_name(partition), self.group, id="0", mkstream=True
+                    )
+
+    async def start(self) -> None:
+        """
+        Создаёт группы потребителей и запускает распределение разделов.
+        """
+        await self.create_groups()
+        await self.balance()
+        self._balance_task = asyncio.create_task(self._run_balance())
+
+    async def stop(self) -> None:
+        """
+        Дообрабатывает прочитанные обновления и освобождает все разделы.
+        """
+        if self._balance_task is not None:
+            self._balance_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._balance_task
+            self._balance_task = None
+        await asyncio.gather(*(self._release(partition) for partition in self.partitions))
+        with suppress(RedisError):
+            async with get_redis_connection() as redis_connection:
+                await redis_connection.zrem(self.get_workers_name(), self.consumer)
+
+    async def balance(self) -> None:
+        """
+        Продлевает аренду своих разделов, освобождает лишние и берёт свободные до своей доли.
+        """
+        lease_ttl_ms = int(self.lease_ttl * 1000)
+        now_ms = int(time.time() * 1000)
+        async with get_redis_connection() as redis_connection:
+            pipe = redis_connection.pipeline(transaction=False)
+            pipe.zadd(self.get_workers_name(), {self.consumer: now_ms})
+            pipe.zremrangebyscore(self.get_workers_name(), 0, now_ms - lease_ttl_ms)
+            pipe.zcard(self.get_workers_name())
+            _, _, workers_count = await pipe.execute()
+
+            renew_lease = redis_connection.register_script(RENEW_LEASE_SCRIPT)
+            release_lease = redis_connection.register_script(RELEASE_LEASE_SCRIPT)
+            for partition in self.partitions:
+                if partition in self._stopping:
+                    continue
+                task = self._partition_tasks[partition]
+                if task.done():
+                    # Завершившийся раздел не продлевается, а освобождается, и его может снова взять любой обработчик.
+                    del self._partition_tasks[partition]
+                    if not task.cancelled() and task.exception() is not None:
+                        logger.error("Partition %s is stopped. %s", partition, task.exception())
+                    await release_lease(keys=[self.get_lease_name(partition)], args=[self.consumer])
+                    continue
+                if not await renew_lease(keys=[self.get_lease_name(partition)], args=[self.consumer, lease_ttl_ms]):
+                    logger.warning("Lease of partition %s is lost", partition)
+                    self._cancel(partition)
+
+            share = math.ceil(self.update_stream.partitions / max(workers_count, 1))
+            surplus = self.partitions[share:]
+            for partition in range(self.update_stream.partitions):
+                if len(self._partition_tasks) >= share:
+                    break
+                if partition in self._partition_tasks:
+                    continue
+                if await redis_connection.set(self.get_lease_name(partition), self.consumer, nx=True, px=lease_ttl_ms):
+                    logger.info("Partition %s is acquired by %s", partition, self.consumer)
+                    self._partition_tasks[partition] = asyncio.create_task(self._consume(partition))
+        await asyncio.gather(*(self._release(partition) for partition in surplus))
+
+    async def claim_pending(self, partition: int) -> int:
+        """
+        Забирает и обрабатывает неподтверждённые обновления раздела. Возвращает их количество.
+
+        Раздел в аренде только у этого обработчика, поэтому все его неподтверждённые обновления остались от
+        прежнего владельца и забираются без ожидания.
+        """
+        stream_name = self.update_stream.get_stream_name(partition)
+        claimed = 0
+        start_id = "0-0"
+        while True:
+            async with get_redis_connection() as redis_connection:
+                result = await redis_connection.xautoclaim(
+                    stream_name, self.group, self.consumer, min_idle_time=0, start_id=start_id, count=self.batch_size
+                )
+            # Redis 6.2 возвращает два элемента, а вместо удалённых записей - None. Redis 7 возвращает три элемента.
+            start_id = result[0]
+            entries = [entry for entry in result[1] if entry is not None and entry[0] is not None]
+            if entries:
+                logger.info("Claimed %s pending updates of partition %s", len(entries), partition)
+                claimed += len(entries)
+                await self.handle_entries(stream_name, entries)
+            if not result[1] or start_id in ("0-0", b"0-0"):
+                return claimed
+
+    async def read(self, partition: int) -> int:
+        """
+        Читает и обрабатывает новые обновления раздела. Возвращает их количество.
+        """
+        stream_name = self.update_stream.get_stream_name(partition)
+        async with get_redis_connection() as redis_connection:
+            result = await redis_connection.xreadgroup(
+                self.group, self.consumer, {stream_name: ">"}, count=self.batch_size, block=self.block_ms
+            )
+        entries = [entry for _, stream_entries in result for entry in stream_entries]
+        await self.handle_entries(stream_name, entries)
+        return len(entries)
+
+    async def handle_entries(self, stream_name: str, entries: list[tuple[str, dict[str, str]]]) -> None:
+        """
+        Обрабатывает записи потока: записи разных пользователей параллельно, одного пользователя - по порядку.
+        """
+        entries_by_user: dict[int, list[tuple[str, dict[str, Any]]]] = {}
+        for entry_id, fields in entries:
+            try:
+                update = json.loads(fields["update"])
+                user_id = get_update_user_id(update)
+            except Exception as e:
+                # Запись, которую нельзя разобрать, подтверждается, чтобы она не останавливала раздел.
+                logger.exception("Entry %s of %s is malformed. %s", entry_id, stream_name, e)
+                await self._ack(stream_name, entry_id)
+                continue
+            entries_by_user.setdefault(user_id, []).append((entry_id, update))
+        await asyncio.gather(
+            *(self._handle_user_entries(stream_name, user_entries) for user_entries in entries_by_user.values())
+        )
+
+    async def _handle_user_entries(self, stream_name: str, entries: list[tuple[str, dict[str, Any]]]) -> None:
+        for entry_id, update in entries:
+            try:
+                await self.dp.feed_raw_update(self.bot, update)
+            except Exception as e:
+                # Ошибочное обновление подтверждается, чтобы оно не останавливало раздел.
+                logger.exception("Update %s was not handled. %s", update.get("update_id"), e)
+            await self._ack(stream_name, entry_id)
+
+    async def _ack(self, stream_name: str, entry_id: str) -> None:
+        async with get_redis_connection() as redis_connection:
+            await redis_connection.xack(stream_name, self.group, entry_id)
+
+    async def _consume(self, partition: int) -> None:
+        pending_claimed = False
+        while partition not in self._stopping:
+            try:
+                if not pending_claimed:
+                    await self.claim_pending(partition)
+                    pending_claimed = True
+                await self.read(partition)
+            except RedisError as e:
+                logger.warning("Partition %s is unavailable. %s", partition, e)
+                await asyncio.sleep(1)
+            except Exception as e:
+                logger.exception("Partition %s was not consumed. %s", partition, e)
+                await asyncio.sleep(1)
+
+    def _cancel(self, partition: int) -> None:
+        task = self._partition_tasks.pop(partition, None)
+        if task is not None:
+            task.cancel()
+
+    async def _release(self, partition: int) -> None:
+        task = self._partition_tasks.get(partition)
+        if task is None:
+            return
+        self._stopping.add(partition)
+        try:
+            with suppress(asyncio.CancelledError):
+                await task
+        finally:
+            self._partition_tasks.pop(partition, None)
+            self._stopping.discard(partition)
+        with suppress(RedisError):
+            async with get_redis_connection() as redis_connection:
+                release_lease = redis_connection.register_script(RELEASE_LEASE_SCRIPT)
+                await release_lease(keys=[self.get_lease_name(partition)], args=[self.consumer])
+        logger.info("Partition %s is released by %s", partition, self.consumer)
+
+    async def _run_balance(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self.balance()
+            except RedisError as e:
+                logger.warning("Partitions were not balanced. %s", e)
+
+
+async def run_stream_worker(dp: Dispatcher, bot: Bot, worker: UpdateStreamWorker) -> None:
+    """
+    Вызывает обработчики dp.startup, обрабатывает обновления из потока до отмены и вызывает обработчики dp.shutdown.
+    """
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+    await worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker.stop()
+        await dp.emit_shutdown(bot=bot, **workflow_data)
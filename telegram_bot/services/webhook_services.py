@@ -0,0 +1,70 @@
+import asyncio
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from config_data.config import UpdatesConfig
+
+logger = logging.getLogger(__name__)
+
+# Telegram открывает не больше 100 одновременных соединений к webhook.
+MAX_WEBHOOK_CONNECTIONS: int = 100
+
+
+def create_webhook_app(
+    dp: Dispatcher, bot: Bot, config: UpdatesConfig, handle_in_background: bool = True
+) -> web.Application:
+    """
+    Возвращает aiohttp приложение, которое принимает обновления от Telegram.
+
+    Запросы без правильного секретного токена в заголовке X-Telegram-Bot-Api-Secret-Token отклоняются.
+    Если handle_in_background равен True, то Telegram получает ответ сразу, а обновление обрабатывается в фоновой
+    задаче. Иначе ответ отправляется после обработки. При запуске приложения вызываются обработчики dp.startup и
+    устанавливается webhook, при остановке - обработчики dp.shutdown.
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=handle_in_background,
+        secret_token=config.webhook_secret.get_secret_value(),
+    ).register(app, path=config.webhook_path)
+    setup_application(app, dp, bot=bot)
+
+    async def set_webhook(bot: Bot) -> None:
+        await bot.set_webhook(
+            url=config.get_webhook_url(),
+            secret_token=config.webhook_secret.get_secret_value(),
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(config.max_concurrent, MAX_WEBHOOK_CONNECTIONS),
+        )
+        logger.info("Webhook set to %s", config.get_webhook_url())
+
+    dp.startup.register(set_webhook)
+    return app
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, config: UpdatesConfig, handle_in_background: bool = True) -> None:
+    """
+    Запускает сервер webhook и работает до отмены.
+    """
+    runner = web.AppRunner(create_webhook_app(dp, bot, config, handle_in_background))
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.webhook_host, port=config.webhook_port)
+    await site.start()
+    logger.info("Webhook server listens on %s:%s", config.webhook_host, config.webhook_port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_polling(dp: Dispatcher, bot: Bot, handle_as_tasks: bool = True) -> None:
+    """
+    Удаляет webhook, если он был установлен, и запускает long polling.
+
+    Если handle_as_tasks равен False, то обновления обрабатываются по порядку.
+    """
+    await bot.delete_webhook()
+    await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types(), handle_as_tasks=handle_as_tasks)
@@ -1,10 +1,12 @@
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, User
 from fakeredis import FakeAsyncRedis
 from lexicon.lexicon_ru import LEXICON_RU
 from models.models import ProductModel
+from services.api_client import ApiClient
+from services.catalog_cache import CatalogCache
 
 
 @pytest.fixture
@@ -49,10 +51,26 @@ def redis_connection():
 
 
 @pytest.fixture
-def extra(redis_connection):
+async def api_client():
+    client = ApiClient(base_url="http://web:8000")
+    yield client
+    await client.close()
+
+
+@pytest.fixture
+def catalog_cache(redis_connection):
+    cache = CatalogCache(max_size=4, ttl=60, redis_ttl=60)
+    with patch("services.services.catalog_cache", cache):
+        with patch("services.catalog_cache.get_redis_connection", return_value=redis_connection):
+            yield cache
+
+
+@pytest.fixture
+def extra(redis_connection, api_client):
     extra_dict = {
         "redis_connection": redis_connection,
         "api_url": "http://web:8000",
+        "api_client": api_client,
     }
     yield extra_dict
 
@@ -12,7 +12,7 @@ def test_add_to_cart_callback_factory_with_valid_data():
     assert factory.price == Decimal("10")
     assert factory.quantity == 1
     assert factory.cost == Decimal("10")
-    assert factory.pack() == "item:1:test:10:1:10"
+    assert factory.pack() == "item:AQAAAAEAAQ"
 
     factory = AddToCartCallbackFactory(id="1", name="test", price="10", quantity="1", cost="10")
     assert factory.id == 1
@@ -20,7 +20,7 @@ def test_add_to_cart_callback_factory_with_valid_data():
     assert factory.price == Decimal("10")
     assert factory.quantity == 1
     assert factory.cost == Decimal("10")
-    assert factory.pack() == "item:1:test:10:1:10"
+    assert factory.pack() == "item:AQAAAAEAAQ"
 
 
 def test_add_to_cart_callback_factory_with_negative_price():
@@ -63,3 +63,41 @@ def test_method_unpack_from_redis():
         )
         == factory
     )
+
+
+def test_compact_pack_and_unpack():
+    packed = AddToCartCallbackFactory.pack_compact(1)
+    assert packed == "item:AQAAAAEAAQ"
+    assert len(AddToCartCallbackFactory.pack_compact(4_000_000_000, 65_535)) <= 64
+
+    factory = AddToCartCallbackFactory.unpack(packed)
+    assert factory.id == 1
+    assert factory.quantity == 1
+    assert factory.name is None
+    assert factory.price is None
+    assert factory.cost is None
+
+
+def test_unpack_callback_data_of_old_buttons():
+    factory = AddToCartCallbackFactory.unpack("item:1:test:10:1:10")
+    assert factory == AddToCartCallbackFactory(id=1, name="test", price="10", quantity=1, cost="10")
+
+
+def test_pack_falls_back_to_text_if_id_is_too_big():
+    factory = AddToCartCallbackFactory(id=2**32, name="test", price="10", quantity=1, cost="10")
+    assert factory.pack() == f"item:{2**32}:test:10:1:10"
+    assert AddToCartCallbackFactory.unpack(factory.pack()) == factory
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "item:zz",
+        "item:AgAAAAEAAQ",  # Неизвестная версия
+        "item:AQAAAAEAAA",  # Нулевое количество
+        "remove:AQAAAAEAAQ",
+    ],
+)
+def test_unpack_bad_compact_callback_data(value: str):
+    with pytest.raises((TypeError, ValueError)):
+        AddToCartCallbackFactory.unpack(value)
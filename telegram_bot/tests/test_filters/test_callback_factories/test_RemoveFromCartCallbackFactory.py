@@ -12,7 +12,7 @@ def test_remove_from_cart_callback_factory_with_valid_data():
     assert factory.price == Decimal("100")
     assert factory.quantity == 10
     assert factory.cost == Decimal("100")
-    assert factory.pack() == "remove:1:test:100:10:100"
+    assert factory.pack() == "remove:AQAAAAEACg"
 
 
 def test_remove_from_cart_callback_factory_without_quantity():
@@ -22,7 +22,7 @@ def test_remove_from_cart_callback_factory_without_quantity():
     assert factory.price == Decimal("100")
     assert factory.quantity == 1
     assert factory.cost == Decimal("100")
-    assert factory.pack() == "remove:1:test:100:1:100"
+    assert factory.pack() == "remove:AQAAAAEAAQ"
 
 
 def test_remove_from_cart_callback_factory_with_negative_price():
@@ -38,3 +38,15 @@ def test_remove_from_cart_callback_factory_with_negative_quantity():
 def test_remove_from_cart_callback_factory_with_negative_cost():
     with pytest.raises(ValidationError):
         factory = RemoveFromCartCallbackFactory(id=1, name="test", price="100", quantity=10, cost="-100")
+
+
+def test_compact_pack_and_unpack():
+    packed = RemoveFromCartCallbackFactory.pack_compact(1)
+    assert packed == "remove:AQAAAAEAAQ"
+
+    factory = RemoveFromCartCallbackFactory.unpack(packed)
+    assert factory.id == 1
+    assert factory.quantity == 1
+    assert factory.name is None
+
+    assert RemoveFromCartCallbackFactory.unpack("remove:1:test:100:1:100").name == "test"
@@ -0,0 +1,30 @@
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def resolve_photo_mock():
+    async def resolve_photo(bot, key, photo):
+        return photo, None
+
+    with patch("services.cache_services.resolve_photo", side_effect=resolve_photo) as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def cart_tap_window():
+    with patch("handlers.callback_handlers.cart_tap_coalescer.window", 0):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def screen_state_redis(redis_connection):
+    with patch("services.screen_state.get_redis_connection", return_value=redis_connection):
+        yield redis_connection
+
+
+@pytest.fixture(autouse=True)
+def prefetch_mock():
+    with patch("handlers.callback_handlers.product_prefetcher.schedule") as mock:
+        yield mock
@@ -1,8 +1,10 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from filters.callback_factories import AddToCartCallbackFactory
 from handlers.callback_handlers import add_to_cart
+from services.cart_taps import cart_tap_coalescer
 
 
 @pytest.fixture
@@ -82,3 +84,53 @@ async def test_add_to_cart_if_callback_keyboard_was_not_edited(
     callback.message.edit_reply_markup.assert_not_called()
     callback.answer.assert_called_once()
     callback.answer.assert_awaited()
+
+
+@patch("handlers.callback_handlers.services.edit_product_inline_keyboard")
+@patch("handlers.callback_handlers.Cart")
+async def test_add_to_cart_coalesces_rapid_taps(
+    Cart_mock: MagicMock,
+    edit_product_inline_keyboard_mock: AsyncMock,
+    callback,
+    extra,
+    add_to_cart_callback_data: AddToCartCallbackFactory,
+    cart_mock,
+):
+    Cart_mock.return_value = cart_mock
+
+    with patch("handlers.callback_handlers.cart_tap_coalescer.window", 0.01):
+        await asyncio.gather(*(add_to_cart(callback, add_to_cart_callback_data, extra) for _ in range(5)))
+
+    # Товар добавляется при каждом нажатии, а клавиатура редактируется сразу и один раз в конце окна.
+    assert cart_mock.add_product_in_cart.await_count == 5
+    cart_mock.add_product_in_cart.assert_called_with(add_to_cart_callback_data)
+    assert edit_product_inline_keyboard_mock.await_count == 2
+    assert callback.message.edit_reply_markup.await_count == 2
+    cart_mock.get_items_from_redis.assert_awaited_once()
+    assert callback.answer.await_count == 5
+
+
+@patch("handlers.callback_handlers.services.edit_product_inline_keyboard")
+@patch("handlers.callback_handlers.Cart")
+async def test_add_to_cart_edits_keyboard_without_cart_lock(
+    Cart_mock: MagicMock,
+    edit_product_inline_keyboard_mock: AsyncMock,
+    callback,
+    extra,
+    add_to_cart_callback_data: AddToCartCallbackFactory,
+    cart_mock,
+):
+    Cart_mock.return_value = cart_mock
+    locked_while_editing = []
+
+    async def edit_reply_markup(**kwargs):
+        lock = cart_tap_coalescer._locks.get(callback.from_user.id)
+        locked_while_editing.append(lock is not None and lock.locked())
+
+    callback.message.edit_reply_markup.side_effect = edit_reply_markup
+
+    with patch("handlers.callback_handlers.cart_tap_coalescer.window", 0.01):
+        await asyncio.gather(*(add_to_cart(callback, add_to_cart_callback_data, extra) for _ in range(2)))
+
+    # Немедленное и отложенное редактирования клавиатуры не держат блокировку корзины.
+    assert locked_while_editing == [False, False]
@@ -1,6 +1,6 @@
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from aiogram.types import CallbackQuery, FSInputFile
+from aiogram.types import CallbackQuery, FSInputFile, InputMediaPhoto
 from handlers.callback_handlers import process_cart_clear_callback
 
 
@@ -18,7 +18,7 @@ async def test_process_cart_clear_callback(
     cart_mock: MagicMock,
 ):
     Cart_mock.return_value = cart_mock
-    get_photo_file_id_mock.return_value = FSInputFile("images/start.jpg")
+    get_photo_file_id_mock.return_value = InputMediaPhoto(media=FSInputFile("images/start.jpg"))
 
     await process_cart_clear_callback(callback, extra)
 
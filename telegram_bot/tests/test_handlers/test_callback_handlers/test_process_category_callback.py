@@ -7,7 +7,6 @@ from models.models import CategoryModel
 
 
 @patch("handlers.callback_handlers.cache_services.save_photo_file_id")
-@patch("handlers.callback_handlers.services.pagination_keyboard")
 @patch("handlers.callback_handlers.services.edit_category_inline_keyboard")
 @patch("handlers.callback_handlers.services.get_category_model_for_answer_callback")
 @patch("handlers.callback_handlers.Cart", spec=Cart)
@@ -15,7 +14,6 @@ async def test_process_category_callback_without_callback_data(
     Cart_mock: MagicMock,
     get_category_model_for_answer_callback_mock: AsyncMock,
     edit_category_inline_keyboard_mock: AsyncMock,
-    pagination_keyboard_mock: MagicMock,
     save_photo_file_id_mock: AsyncMock,
     callback,
     extra,
@@ -44,20 +42,12 @@ async def test_process_category_callback_without_callback_data(
 
     get_category_model_for_answer_callback_mock.assert_called_once()
     get_category_model_for_answer_callback_mock.assert_awaited()
-    get_category_model_for_answer_callback_mock.assert_called_with(callback, extra["api_url"], None)
-
-    pagination_keyboard_mock.assert_called_once()
-    pagination_keyboard_mock.assert_called_with(
-        keyboard=test_category.keyboard,
-        page=1,
-        category_id=None,
-        factory=CategoryCallbackFactory,
-    )
+    get_category_model_for_answer_callback_mock.assert_called_with(callback, extra["api_client"], None, None, page=1)
 
     edit_category_inline_keyboard_mock.assert_called_once()
     edit_category_inline_keyboard_mock.assert_awaited()
     edit_category_inline_keyboard_mock.assert_called_with(
-        cart=cart_mock, keyboard_list=pagination_keyboard_mock().inline_keyboard
+        cart=cart_mock, keyboard_list=test_category.keyboard.inline_keyboard
     )
 
     callback.message.edit_media.assert_called_once()
@@ -68,7 +58,6 @@ async def test_process_category_callback_without_callback_data(
 
 
 @patch("handlers.callback_handlers.cache_services.save_photo_file_id")
-@patch("handlers.callback_handlers.services.pagination_keyboard")
 @patch("handlers.callback_handlers.services.edit_category_inline_keyboard")
 @patch("handlers.callback_handlers.services.get_category_model_for_answer_callback")
 @patch("handlers.callback_handlers.Cart", spec=Cart)
@@ -76,11 +65,11 @@ async def test_process_category_callback_with_callback_data(
     Cart_mock: MagicMock,
     get_category_model_for_answer_callback_mock: AsyncMock,
     edit_category_inline_keyboard_mock: AsyncMock,
-    pagination_keyboard_mock: MagicMock,
     save_photo_file_id_mock: AsyncMock,
     callback,
     extra,
     cart_mock,
+    prefetch_mock,
 ):
     Cart_mock.return_value = cart_mock
 
@@ -108,21 +97,15 @@ async def test_process_category_callback_with_callback_data(
     get_category_model_for_answer_callback_mock.assert_called_once()
     get_category_model_for_answer_callback_mock.assert_awaited()
     get_category_model_for_answer_callback_mock.assert_called_with(
-        callback, extra["api_url"], callback_data.category_id
+        callback, extra["api_client"], callback_data.category_id, None, page=callback_data.page
     )
 
-    pagination_keyboard_mock.assert_called_once()
-    pagination_keyboard_mock.assert_called_with(
-        keyboard=test_category.keyboard,
-        page=callback_data.page,
-        category_id=callback_data.category_id,
-        factory=CategoryCallbackFactory,
-    )
+    prefetch_mock.assert_called_once_with(callback, extra["api_client"], test_category.keyboard, None)
 
     edit_category_inline_keyboard_mock.assert_called_once()
     edit_category_inline_keyboard_mock.assert_awaited()
     edit_category_inline_keyboard_mock.assert_called_with(
-        cart=cart_mock, keyboard_list=pagination_keyboard_mock().inline_keyboard
+        cart=cart_mock, keyboard_list=test_category.keyboard.inline_keyboard
     )
 
     callback.message.edit_media.assert_called_once()
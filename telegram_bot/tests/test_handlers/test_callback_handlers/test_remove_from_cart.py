@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from filters.callback_factories import RemoveFromCartCallbackFactory
 from handlers.callback_handlers import remove_from_cart
+from lexicon.lexicon_ru import LEXICON_RU
 
 
 @pytest.fixture
@@ -27,24 +28,22 @@ async def test_remove_from_cart_if_product_not_in_cart(
     cart_mock,
 ):
 
-    cart_mock.items = {}
+    cart_mock.remove_product_from_cart.side_effect = ValueError("Product not exists in cart")
     Cart_mock.return_value = cart_mock
 
     await remove_from_cart(callback, remove_from_cart_callback_data, extra)
 
     Cart_mock.assert_called_once()
     Cart_mock.assert_called_with(user_id=callback.from_user.id)
-    cart_mock.get_items_from_redis.assert_called_once()
-    cart_mock.get_items_from_redis.assert_awaited()
+    cart_mock.get_items_from_redis.assert_not_called()
 
-    cart_mock.remove_product_from_cart.assert_not_called()
+    cart_mock.remove_product_from_cart.assert_awaited_once_with(remove_from_cart_callback_data)
 
     edit_product_inline_keyboard_mock.assert_not_called()
 
     callback.message.edit_reply_markup.assert_not_called()
 
-    callback.answer.assert_called_once()
-    callback.answer.assert_awaited()
+    callback.answer.assert_awaited_once_with(text=LEXICON_RU["inline"]["item_is_not_in_cart"])
 
 
 @patch("handlers.callback_handlers.services.edit_product_inline_keyboard")
@@ -64,8 +63,7 @@ async def test_remove_from_cart_if_product_in_cart(
     Cart_mock.assert_called_once()
     Cart_mock.assert_called_with(user_id=callback.from_user.id)
 
-    cart_mock.get_items_from_redis.assert_called_once()
-    cart_mock.get_items_from_redis.assert_awaited()
+    cart_mock.get_items_from_redis.assert_not_called()
 
     cart_mock.remove_product_from_cart.assert_called_once()
     cart_mock.remove_product_from_cart.assert_awaited()
@@ -79,36 +77,3 @@ async def test_remove_from_cart_if_product_in_cart(
 
     callback.answer.assert_called_once()
     callback.answer.assert_awaited()
-
-
-@patch("handlers.callback_handlers.services.edit_product_inline_keyboard")
-@patch("handlers.callback_handlers.Cart")
-async def test_remove_from_cart_if_product_quantity_is_0(
-    Cart_mock: MagicMock,
-    edit_product_inline_keyboard_mock: AsyncMock,
-    callback,
-    extra,
-    remove_from_cart_callback_data: RemoveFromCartCallbackFactory,
-    product1,
-    cart_mock,
-):
-    product1.quantity = 0
-
-    Cart_mock.return_value = cart_mock
-
-    await remove_from_cart(callback, remove_from_cart_callback_data, extra)
-
-    Cart_mock.assert_called_once()
-    Cart_mock.assert_called_with(user_id=callback.from_user.id)
-
-    cart_mock.get_items_from_redis.assert_called_once()
-    cart_mock.get_items_from_redis.assert_awaited()
-
-    cart_mock.remove_product_from_cart.assert_not_called()
-
-    edit_product_inline_keyboard_mock.assert_not_called()
-
-    callback.message.edit_reply_markup.assert_not_called()
-
-    callback.answer.assert_called_once()
-    callback.answer.assert_awaited()
@@ -69,7 +69,7 @@ async def test_process_start_command_when_user_already_exist(
 
     authorize_user_mock.side_effect = authorize_user_mock_side_effect
 
-    with patch("handlers.command_handlers.aiohttp.client._BaseRequestContextManager") as mock_session_post:
+    with patch("aiohttp.client._BaseRequestContextManager") as mock_session_post:
         with patch("handlers.command_handlers.get_redis_connection") as mocked_get_redis_connetion:
             mocked_get_redis_connetion.return_value = extra["redis_connection"]
             with aioresponses() as mock_response:
@@ -0,0 +1,38 @@
+from unittest.mock import AsyncMock, patch
+
+from filters.callback_factories import CategoryCallbackFactory
+from middlewares.callback_middlewares import PreloadContextMiddleware
+from models.models import PreloadedContext
+from services.callback_dispatch import CallbackDispatcher
+from tests.test_services.test_callback_dispatch.test_CallbackDispatcher import (
+    get_update,
+)
+
+
+async def test_preload_context_middleware_unpacks_callback_data_once(api_client):
+    callback_dispatcher = CallbackDispatcher()
+
+    @callback_dispatcher.register(CategoryCallbackFactory)
+    async def category_handler(callback, callback_data: CategoryCallbackFactory):
+        return callback_data
+
+    middleware = PreloadContextMiddleware(callback_dispatcher)
+    callback = get_update(CategoryCallbackFactory(category_id=2, page=3).pack()).callback_query
+    data = {"extra": {"api_client": api_client}}
+
+    async def handler(event, data):
+        return await callback_dispatcher.dispatch(event, **data)
+
+    with (
+        patch(
+            "middlewares.callback_middlewares.preload_callback_context",
+            new_callable=AsyncMock,
+            return_value=PreloadedContext(),
+        ) as preload_callback_context_mock,
+        patch.object(CategoryCallbackFactory, "unpack", wraps=CategoryCallbackFactory.unpack) as unpack_mock,
+    ):
+        result = await middleware(handler, callback, data)
+
+    assert unpack_mock.call_count == 1
+    assert result == CategoryCallbackFactory(category_id=2, page=3)
+    assert preload_callback_context_mock.call_args.args == (callback, api_client, result)
@@ -0,0 +1,39 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from middlewares.update_middlewares import ConcurrencyLimitMiddleware
+
+
+async def test_concurrency_limit_middleware():
+    middleware = ConcurrencyLimitMiddleware(max_concurrent=2)
+    active = [0, 0]
+
+    async def handler(event, data):
+        active[0] += 1
+        active[1] = max(active[1], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return event
+
+    results = await asyncio.gather(*(middleware(handler, event, {}) for event in range(5)))
+
+    assert results == list(range(5))
+    assert active[1] == 2
+    assert middleware.get_stats() == {"max_concurrent": 2, "in_flight": 0, "waiting": 0}
+
+
+async def test_concurrency_limit_middleware_releases_slot_on_error():
+    middleware = ConcurrencyLimitMiddleware(max_concurrent=1)
+    handler = MagicMock(side_effect=ValueError)
+
+    async def failing_handler(event, data):
+        handler()
+
+    for _ in range(2):
+        try:
+            await middleware(failing_handler, None, {})
+        except ValueError:
+            pass
+
+    assert handler.call_count == 2
+    assert middleware.get_stats()["in_flight"] == 0
@@ -0,0 +1,21 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+from aiogram.types import Update
+from fakeredis.aioredis import FakeRedis
+from middlewares.update_middlewares import StreamPublishMiddleware
+from services.update_stream import UpdateStream
+from tests.test_services.test_update_stream.test_UpdateStream import get_message_update
+
+
+async def test_stream_publish_middleware(redis_connection: FakeRedis):
+    middleware = StreamPublishMiddleware(UpdateStream(name="updates", partitions=2))
+    handler = AsyncMock()
+    raw_update = get_message_update(1, 3)
+
+    with patch("services.update_stream.get_redis_connection", return_value=redis_connection):
+        await middleware(handler, Update.model_validate(raw_update), {})
+
+    handler.assert_not_called()
+    [(_, fields)] = await redis_connection.xrange("updates:1")
+    assert Update.model_validate(json.loads(fields["update"])) == Update.model_validate(raw_update)
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from decimal import Decimal
 from unittest.mock import AsyncMock, patch
@@ -12,8 +13,8 @@ from filters.callback_factories import (
     RemoveFromCartCallbackFactory,
 )
 from lexicon.lexicon_ru import LEXICON_RU
-from models.cart import Cart
-from models.models import ProductModel
+from models.cart import Cart, CartLine
+from redis.exceptions import ResponseError
 
 
 def test_cart_init_with_valid_data(redis_connection, user_id):
@@ -32,18 +33,7 @@ async def test_cart_add_product_in_cartd(cart: Cart, add_callbacks, redis_connec
     cart_in_redis = await redis_connection.hgetall(cart.cart_name)
     assert len(cart_in_redis) == 1
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=1,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=1),
     }
     product1_in_cart = await redis_connection.hget(cart.cart_name, add_product1_callbackdata.id)
     assert product1_in_cart == add_product1_callbackdata.get_product_str_for_redis()
@@ -52,30 +42,8 @@ async def test_cart_add_product_in_cartd(cart: Cart, add_callbacks, redis_connec
     cart_in_redis = await redis_connection.hgetall(cart.cart_name)
     assert len(cart_in_redis) == 2
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=1,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
-        "2": ProductModel(
-            id=2,
-            name="test_product_2",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=2,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=1),
+        "2": CartLine(id=2, name="test_product_2", price=Decimal("10.00"), quantity=2),
     }
     product2_in_cart = await redis_connection.hget(cart.cart_name, add_product2_callbackdata.id)
     assert product2_in_cart == add_product2_callbackdata.get_product_str_for_redis()
@@ -84,68 +52,26 @@ async def test_cart_add_product_in_cartd(cart: Cart, add_callbacks, redis_connec
     cart_in_redis = await redis_connection.hgetall(cart.cart_name)
     assert len(cart_in_redis) == 2
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=2,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
-        "2": ProductModel(
-            id=2,
-            name="test_product_2",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=2,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=2),
+        "2": CartLine(id=2, name="test_product_2", price=Decimal("10.00"), quantity=2),
     }
     product1_in_cart = await redis_connection.hget(cart.cart_name, add_product1_callbackdata.id)
     assert product1_in_cart != add_product1_callbackdata.get_product_str_for_redis()
     add_product1_callbackdata.quantity += 1
+    add_product1_callbackdata.cost = add_product1_callbackdata.price * add_product1_callbackdata.quantity
     assert product1_in_cart == add_product1_callbackdata.get_product_str_for_redis()
 
     await cart.add_product_in_cart(add_product2_callbackdata)
     cart_in_redis = await redis_connection.hgetall(cart.cart_name)
     assert len(cart_in_redis) == 2
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=2,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
-        "2": ProductModel(
-            id=2,
-            name="test_product_2",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=4,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=2),
+        "2": CartLine(id=2, name="test_product_2", price=Decimal("10.00"), quantity=4),
     }
     product2_in_cart = await redis_connection.hget(cart.cart_name, add_product2_callbackdata.id)
     assert product2_in_cart != add_product2_callbackdata.get_product_str_for_redis()
     add_product2_callbackdata.quantity += 2
+    add_product2_callbackdata.cost = add_product2_callbackdata.price * add_product2_callbackdata.quantity
     assert product2_in_cart == add_product2_callbackdata.get_product_str_for_redis()
 
 
@@ -169,30 +95,8 @@ async def test_cart_remove_product_from_cart(cart: Cart, add_callbacks, remove_c
     cart_in_redis = await redis_connection.hgetall(cart.cart_name)
     assert len(cart_in_redis) == 2
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=3,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
-        "2": ProductModel(
-            id=2,
-            name="test_product_2",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=4,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=3),
+        "2": CartLine(id=2, name="test_product_2", price=Decimal("10.00"), quantity=4),
     }
 
     await cart.remove_product_from_cart(remove_product1_callbackdata)
@@ -215,6 +119,33 @@ async def test_cart_remove_product_from_cart(cart: Cart, add_callbacks, remove_c
     assert cart.items == {}
 
 
+async def test_cart_product_name_with_separator(cart: Cart, redis_connection):
+    callback_data = AddToCartCallbackFactory(
+        id=3, name="Латте: большой", price=Decimal("10.00"), quantity=1, cost=Decimal("10.00")
+    )
+
+    await cart.add_product_in_cart(callback_data)
+    await cart.add_product_in_cart(callback_data)
+
+    assert cart.items == {"3": CartLine(id=3, name="Латте: большой", price=Decimal("10.00"), quantity=2)}
+    assert await cart.get_product_quantity(3) == 2
+    cart_info = await cart.get_cart_info()
+    assert cart_info["item_count"] == 2
+    assert cart_info["total_cost"] == Decimal("20.00")
+
+    await cart.get_items_from_redis()
+    assert cart.items["3"].name == "Латте: большой"
+
+
+async def test_cart_rejects_bad_line(cart: Cart, redis_connection):
+    callback_data = AddToCartCallbackFactory.model_construct(id=4, name="test", price="price", quantity=1, cost="price")
+
+    with pytest.raises(ResponseError, match="Bad cart line"):
+        await cart.add_product_in_cart(callback_data)
+
+    assert await redis_connection.hgetall(cart.cart_name) == {}
+
+
 async def test_cart_change_product_quantity(cart: Cart, add_callbacks, remove_callbacks, redis_connection):
     add_product1_callbackdata, *_ = add_callbacks.values()
     assert isinstance(add_product1_callbackdata, AddToCartCallbackFactory)
@@ -230,57 +161,26 @@ async def test_cart_change_product_quantity(cart: Cart, add_callbacks, remove_ca
 
     await cart.change_product_quantity(add_product1_callbackdata, quantity=2)
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=3,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=3),
     }
 
     string_product_from_redis: str = await redis_connection.hget(cart.cart_name, add_product1_callbackdata.id)
     product_from_redis = AddToCartCallbackFactory.unpack_from_redis(string_product_from_redis)
     assert product_from_redis.quantity == 3
+    assert string_product_from_redis == "1:test_product_1:10.00:3:30.00"
 
     await cart.change_product_quantity(remove_product1_callbackdata, quantity=-1)
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=2,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=2),
     }
     string_product_from_redis: str = await redis_connection.hget(cart.cart_name, remove_product1_callbackdata.id)
     product_from_redis = RemoveFromCartCallbackFactory.unpack_from_redis(string_product_from_redis)
     assert product_from_redis.quantity == 2
+    assert product_from_redis.cost == Decimal("20.00")
 
     await cart.change_product_quantity(remove_product1_callbackdata, quantity=-1)
     assert cart.items == {
-        "1": ProductModel(
-            id=1,
-            name="test_product_1",
-            picture=None,
-            description=None,
-            category=None,
-            price=Decimal("10.00"),
-            quantity=1,
-            parent_id=None,
-            keyboard=None,
-            is_data_from_redis=True,
-        ),
+        "1": CartLine(id=1, name="test_product_1", price=Decimal("10.00"), quantity=1),
     }
     string_product_from_redis: str = await redis_connection.hget(cart.cart_name, remove_product1_callbackdata.id)
     product_from_redis = RemoveFromCartCallbackFactory.unpack_from_redis(string_product_from_redis)
@@ -292,6 +192,56 @@ async def test_cart_change_product_quantity(cart: Cart, add_callbacks, remove_ca
     assert string_product_from_redis is None
 
 
+async def test_cart_delete_product_from_cart(cart: Cart, add_callbacks, redis_connection):
+    add_product1_callbackdata, add_product2_callbackdata = add_callbacks.values()
+
+    await cart.add_product_in_cart(add_product1_callbackdata)
+    await cart.add_product_in_cart(add_product2_callbackdata)
+    await cart.add_product_in_cart(add_product2_callbackdata)
+
+    await cart.delete_product_from_cart(add_product2_callbackdata.id)
+    assert list(cart.items) == [str(add_product1_callbackdata.id)]
+    assert await redis_connection.hget(cart.cart_name, add_product2_callbackdata.id) is None
+
+    await cart.delete_product_from_cart(add_product2_callbackdata.id)
+    assert list(cart.items) == [str(add_product1_callbackdata.id)]
+
+
+async def test_cart_add_product_in_cart_is_atomic(cart: Cart, add_callbacks, redis_connection):
+    add_product1_callbackdata, _ = add_callbacks.values()
+    connections_count = 0
+
+    @asynccontextmanager
+    async def redis_connection_provider():
+        nonlocal connections_count
+        connections_count += 1
+        yield redis_connection
+
+    cart.redis_connection_provider = redis_connection_provider
+
+    await asyncio.gather(*(cart.add_product_in_cart(add_product1_callbackdata) for _ in range(10)))
+
+    assert connections_count == 10
+    assert cart.items[str(add_product1_callbackdata.id)].quantity == 10
+    product_from_redis = AddToCartCallbackFactory.unpack_from_redis(
+        await redis_connection.hget(cart.cart_name, add_product1_callbackdata.id)
+    )
+    assert product_from_redis.quantity == 10
+    assert product_from_redis.cost == Decimal("100.00")
+
+
+async def test_cart_scripts_are_registered_once(cart: Cart, add_callbacks, redis_connection):
+    add_product1_callbackdata, _ = add_callbacks.values()
+
+    with patch.object(FakeRedis, "register_script", wraps=redis_connection.register_script) as register_script:
+        await cart.add_product_in_cart(add_product1_callbackdata)
+        await cart.add_product_in_cart(add_product1_callbackdata)
+        await cart.change_product_quantity(add_product1_callbackdata, quantity=1)
+
+    assert register_script.call_count <= 1
+    assert cart.items[str(add_product1_callbackdata.id)].quantity == 3
+
+
 async def test_cart__get_cart_data_from_redis(cart: Cart, add_callbacks, remove_callbacks):
     add_product1_callbackdata, add_product2_callbackdata = add_callbacks.values()
     assert isinstance(add_product1_callbackdata, AddToCartCallbackFactory)
@@ -321,7 +271,9 @@ async def test_cart__get_cart_data_from_redis(cart: Cart, add_callbacks, remove_
 
     cart_data_from_redis = await cart._get_cart_data_from_redis()
     assert cart_data_from_redis == {
-        str(add_product1_callbackdata.id): add_product1_callbackdata.get_product_str_for_redis().replace(":1:", ":2:"),
+        str(add_product1_callbackdata.id): add_product1_callbackdata.get_product_str_for_redis().replace(
+            ":1:10.00", ":2:20.00"
+        ),
         str(add_product2_callbackdata.id): add_product2_callbackdata.get_product_str_for_redis(),
     }
 
@@ -329,7 +281,9 @@ async def test_cart__get_cart_data_from_redis(cart: Cart, add_callbacks, remove_
 
     cart_data_from_redis = await cart._get_cart_data_from_redis()
     assert cart_data_from_redis == {
-        str(add_product1_callbackdata.id): add_product1_callbackdata.get_product_str_for_redis().replace(":1:", ":2:"),
+        str(add_product1_callbackdata.id): add_product1_callbackdata.get_product_str_for_redis().replace(
+            ":1:10.00", ":2:20.00"
+        ),
     }
 
     await cart.remove_product_from_cart(remove_product1_callbackdata)
@@ -345,19 +299,6 @@ async def test_cart__get_cart_data_from_redis(cart: Cart, add_callbacks, remove_
     assert cart_data_from_redis == {}
 
 
-async def test_cart_get_product_model_from_string(cart, products):
-    product1, *_ = products.values()
-    string_product1 = AddToCartCallbackFactory(**product1.model_dump()).get_product_str_for_redis()
-
-    product_1_form_string = await cart.get_product_model_from_string(string_product1)
-    assert isinstance(product_1_form_string, ProductModel)
-    assert product_1_form_string.id == product1.id
-    assert product_1_form_string.name == product1.name
-    assert product_1_form_string.price == product1.price
-    assert product_1_form_string.quantity == product1.quantity
-    assert product_1_form_string.cost == product1.cost
-
-
 async def test_cart_get_items_from_redis(
     cart: Cart,
     add_callbacks: dict[str, AddToCartCallbackFactory],
@@ -375,12 +316,8 @@ async def test_cart_get_items_from_redis(
     await cart.get_items_from_redis()
 
     assert cart.items == {
-        str(add_product1_callbackdata.id): await cart.get_product_model_from_string(
-            add_product1_callbackdata.get_product_str_for_redis()
-        ),
-        str(add_product2_callbackdata.id): await cart.get_product_model_from_string(
-            add_product2_callbackdata.get_product_str_for_redis()
-        ),
+        str(add_product1_callbackdata.id): CartLine.from_redis(add_product1_callbackdata.get_product_str_for_redis()),
+        str(add_product2_callbackdata.id): CartLine.from_redis(add_product2_callbackdata.get_product_str_for_redis()),
     }
 
 
@@ -392,12 +329,8 @@ async def test_cart_save_cart(
     add_product1_callbackdata, add_product2_callbackdata = add_callbacks.values()
 
     cart.items = {
-        str(add_product1_callbackdata.id): await cart.get_product_model_from_string(
-            add_product1_callbackdata.get_product_str_for_redis()
-        ),
-        str(add_product2_callbackdata.id): await cart.get_product_model_from_string(
-            add_product2_callbackdata.get_product_str_for_redis()
-        ),
+        str(add_product1_callbackdata.id): CartLine.from_redis(add_product1_callbackdata.get_product_str_for_redis()),
+        str(add_product2_callbackdata.id): CartLine.from_redis(add_product2_callbackdata.get_product_str_for_redis()),
     }
 
     cart_items_in_redis = await redis_connection.hgetall(cart.cart_name)
@@ -451,23 +384,96 @@ async def test_cart_check_cart_exist(
 
 async def test_cart_get_cart_info(cart: Cart, add_callbacks: dict[str, AddToCartCallbackFactory]):
     cart_info = await cart.get_cart_info()
-    assert cart_info == {"len": 0, "total_cost": 0}
+    assert cart_info == {"len": 0, "item_count": 0, "total_cost": 0}
 
     add_product1_callbackdata, add_product2_callbackdata = add_callbacks.values()
 
     await cart.add_product_in_cart(add_product1_callbackdata)
     cart_info = await cart.get_cart_info()
-    assert cart_info == {"len": len(cart.items), "total_cost": cart.total_cost}
+    assert cart_info == {
+        "len": len(cart.items),
+        "item_count": sum(product.quantity for product in cart.items.values()),
+        "total_cost": cart.total_cost,
+    }
 
     await cart.add_product_in_cart(add_product2_callbackdata)
     cart_info = await cart.get_cart_info()
 
-    assert cart_info == {"len": len(cart.items), "total_cost": cart.total_cost}
+    assert cart_info == {
+        "len": len(cart.items),
+        "item_count": sum(product.quantity for product in cart.items.values()),
+        "total_cost": cart.total_cost,
+    }
 
     await cart.clear()
     cart_info = await cart.get_cart_info()
 
-    assert cart_info == {"len": 0, "total_cost": 0}
+    assert cart_info == {"len": 0, "item_count": 0, "total_cost": 0}
+
+
+async def test_cart_info_is_maintained_incrementally(
+    cart: Cart,
+    add_callbacks: dict[str, AddToCartCallbackFactory],
+    remove_callbacks: dict[str, RemoveFromCartCallbackFactory],
+    redis_connection,
+):
+    add_product1_callbackdata, add_product2_callbackdata = add_callbacks.values()
+    remove_product1_callbackdata, _ = remove_callbacks.values()
+
+    await cart.add_product_in_cart(add_product1_callbackdata)
+    await cart.add_product_in_cart(add_product2_callbackdata)
+    await cart.change_product_quantity(add_product1_callbackdata, 2)
+    assert await redis_connection.hgetall(cart.cart_info_name) == {
+        "item_count": str(sum(product.quantity for product in cart.items.values())),
+        "total_cost_cents": str(int(cart.total_cost * 100)),
+    }
+
+    await cart.remove_product_from_cart(remove_product1_callbackdata)
+    await cart.delete_product_from_cart(add_product2_callbackdata.id)
+    cart_info = await cart.get_cart_info()
+    assert cart_info["item_count"] == cart.items[str(add_product1_callbackdata.id)].quantity
+    assert cart_info["total_cost"] == cart.total_cost
+
+
+async def test_cart_info_is_rebuilt_when_missing(
+    cart: Cart,
+    add_callbacks: dict[str, AddToCartCallbackFactory],
+    redis_connection,
+):
+    add_product1_callbackdata, add_product2_callbackdata = add_callbacks.values()
+    await redis_connection.hset(
+        cart.cart_name,
+        mapping={
+            str(add_product1_callbackdata.id): add_product1_callbackdata.get_product_str_for_redis(),
+            str(add_product2_callbackdata.id): add_product2_callbackdata.get_product_str_for_redis(),
+        },
+    )
+
+    cart_info = await cart.get_cart_info()
+    await cart.get_items_from_redis()
+    assert cart_info == {
+        "len": 2,
+        "item_count": sum(product.quantity for product in cart.items.values()),
+        "total_cost": cart.total_cost,
+    }
+
+
+async def test_cart_get_product_quantity(cart: Cart, add_callbacks: dict[str, AddToCartCallbackFactory]):
+    add_product1_callbackdata, add_product2_callbackdata = add_callbacks.values()
+    assert await cart.get_product_quantity(add_product1_callbackdata.id) == 0
+
+    await cart.add_product_in_cart(add_product1_callbackdata)
+    await cart.change_product_quantity(add_product1_callbackdata, 2)
+    assert await cart.get_product_quantity(add_product1_callbackdata.id) == 3
+
+
+async def test_cart_load_info(cart: Cart):
+    cart_info = {"len": 1, "item_count": 2, "total_cost": Decimal("20.00")}
+    cart.load_info(cart_info, {"1": 2})
+    cart.redis_connection_provider = None
+
+    assert await cart.get_cart_info() == cart_info
+    assert await cart.get_product_quantity(1) == 2
 
 
 async def test_cart_model_dump(cart: Cart, add_callbacks: dict[str, AddToCartCallbackFactory]):
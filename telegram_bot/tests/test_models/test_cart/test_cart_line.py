@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+import pytest
+from filters.callback_factories import AddToCartCallbackFactory
+from models.cart import CartLine
+
+
+def test_cart_line_from_redis(products):
+    product1, *_ = products.values()
+    string_product1 = AddToCartCallbackFactory(**product1.model_dump()).get_product_str_for_redis()
+
+    line = CartLine.from_redis(string_product1)
+    assert line.id == product1.id
+    assert line.name == product1.name
+    assert line.price == product1.price
+    assert line.quantity == product1.quantity
+    assert line.cost == product1.cost
+
+
+def test_cart_line_to_redis(add_callbacks):
+    for callback_data in add_callbacks.values():
+        line = CartLine.from_redis(callback_data.get_product_str_for_redis())
+        assert line.to_redis() == callback_data.get_product_str_for_redis()
+
+
+def test_cart_line_cost():
+    line = CartLine(1, "test", Decimal("10.50"), 3)
+    assert line.cost == Decimal("31.50")
+    line.quantity = 1
+    assert line.cost == Decimal("10.50")
+
+
+def test_cart_line_model_dump():
+    line = CartLine(1, "test", Decimal("10.00"), 2)
+    assert line.model_dump() == {
+        "id": 1,
+        "name": "test",
+        "price": Decimal("10.00"),
+        "quantity": 2,
+        "cost": Decimal("20.00"),
+    }
+    assert line.model_dump(by_alias=True) == {
+        "product_id": 1,
+        "product_name": "test",
+        "price": Decimal("10.00"),
+        "quantity": 2,
+        "cost": Decimal("20.00"),
+    }
+
+
+def test_cart_line_has_no_instance_dict():
+    line = CartLine(1, "test", Decimal("10.00"), 2)
+    with pytest.raises(AttributeError):
+        line.picture = None
+
+
+def test_cart_line_name_with_separator():
+    line = CartLine.from_redis("1:Латте: большой:10.00:2:20.00")
+    assert line == CartLine(1, "Латте: большой", Decimal("10.00"), 2)
+    assert CartLine.from_redis(line.to_redis()) == line
+
+
+@pytest.mark.parametrize("value", ["1:test:10.00:1", "1:test:10.00:x:10.00", "id:test:10.00:1:10.00", "1"])
+def test_cart_line_from_bad_string(value: str):
+    with pytest.raises(ValueError):
+        CartLine.from_redis(value)
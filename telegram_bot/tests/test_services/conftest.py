@@ -24,6 +24,9 @@ def message():
     msg.photo[-1].file_id = "message photo id"
     msg.from_user = MagicMock()
     msg.from_user.id = 1
+    msg.chat = MagicMock()
+    msg.chat.id = 1
+    msg.message_id = 1
     yield msg
 
 
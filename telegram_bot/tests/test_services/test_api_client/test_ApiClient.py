@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+from aiohttp import ClientSession
+from config_data.config import ApiConfig
+from services.api_client import ApiClient
+
+
+def test_api_client_from_config():
+    api_config = MagicMock(spec=ApiConfig)
+    api_config.get_api_url.return_value = "http://web:8000"
+    api_config.connection_limit = 10
+    api_config.connection_limit_per_host = 5
+    api_config.keepalive_timeout = 15
+    api_config.dns_cache_ttl = 60
+    api_config.total_timeout = 7
+    api_config.connect_timeout = 2
+
+    api_client = ApiClient.from_config(api_config)
+
+    assert api_client.base_url == "http://web:8000"
+    assert api_client.connection_limit == 10
+    assert api_client.connection_limit_per_host == 5
+    assert api_client.keepalive_timeout == 15
+    assert api_client.dns_cache_ttl == 60
+    assert api_client.timeout.total == 7
+    assert api_client.timeout.connect == 2
+
+
+def test_api_client_get_url():
+    api_client = ApiClient(base_url="http://web:8000/")
+    assert api_client.get_url("/categories/") == "http://web:8000/categories/"
+    assert api_client.get_url("product/1/") == "http://web:8000/product/1/"
+
+
+async def test_api_client_session_is_shared(api_client: ApiClient):
+    session = api_client.session
+    assert isinstance(session, ClientSession)
+    assert api_client.session is session
+    assert session.connector.limit == api_client.connection_limit
+    assert session.connector.limit_per_host == api_client.connection_limit_per_host
+
+
+async def test_api_client_close(api_client: ApiClient):
+    await api_client.start()
+    session = api_client.session
+
+    await api_client.close()
+    assert session.closed
+    assert api_client._session is None
+
+    assert api_client.session is not session
@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from config_data import constants
+from fakeredis.aioredis import FakeRedis
+from services.cache_services import PhotoFileIdWriter, save_photo_file_id
+
+
+@pytest.fixture
+def photo_file_id_writer(redis_connection: FakeRedis):
+    writer = PhotoFileIdWriter(batch_size=2)
+    with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
+        yield writer
+
+
+async def test_photo_file_id_writer_write_is_write_once(
+    photo_file_id_writer: PhotoFileIdWriter, redis_connection: FakeRedis
+):
+    await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, "espresso_hash", "old_file_id")
+
+    await photo_file_id_writer.write(
+        [
+            ("espresso", "espresso_hash", "new_file_id"),
+            ("latte", "latte_hash", "latte_file_id"),
+            ("cappuccino", "latte_hash", None),
+        ]
+    )
+
+    assert await redis_connection.hgetall(constants.PHOTO_FILE_ID_HASH_NAME) == {
+        "espresso_hash": "old_file_id",
+        "latte_hash": "latte_file_id",
+    }
+    assert await redis_connection.hgetall(constants.PHOTO_NAME_INDEX_HASH_NAME) == {
+        "espresso": "espresso_hash",
+        "latte": "latte_hash",
+        "cappuccino": "latte_hash",
+    }
+
+
+async def test_photo_file_id_writer_enqueue_skips_pending_keys(photo_file_id_writer: PhotoFileIdWriter):
+    photo_file_id_writer.enqueue("espresso", "hash_1", "file_id_1")
+    photo_file_id_writer.enqueue("espresso", "hash_2", "file_id_2")
+
+    assert photo_file_id_writer._queue.qsize() == 1
+
+
+async def test_photo_file_id_writer_writes_in_background(
+    photo_file_id_writer: PhotoFileIdWriter, redis_connection: FakeRedis, events
+):
+    photo_file_id_writer.start()
+    assert photo_file_id_writer.is_running
+
+    with patch.object(photo_file_id_writer, "write", wraps=photo_file_id_writer.write) as write_mock:
+        with patch("services.cache_services.photo_file_id_writer", photo_file_id_writer):
+            await save_photo_file_id(events.message, key="espresso", content_hash="espresso_hash")
+            await save_photo_file_id(events.message, key="latte", content_hash="latte_hash")
+            await save_photo_file_id(events.message, key="cappuccino", content_hash="cappuccino_hash")
+
+        # Запись не выполняется до тех пор, пока хэндлер не отдаст управление.
+        assert await redis_connection.hlen(constants.PHOTO_FILE_ID_HASH_NAME) == 0
+        for _ in range(100):
+            if await redis_connection.hlen(constants.PHOTO_FILE_ID_HASH_NAME) == 3:
+                break
+            await asyncio.sleep(0.01)
+
+    assert await redis_connection.hlen(constants.PHOTO_FILE_ID_HASH_NAME) == 3
+    assert write_mock.await_count == 2
+    await photo_file_id_writer.stop()
+    assert not photo_file_id_writer.is_running
+
+
+async def test_photo_file_id_writer_stop_flushes_queue(
+    photo_file_id_writer: PhotoFileIdWriter, redis_connection: FakeRedis
+):
+    photo_file_id_writer.enqueue("espresso", "espresso_hash", "espresso_file_id")
+    photo_file_id_writer.enqueue("latte", "latte_hash", "latte_file_id")
+    photo_file_id_writer.enqueue("cappuccino", "cappuccino_hash", "cappuccino_file_id")
+
+    await photo_file_id_writer.stop()
+
+    assert await redis_connection.hlen(constants.PHOTO_FILE_ID_HASH_NAME) == 3
+    assert photo_file_id_writer._queue.empty()
@@ -0,0 +1,19 @@
+from unittest.mock import patch
+
+from config_data import constants
+from fakeredis.aioredis import FakeRedis
+from services.cache_services import delete_legacy_photo_file_ids
+
+
+async def test_delete_legacy_photo_file_ids(redis_connection: FakeRedis):
+    await redis_connection.hset(constants.LEGACY_PHOTO_FILE_ID_HASH_NAME, "espresso", "old_file_id")
+    await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, "content_hash", "file_id")
+    await redis_connection.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, "espresso", "content_hash")
+
+    with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
+        assert await delete_legacy_photo_file_ids() is True
+        assert await delete_legacy_photo_file_ids() is False
+
+    assert not await redis_connection.exists(constants.LEGACY_PHOTO_FILE_ID_HASH_NAME)
+    assert await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, "content_hash") == "file_id"
+    assert await redis_connection.hget(constants.PHOTO_NAME_INDEX_HASH_NAME, "espresso") == "content_hash"
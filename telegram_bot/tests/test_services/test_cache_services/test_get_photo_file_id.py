@@ -15,7 +15,10 @@ async def test_get_photo_file_id(redis_connection: FakeRedis):
         result = await get_photo_file_id(key)
 
         assert result is None
-        await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, key, value)
+        await redis_connection.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, key, "content_hash")
+        assert await get_photo_file_id(key) is None
+
+        await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, "content_hash", value)
 
         result = await get_photo_file_id(key)
         assert not result is None
@@ -0,0 +1,32 @@
+from unittest.mock import MagicMock, patch
+
+from aiogram.types import BufferedInputFile, InputMediaPhoto
+from config_data import constants
+from fakeredis.aioredis import FakeRedis
+from services.cache_services import get_content_hash, resolve_photo
+
+
+async def test_resolve_photo(redis_connection: FakeRedis):
+    bot = MagicMock()
+    content = b"picture content"
+    content_hash = get_content_hash(content)
+
+    with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
+        photo = InputMediaPhoto(media="file_id")
+        assert await resolve_photo(bot, "espresso", photo) == (photo, None)
+
+        photo, result_hash = await resolve_photo(
+            bot, "espresso", InputMediaPhoto(media=BufferedInputFile(content, filename="espresso.jpg"))
+        )
+        assert result_hash == content_hash
+        assert photo.media.data == content
+
+        # Такое же изображение под другим ключом отправляется по уже сохранённому file_id.
+        await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, content_hash, "espresso_file_id")
+        photo, result_hash = await resolve_photo(
+            bot, "latte", InputMediaPhoto(media=BufferedInputFile(content, filename="latte.jpg"), caption="latte")
+        )
+        assert result_hash is None
+        assert photo.media == "espresso_file_id"
+        assert photo.caption == "latte"
+        assert await redis_connection.hget(constants.PHOTO_NAME_INDEX_HASH_NAME, "latte") == content_hash
@@ -7,6 +7,8 @@ from fakeredis.aioredis import FakeRedis
 from services.cache_services import save_photo_file_id
 from tests.test_services.events import Events
 
+CONTENT_HASH = "photo_content_hash"
+
 
 def get_params_form_message(message: Message) -> tuple[Message, str, str]:
     return message, message.caption, message.photo[-1].file_id
@@ -20,14 +22,15 @@ async def test_save_photo_file_id_with_message_if_key_is_none(events: Events, re
     with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
         message, caption, file_id = get_params_form_message(events.message)
 
-        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, caption)
+        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert photo_file_id_form_redis is None
 
-        await save_photo_file_id(message)
+        await save_photo_file_id(message, content_hash=CONTENT_HASH)
 
-        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, caption)
+        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert not photo_file_id_form_redis is None
         assert photo_file_id_form_redis == file_id
+        assert await redis_connection.hget(constants.PHOTO_NAME_INDEX_HASH_NAME, caption) == CONTENT_HASH
 
 
 async def test_save_photo_file_id_with_message_if_key_exists(events: Events, redis_connection: FakeRedis):
@@ -35,28 +38,30 @@ async def test_save_photo_file_id_with_message_if_key_exists(events: Events, red
         message, _, file_id = get_params_form_message(events.message)
         key = "key_for_message_photo_file_id"
 
-        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, key)
+        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert photo_file_id_form_redis is None
 
-        await save_photo_file_id(message, key=key)
+        await save_photo_file_id(message, key=key, content_hash=CONTENT_HASH)
 
-        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, key)
+        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert not photo_file_id_form_redis is None
         assert photo_file_id_form_redis == file_id
+        assert await redis_connection.hget(constants.PHOTO_NAME_INDEX_HASH_NAME, key) == CONTENT_HASH
 
 
 async def test_save_photo_file_id_with_callback_if_key_is_none(events: Events, redis_connection: FakeRedis):
     with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
         callback, caption, file_id = get_params_form_callback(events.callback)
 
-        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, caption)
+        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert photo_file_id_form_redis is None
 
-        await save_photo_file_id(callback)
+        await save_photo_file_id(callback, content_hash=CONTENT_HASH)
 
-        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, caption)
+        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert not photo_file_id_form_redis is None
         assert photo_file_id_form_redis == file_id
+        assert await redis_connection.hget(constants.PHOTO_NAME_INDEX_HASH_NAME, caption) == CONTENT_HASH
 
 
 async def test_save_photo_file_id_with_callback_if_key_exists(events: Events, redis_connection: FakeRedis):
@@ -64,14 +69,15 @@ async def test_save_photo_file_id_with_callback_if_key_exists(events: Events, re
         callback, _, file_id = get_params_form_callback(events.callback)
         key = "key_for_message_photo_file_id"
 
-        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, key)
+        photo_file_id_form_redis = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert photo_file_id_form_redis is None
 
-        await save_photo_file_id(callback, key=key)
+        await save_photo_file_id(callback, key=key, content_hash=CONTENT_HASH)
 
-        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, key)
+        photo_file_id_form_redis: bytes = await redis_connection.hget(constants.PHOTO_FILE_ID_HASH_NAME, CONTENT_HASH)
         assert not photo_file_id_form_redis is None
         assert photo_file_id_form_redis == file_id
+        assert await redis_connection.hget(constants.PHOTO_NAME_INDEX_HASH_NAME, key) == CONTENT_HASH
 
 
 async def test_save_photo_file_id_with_message_if_caption_is_none(events: Events, redis_connection: FakeRedis):
@@ -120,3 +126,11 @@ async def test_save_photo_file_id_with_callback_if_file_id_is_none(events: Event
         with pytest.raises(ValueError) as exc:
             await save_photo_file_id(callback)
         assert "No key or photo_file_id" in str(exc.value)
+
+
+async def test_save_photo_file_id_if_photo_sent_from_cache(events: Events, redis_connection: FakeRedis):
+    with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
+        await save_photo_file_id(events.message, key="key_for_message_photo_file_id")
+
+        assert await redis_connection.hlen(constants.PHOTO_FILE_ID_HASH_NAME) == 0
+        assert await redis_connection.hlen(constants.PHOTO_NAME_INDEX_HASH_NAME) == 0
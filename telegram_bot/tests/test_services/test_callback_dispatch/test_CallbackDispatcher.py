@@ -0,0 +1,90 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+from filters.callback_factories import AddToCartCallbackFactory, CategoryCallbackFactory
+from services.callback_dispatch import CallbackDispatcher
+
+
+@pytest.fixture
+def callback_dispatcher():
+    callback_dispatcher = CallbackDispatcher()
+
+    @callback_dispatcher.register("make_order", CategoryCallbackFactory)
+    async def category_handler(callback: CallbackQuery, callback_data: CategoryCallbackFactory | None = None):
+        return "category", callback_data
+
+    @callback_dispatcher.register(AddToCartCallbackFactory)
+    async def add_to_cart_handler(callback: CallbackQuery, callback_data: AddToCartCallbackFactory, extra: dict):
+        return "item", callback_data, extra
+
+    yield callback_dispatcher
+
+
+def get_update(data: str) -> Update:
+    user = User(id=1, is_bot=False, first_name="test")
+    message = Message(message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"))
+    return Update(
+        update_id=1,
+        callback_query=CallbackQuery(id="1", from_user=user, chat_instance="1", data=data, message=message),
+    )
+
+
+def test_resolve_literal(callback_dispatcher: CallbackDispatcher):
+    handler, callback_data = callback_dispatcher.resolve("make_order")
+    assert handler.callback.__name__ == "category_handler"
+    assert callback_data is None
+
+
+def test_resolve_prefix(callback_dispatcher: CallbackDispatcher):
+    handler, callback_data = callback_dispatcher.resolve("category:2:3")
+    assert handler.callback.__name__ == "category_handler"
+    assert callback_data == CategoryCallbackFactory(category_id=2, page=3)
+
+    handler, callback_data = callback_dispatcher.resolve(AddToCartCallbackFactory.pack_compact(5))
+    assert handler.callback.__name__ == "add_to_cart_handler"
+    assert callback_data.id == 5
+
+
+@pytest.mark.parametrize("data", [None, "unknown", "unknown:1", "category", "item:zz", "make_order:1"])
+def test_resolve_unknown_or_bad_data(callback_dispatcher: CallbackDispatcher, data: str | None):
+    assert callback_dispatcher.resolve(data) is None
+
+
+def test_register_twice(callback_dispatcher: CallbackDispatcher):
+    with pytest.raises(ValueError):
+        callback_dispatcher.register("make_order")(lambda callback: None)
+    with pytest.raises(ValueError):
+        callback_dispatcher.register(CategoryCallbackFactory)(lambda callback: None)
+
+
+async def test_dispatch_through_router(callback_dispatcher: CallbackDispatcher):
+    router = Router()
+    callback_dispatcher.setup(router)
+    dp = Dispatcher(extra={"api_url": "test"})
+    dp.include_router(router)
+    bot = Bot(token="42:TEST")
+
+    result = await dp.feed_update(bot, get_update(AddToCartCallbackFactory.pack_compact(5, 2)))
+    name, callback_data, extra = result
+    assert name == "item"
+    assert (callback_data.id, callback_data.quantity) == (5, 2)
+    assert extra == {"api_url": "test"}
+
+    assert await dp.feed_update(bot, get_update("make_order")) == ("category", None)
+    assert await dp.feed_update(bot, get_update("unknown")) is UNHANDLED
+    await bot.session.close()
+
+
+async def test_dispatch_uses_resolved_route(callback_dispatcher: CallbackDispatcher):
+    update = get_update("category:2:3")
+    route = callback_dispatcher.resolve(update.callback_query.data)
+
+    with patch.object(callback_dispatcher, "resolve") as resolve_mock:
+        result = await callback_dispatcher.dispatch(update.callback_query, callback_route=route)
+
+    resolve_mock.assert_not_called()
+    assert result == ("category", CategoryCallbackFactory(category_id=2, page=3))
@@ -0,0 +1,50 @@
+import asyncio
+
+from services.cart_taps import CartTapCoalescer
+
+
+async def test_cart_tap_coalescer_edits():
+    coalescer = CartTapCoalescer(window=0.01)
+
+    # Первое нажатие редактирует клавиатуру сразу, нажатия в течение окна ждут одного редактирования в конце окна.
+    assert coalescer.claim_edit(1, "message") is True
+    assert coalescer.claim_edit(2, "message") is True
+    assert coalescer.claim_edit(1, "message") is False
+    assert coalescer.claim_edit(1, "message") is False
+    results = await asyncio.gather(coalescer.delay_edit(1, "message"), coalescer.delay_edit(1, "message"))
+    assert results == [True, False]
+    assert coalescer.stats == {"taps": 4, "edits": 3, "coalesced": 1}
+
+    # После редактирования в конце окна нажатие снова ждёт окна, а после окна редактирует сразу.
+    assert coalescer.claim_edit(1, "message") is False
+    await asyncio.sleep(0.02)
+    assert coalescer.claim_edit(1, "message") is True
+    await asyncio.sleep(0.02)
+    assert coalescer._edited_at == {}
+    assert coalescer._pending == set()
+
+
+async def test_cart_tap_coalescer_without_window():
+    coalescer = CartTapCoalescer(window=0)
+
+    assert all(coalescer.claim_edit(1, "message") for _ in range(3))
+    assert coalescer.stats == {"taps": 3, "edits": 3, "coalesced": 0}
+    assert coalescer._edited_at == {}
+
+
+async def test_cart_tap_coalescer_lock():
+    coalescer = CartTapCoalescer()
+    events = []
+
+    async def mutate(user_id: int, name: str):
+        async with coalescer.lock(user_id):
+            events.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            events.append(f"{name} end")
+
+    await asyncio.gather(mutate(1, "first"), mutate(1, "second"), mutate(2, "other"))
+
+    # Изменения одного пользователя не пересекаются, другой пользователь их не ждёт.
+    assert events.index("first end") < events.index("second start")
+    assert events.index("other start") < events.index("first end")
+    assert coalescer._locks == {}
@@ -0,0 +1,95 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+from fakeredis.aioredis import FakeRedis
+from services.catalog_cache import CatalogCache
+
+
+async def test_catalog_cache_miss(catalog_cache: CatalogCache):
+    assert await catalog_cache.get("categories/1") is None
+    assert catalog_cache.stats == {"l1_hits": 0, "l2_hits": 0, "misses": 1, "revalidated": 0}
+
+
+async def test_catalog_cache_set_and_get_local(catalog_cache: CatalogCache, redis_connection: FakeRedis):
+    data = {"id": 1, "name": "test"}
+    await catalog_cache.set("categories/1", data, etag='"1"')
+
+    assert await catalog_cache.get("categories/1") == data
+    assert catalog_cache.stats == {"l1_hits": 1, "l2_hits": 0, "misses": 0, "revalidated": 0}
+    redis_entry = json.loads(await redis_connection.get("catalog:categories/1"))
+    assert redis_entry["data"] == data
+    assert redis_entry["etag"] == '"1"'
+    assert await redis_connection.ttl("catalog:categories/1") == catalog_cache.redis_ttl
+
+
+async def test_catalog_cache_get_from_redis(catalog_cache: CatalogCache, redis_connection: FakeRedis):
+    data = {"id": 1, "name": "test"}
+    entry = {"data": data, "etag": '"1"', "expires_at": time.time() + 60}
+    await redis_connection.set("catalog:categories/1", json.dumps(entry))
+
+    assert await catalog_cache.get("categories/1") == data
+    assert catalog_cache.stats == {"l1_hits": 0, "l2_hits": 1, "misses": 0, "revalidated": 0}
+
+    assert await catalog_cache.get("categories/1") == data
+    assert catalog_cache.stats == {"l1_hits": 1, "l2_hits": 1, "misses": 0, "revalidated": 0}
+
+
+async def test_catalog_cache_stale_entry_is_kept_for_revalidation(
+    catalog_cache: CatalogCache, redis_connection: FakeRedis
+):
+    entry = {"data": {"id": 1}, "etag": '"1"', "expires_at": time.time() - 1}
+    await redis_connection.set("catalog:categories/1", json.dumps(entry))
+
+    assert await catalog_cache.get("categories/1") is None
+    stale_entry = await catalog_cache.get_entry("categories/1")
+    assert not stale_entry.is_fresh
+    assert stale_entry.etag == '"1"'
+
+    await catalog_cache.revalidate("categories/1", stale_entry)
+    assert await catalog_cache.get("categories/1") == {"id": 1}
+    assert catalog_cache.stats["revalidated"] == 1
+
+
+async def test_catalog_cache_local_ttl(catalog_cache: CatalogCache):
+    catalog_cache.set_local("categories/1", {"id": 1})
+
+    with patch("services.catalog_cache.time.time", return_value=10**12):
+        assert catalog_cache.get_local("categories/1") is None
+    assert catalog_cache.get_stats()["size"] == 1
+
+
+def test_catalog_cache_lru_eviction(catalog_cache: CatalogCache):
+    for index in range(catalog_cache.max_size):
+        catalog_cache.set_local(f"product/{index}", {"id": index})
+
+    catalog_cache.get_local("product/0")
+    catalog_cache.set_local("product/new", {"id": "new"})
+
+    assert catalog_cache.get_local("product/0") == {"id": 0}
+    assert catalog_cache.get_local("product/1") is None
+    assert catalog_cache.get_stats()["size"] == catalog_cache.max_size
+
+
+def test_catalog_cache_configure(catalog_cache: CatalogCache):
+    for index in range(catalog_cache.max_size):
+        catalog_cache.set_local(f"product/{index}", {"id": index})
+
+    catalog_cache_config = MagicMock(max_size=2, ttl=10, redis_ttl=20)
+    catalog_cache.configure(catalog_cache_config)
+
+    assert catalog_cache.max_size == 2
+    assert catalog_cache.ttl == 10
+    assert catalog_cache.redis_ttl == 20
+    assert catalog_cache.get_stats()["size"] == 2
+
+
+async def test_catalog_cache_get_stats(catalog_cache: CatalogCache):
+    await catalog_cache.set("categories/1", {"id": 1})
+    await catalog_cache.get("categories/1")
+    await catalog_cache.get("categories/2")
+
+    stats = catalog_cache.get_stats()
+    assert stats["l1_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
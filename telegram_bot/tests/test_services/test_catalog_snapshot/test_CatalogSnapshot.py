@@ -0,0 +1,154 @@
+from unittest.mock import patch
+
+import pytest
+from aioresponses import aioresponses
+from models.models import CategoryModel, ProductModel
+from services.api_client import ApiClient
+from services.catalog_snapshot import CatalogSnapshot
+from services.services import (
+    get_category_model_for_answer_callback,
+    get_product_model_for_answer_callback,
+)
+
+
+@pytest.fixture
+def snapshot_data():
+    yield {
+        "version": 1,
+        "root_id": 1,
+        "categories": [
+            {
+                "id": 1,
+                "name": "root",
+                "url": "http://web:8000/categories/1/",
+                "description": None,
+                "picture": None,
+                "parent_id": None,
+            },
+            {
+                "id": 2,
+                "name": "coffee",
+                "url": "http://web:8000/categories/2/",
+                "description": "coffee",
+                "picture": None,
+                "parent_id": 1,
+            },
+            {
+                "id": 3,
+                "name": "tea",
+                "url": "http://web:8000/categories/3/",
+                "description": "tea",
+                "picture": None,
+                "parent_id": 1,
+            },
+        ],
+        "products": [
+            {
+                "id": 1,
+                "name": "espresso",
+                "picture": None,
+                "description": None,
+                "category": "http://web:8000/categories/2/",
+                "price": "100.00",
+                "parent_id": "2",
+            },
+            {
+                "id": 2,
+                "name": "latte",
+                "picture": None,
+                "description": None,
+                "category": "http://web:8000/categories/2/",
+                "price": "150.00",
+                "parent_id": "2",
+            },
+        ],
+    }
+
+
+@pytest.fixture
+def catalog_snapshot(snapshot_data):
+    snapshot = CatalogSnapshot()
+    snapshot.load(snapshot_data, etag='"catalog-1"')
+    with patch("services.services.catalog_snapshot", snapshot):
+        yield snapshot
+
+
+def test_catalog_snapshot_not_loaded():
+    snapshot = CatalogSnapshot()
+    assert not snapshot.is_loaded
+    assert snapshot.get_category_data() is None
+    assert snapshot.get_product_data(1) is None
+    assert not snapshot.has_product(1)
+
+
+def test_catalog_snapshot_get_root_category_data(catalog_snapshot: CatalogSnapshot):
+    data = catalog_snapshot.get_category_data()
+
+    assert data["id"] == 1
+    assert [child["name"] for child in data["children"]] == ["coffee", "tea"]
+    assert data["products"] == []
+    assert data["parent"] is None
+    assert data["parent_id"] is None
+
+
+def test_catalog_snapshot_get_category_data(catalog_snapshot: CatalogSnapshot, snapshot_data: dict):
+    data = catalog_snapshot.get_category_data("2")
+
+    assert data["id"] == 2
+    assert data["children"] == []
+    assert data["products"] == snapshot_data["products"]
+    assert data["parent"] == "http://web:8000/categories/1/"
+    assert data["parent_id"] == 1
+    assert catalog_snapshot.get_category_data(100) is None
+
+
+def test_catalog_snapshot_get_product_data(catalog_snapshot: CatalogSnapshot, snapshot_data: dict):
+    assert catalog_snapshot.get_product_data("2") == snapshot_data["products"][1]
+    assert catalog_snapshot.get_product_data(100) is None
+    assert catalog_snapshot.has_product("2")
+    assert not catalog_snapshot.has_product(100)
+
+
+async def test_catalog_snapshot_refresh(api_client: ApiClient, snapshot_data: dict):
+    snapshot = CatalogSnapshot()
+    with aioresponses() as mock_response:
+        mock_response.get(
+            "http://web:8000/catalog/", status=200, payload=snapshot_data, headers={"ETag": '"catalog-1"'}
+        )
+        mock_response.get("http://web:8000/catalog/", status=304)
+
+        assert await snapshot.refresh(api_client) is True
+        assert snapshot.is_loaded
+        assert snapshot.version == 1
+        assert snapshot.etag == '"catalog-1"'
+
+        assert await snapshot.refresh(api_client) is False
+
+    request = list(mock_response.requests.values())[0][1]
+    assert request.kwargs["headers"]["If-None-Match"] == '"catalog-1"'
+
+
+async def test_catalog_snapshot_start_and_stop(api_client: ApiClient):
+    snapshot = CatalogSnapshot()
+    with aioresponses() as mock_response:
+        mock_response.get("http://web:8000/catalog/", status=500)
+        await snapshot.start(api_client, refresh_interval=60)
+
+    assert not snapshot.is_loaded
+    assert snapshot._refresh_task is not None
+
+    await snapshot.stop()
+    assert snapshot._refresh_task is None
+
+
+async def test_services_use_catalog_snapshot(callback, extra: dict, catalog_snapshot: CatalogSnapshot):
+    with aioresponses() as mock_response:
+        with patch("services.services.get_redis_connection", return_value=extra["redis_connection"]):
+            category = await get_category_model_for_answer_callback(callback, extra["api_client"], 2)
+            product = await get_product_model_for_answer_callback(callback, extra["api_client"], 1)
+
+    assert mock_response.requests == {}
+    assert isinstance(category, CategoryModel)
+    assert category.name == "coffee"
+    assert isinstance(product, ProductModel)
+    assert product.name == "espresso"
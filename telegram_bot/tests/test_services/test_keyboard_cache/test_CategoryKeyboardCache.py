@@ -0,0 +1,61 @@
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from services.keyboard_cache import CategoryKeyboardCache
+
+
+def get_pages() -> list[InlineKeyboardMarkup]:
+    return [
+        InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=f"Page {page}", callback_data="pass")]])
+        for page in (1, 2)
+    ]
+
+
+def test_get_and_set():
+    cache = CategoryKeyboardCache()
+    cache.set(1, 10, get_pages())
+
+    keyboard = cache.get(1, 10, 2)
+
+    assert keyboard.inline_keyboard[0][0].text == "Page 2"
+    assert cache.stats == {"hits": 1, "misses": 0}
+
+
+def test_get_returns_new_lists():
+    cache = CategoryKeyboardCache()
+    cache.set(1, 10, get_pages())
+
+    keyboard = cache.get(1, 10, 1)
+    keyboard.inline_keyboard.append([InlineKeyboardButton(text="cart", callback_data="cart")])
+    keyboard.inline_keyboard[0].clear()
+
+    assert cache.get(1, 10, 1).inline_keyboard[0][0].text == "Page 1"
+    assert len(cache.get(1, 10, 1).inline_keyboard) == 1
+
+
+def test_get_misses():
+    cache = CategoryKeyboardCache()
+    cache.set(1, 10, get_pages())
+
+    assert cache.get(None, 10, 1) is None
+    assert cache.get(2, 10, 1) is None
+    assert cache.get(1, 11, 1) is None
+    assert cache.get(1, 10, 3) is None
+    assert cache.get(1, 10, 0) is None
+    assert cache.stats == {"hits": 0, "misses": 5}
+
+
+def test_new_version_resets_cache():
+    cache = CategoryKeyboardCache()
+    cache.set(1, 10, get_pages())
+    cache.set(2, 11, get_pages())
+
+    assert cache.version == 2
+    assert cache.get(2, 10, 1) is None
+    assert cache.get(2, 11, 1) is not None
+
+
+def test_unknown_version_is_not_cached():
+    cache = CategoryKeyboardCache()
+    cache.set(None, 10, get_pages())
+
+    assert cache.version is None
+    assert cache.get(None, 10, 1) is None
@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from config_data import constants
+from fakeredis.aioredis import FakeRedis
+from services.cache_services import get_photo_file_id, save_photo_file_id
+from services.photo_file_id_cache import PhotoFileIdCache, get_file_ids_from_redis
+
+
+@pytest.fixture
+async def photo_file_id_cache(redis_connection: FakeRedis):
+    await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, "espresso_hash", "espresso_file_id")
+    await redis_connection.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, "espresso", "espresso_hash")
+    cache = PhotoFileIdCache(poll_timeout=0.01)
+    with patch("services.photo_file_id_cache.get_redis_connection", return_value=redis_connection):
+        yield cache
+        await cache.stop()
+
+
+async def test_get_file_ids_from_redis(redis_connection: FakeRedis):
+    await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, "cart_hash", "cart_file_id")
+    await redis_connection.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, mapping={"cart": "cart_hash", "latte": "x"})
+
+    file_ids = await get_file_ids_from_redis(redis_connection, ["cart", "latte", "espresso"])
+
+    assert file_ids == {"cart": "cart_file_id", "latte": None, "espresso": None}
+    assert await get_file_ids_from_redis(redis_connection, []) == {}
+
+
+async def test_photo_file_id_cache_load(photo_file_id_cache: PhotoFileIdCache):
+    assert not photo_file_id_cache.is_loaded
+    assert photo_file_id_cache.get("espresso") is None
+
+    await photo_file_id_cache.load()
+
+    assert photo_file_id_cache.is_loaded
+    assert photo_file_id_cache.get("espresso") == "espresso_file_id"
+    assert photo_file_id_cache.get_by_hash("espresso_hash") == "espresso_file_id"
+
+
+def test_photo_file_id_cache_handle_message():
+    cache = PhotoFileIdCache()
+
+    cache.handle_message(cache.get_message("latte", "latte_hash", "latte_file_id"))
+    assert cache.get("latte") == "latte_file_id"
+
+    cache.handle_message("wrong message")
+    assert cache.get("latte") == "latte_file_id"
+
+    # Тот же файл под другим ключом: меняется только индекс.
+    cache.handle_message(cache.get_message("cappuccino", "latte_hash"))
+    assert cache.get("cappuccino") == "latte_file_id"
+    assert cache.get_by_hash("latte_hash") == "latte_file_id"
+
+
+async def test_photo_file_id_cache_receives_published_changes(
+    photo_file_id_cache: PhotoFileIdCache, redis_connection: FakeRedis
+):
+    await photo_file_id_cache.start()
+    assert photo_file_id_cache.get("espresso") == "espresso_file_id"
+
+    await redis_connection.publish(
+        constants.PHOTO_FILE_ID_CHANNEL_NAME, photo_file_id_cache.get_message("latte", "latte_hash", "latte_file_id")
+    )
+    for _ in range(100):
+        if photo_file_id_cache.get("latte") is not None:
+            break
+        await asyncio.sleep(0.01)
+
+    assert photo_file_id_cache.get("latte") == "latte_file_id"
+
+
+async def test_photo_file_id_cache_is_used_by_cache_services(
+    photo_file_id_cache: PhotoFileIdCache, redis_connection: FakeRedis, events
+):
+    await photo_file_id_cache.load()
+
+    with patch("services.cache_services.photo_file_id_cache", photo_file_id_cache):
+        with patch("services.cache_services.get_redis_connection") as get_redis_connection_mock:
+            photo = await get_photo_file_id("espresso")
+            assert photo.media == "espresso_file_id"
+            assert await get_photo_file_id("latte") is None
+            get_redis_connection_mock.assert_not_called()
+
+        with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
+            async with redis_connection.pubsub() as pubsub:
+                await pubsub.subscribe(constants.PHOTO_FILE_ID_CHANNEL_NAME)
+                await save_photo_file_id(events.message, key="latte", content_hash="latte_hash")
+                message = None
+                while message is None:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+
+    assert photo_file_id_cache.get("latte") == events.message.photo[-1].file_id
+    assert message["data"] == photo_file_id_cache.get_message("latte", "latte_hash", events.message.photo[-1].file_id)
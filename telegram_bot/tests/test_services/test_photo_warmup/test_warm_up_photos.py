@@ -0,0 +1,151 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, URLInputFile
+from config_data import constants
+from fakeredis.aioredis import FakeRedis
+from lexicon.lexicon_ru import LEXICON_RU
+from services.cache_services import get_content_hash
+from services.catalog_snapshot import CatalogSnapshot
+from services.photo_file_id_cache import PhotoFileIdCache
+from services.photo_warmup import (
+    DEFAULT_PICTURE_PATH,
+    UI_PICTURES,
+    get_input_file,
+    get_warmup_pictures,
+    warm_up_photos,
+)
+
+
+@pytest.fixture
+def snapshot():
+    catalog_snapshot = CatalogSnapshot()
+    catalog_snapshot.load(
+        {
+            "version": 1,
+            "root_id": 1,
+            "categories": [
+                {
+                    "id": 1,
+                    "name": "root",
+                    "url": "http://web:8000/categories/1/",
+                    "description": None,
+                    "picture": "http://web:8000/media/root.jpg",
+                    "parent_id": None,
+                },
+            ],
+            "products": [
+                {
+                    "id": 1,
+                    "name": "espresso",
+                    "picture": None,
+                    "description": None,
+                    "category": "http://web:8000/categories/1/",
+                    "price": "100.00",
+                    "parent_id": "1",
+                },
+                {
+                    "id": 2,
+                    "name": "latte",
+                    "picture": None,
+                    "description": None,
+                    "category": "http://web:8000/categories/1/",
+                    "price": "150.00",
+                    "parent_id": "1",
+                },
+            ],
+        }
+    )
+    yield catalog_snapshot
+
+
+@pytest.fixture
+def redis_for_warmup(redis_connection: FakeRedis):
+    with patch("services.photo_warmup.get_redis_connection", return_value=redis_connection):
+        with patch("services.cache_services.get_redis_connection", return_value=redis_connection):
+            with patch("services.photo_warmup.photo_file_id_cache", PhotoFileIdCache()):
+                with patch("services.photo_warmup.read_input_file", side_effect=read_input_file):
+                    yield redis_connection
+
+
+async def read_input_file(bot, input_file):
+    # Одинаковое содержимое у изображения категории root и заглушки.
+    path = input_file.url if isinstance(input_file, URLInputFile) else input_file.path
+    if path in ("http://web:8000/media/root.jpg", DEFAULT_PICTURE_PATH):
+        return b"default"
+    return str(path).encode()
+
+
+def get_bot(file_ids: dict[str, str], active_uploads: list[int] | None = None) -> MagicMock:
+    bot = MagicMock()
+
+    async def send_photo(chat_id, photo, **kwargs):
+        if active_uploads is not None:
+            active_uploads[0] += 1
+            active_uploads[1] = max(active_uploads[1], active_uploads[0])
+            await asyncio.sleep(0.01)
+            active_uploads[0] -= 1
+        content = photo.data.decode()
+        message = MagicMock()
+        message.photo = [MagicMock(file_id=file_ids.get(content, f"file_id:{content}"))]
+        return message
+
+    bot.send_photo = AsyncMock(side_effect=send_photo)
+    return bot
+
+
+def test_get_warmup_pictures(snapshot: CatalogSnapshot):
+    pictures = get_warmup_pictures(snapshot)
+
+    assert pictures == {
+        **UI_PICTURES,
+        "root": "http://web:8000/media/root.jpg",
+        "espresso": DEFAULT_PICTURE_PATH,
+        "latte": DEFAULT_PICTURE_PATH,
+    }
+    assert get_warmup_pictures(CatalogSnapshot()) == UI_PICTURES
+
+
+def test_get_input_file():
+    assert isinstance(get_input_file("https://test.com/test.png"), URLInputFile)
+    assert isinstance(get_input_file("images/cart.jpg"), FSInputFile)
+
+
+async def test_warm_up_photos(snapshot: CatalogSnapshot, redis_for_warmup: FakeRedis):
+    await redis_for_warmup.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, "cart", get_content_hash(b"images/cart.jpg"))
+    await redis_for_warmup.hset(constants.PHOTO_FILE_ID_HASH_NAME, get_content_hash(b"images/cart.jpg"), "cart_id")
+    active_uploads = [0, 0]
+    bot = get_bot({}, active_uploads)
+
+    stats = await warm_up_photos(bot, chat_id=1, catalog_snapshot=snapshot, concurrency=2)
+
+    # welcome.jpg и default.jpg отправляются по одному разу: у root то же содержимое, что и у заглушки,
+    # а для cart.jpg уже есть file_id.
+    assert bot.send_photo.await_count == 2
+    assert active_uploads[1] <= 2
+    assert stats == {"uploaded": 4, "skipped": 2, "failed": 0}
+    assert await redis_for_warmup.hgetall(constants.PHOTO_FILE_ID_HASH_NAME) == {
+        get_content_hash(b"images/cart.jpg"): "cart_id",
+        get_content_hash(b"images/welcome.jpg"): "file_id:images/welcome.jpg",
+        get_content_hash(b"default"): "file_id:default",
+    }
+    assert await redis_for_warmup.hgetall(constants.PHOTO_NAME_INDEX_HASH_NAME) == {
+        LEXICON_RU["commands"]["start"]: get_content_hash(b"images/welcome.jpg"),
+        "cart": get_content_hash(b"images/cart.jpg"),
+        "clear_cart": get_content_hash(b"images/cart.jpg"),
+        "root": get_content_hash(b"default"),
+        "espresso": get_content_hash(b"default"),
+        "latte": get_content_hash(b"default"),
+    }
+
+
+async def test_warm_up_photos_upload_error(snapshot: CatalogSnapshot, redis_for_warmup: FakeRedis):
+    bot = get_bot({})
+    bot.send_photo.side_effect = TelegramBadRequest(method=MagicMock(), message="Bad Request")
+
+    stats = await warm_up_photos(bot, chat_id=1, catalog_snapshot=snapshot)
+
+    assert stats == {"uploaded": 0, "skipped": 0, "failed": 6}
+    assert await redis_for_warmup.hlen(constants.PHOTO_FILE_ID_HASH_NAME) == 0
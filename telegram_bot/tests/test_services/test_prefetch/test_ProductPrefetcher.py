@@ -0,0 +1,119 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from filters.callback_factories import CategoryCallbackFactory, ProductCallbackFactory
+from models.models import ProductModel
+from services.catalog_snapshot import CatalogSnapshot
+from services.prefetch import ProductPrefetcher
+
+
+def get_keyboard(*product_ids: int) -> InlineKeyboardMarkup:
+    rows = [
+        [InlineKeyboardButton(text=str(product_id), callback_data=ProductCallbackFactory(product_id=product_id).pack())]
+        for product_id in product_ids
+    ]
+    rows.append(
+        [InlineKeyboardButton(text="next", callback_data=CategoryCallbackFactory(category_id=1, page=2).pack())]
+    )
+    rows.append([InlineKeyboardButton(text="cart", callback_data="cart")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def test_product_prefetcher_get_product_ids():
+    assert ProductPrefetcher.get_product_ids(get_keyboard(1, 2, 3)) == [1, 2, 3]
+    assert ProductPrefetcher.get_product_ids(get_keyboard()) == []
+
+
+@patch("services.prefetch.services.get_catalog_data")
+async def test_product_prefetcher_schedule(get_catalog_data_mock: AsyncMock, callback):
+    prefetcher = ProductPrefetcher(max_concurrent=2)
+    running = 0
+    max_running = 0
+
+    async def get_catalog_data(callback, api_client, path, auth_token):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if path == "/product/3/":
+            raise ValueError("API error")
+        return {"id": 1}
+
+    get_catalog_data_mock.side_effect = get_catalog_data
+    api_client = MagicMock()
+
+    with patch.object(ProductModel, "__init__") as product_model_init_mock:
+        task = prefetcher.schedule(callback, api_client, get_keyboard(1, 2, 3, 4), "token")
+        await task
+
+    assert [call.args[2] for call in get_catalog_data_mock.call_args_list] == [
+        "/product/1/",
+        "/product/2/",
+        "/product/3/",
+        "/product/4/",
+    ]
+    # Запросы к API используют уже прочитанный токен, модели товаров не создаются.
+    assert {call.args[3] for call in get_catalog_data_mock.call_args_list} == {"token"}
+    product_model_init_mock.assert_not_called()
+    # Одновременно загружается не больше max_concurrent товаров, ошибка не прерывает остальные загрузки.
+    assert max_running == 2
+    assert prefetcher.stats == {"scheduled": 4, "prefetched": 3, "failed": 1, "cancelled": 0}
+    assert prefetcher._tasks == {}
+    assert prefetcher.schedule(callback, api_client, get_keyboard()) is None
+
+
+@patch("services.prefetch.services.get_catalog_data")
+async def test_product_prefetcher_skips_products_from_snapshot(get_catalog_data_mock: AsyncMock, callback):
+    prefetcher = ProductPrefetcher()
+    snapshot = CatalogSnapshot()
+    snapshot.load(
+        {
+            "version": 1,
+            "root_id": 1,
+            "categories": [{"id": 1, "name": "root", "parent_id": None}],
+            "products": [{"id": 1, "name": "espresso", "price": "100.00", "parent_id": 1}],
+        }
+    )
+
+    with patch("services.prefetch.catalog_snapshot", snapshot):
+        task = prefetcher.schedule(callback, MagicMock(), get_keyboard(1, 2))
+        await task
+        assert prefetcher.schedule(callback, MagicMock(), get_keyboard(1)) is None
+
+    assert [call.args[2] for call in get_catalog_data_mock.call_args_list] == ["/product/2/"]
+    assert prefetcher.stats["scheduled"] == 1
+
+
+@patch("services.prefetch.services.get_catalog_data")
+async def test_product_prefetcher_cancel(get_catalog_data_mock: AsyncMock, callback):
+    prefetcher = ProductPrefetcher(max_concurrent=1)
+    started = asyncio.Event()
+
+    async def get_catalog_data(callback, api_client, path, auth_token):
+        started.set()
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    get_catalog_data_mock.side_effect = get_catalog_data
+    api_client = MagicMock()
+
+    first_task = prefetcher.schedule(callback, api_client, get_keyboard(1, 2, 3))
+    await started.wait()
+    # Новая страница отменяет загрузку прежней страницы того же пользователя.
+    second_task = prefetcher.schedule(callback, api_client, get_keyboard(4))
+    await second_task
+
+    assert first_task.cancelled()
+    assert [call.args[2] for call in get_catalog_data_mock.call_args_list] == ["/product/1/", "/product/4/"]
+    assert prefetcher.stats["prefetched"] == 1
+    assert prefetcher.stats["cancelled"] == 1
+
+    started.clear()
+    third_task = prefetcher.schedule(callback, api_client, get_keyboard(5, 6))
+    await started.wait()
+    await prefetcher.stop()
+
+    assert third_task.cancelled()
+    assert prefetcher._tasks == {}
@@ -0,0 +1,166 @@
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from config_data import constants
+from filters.callback_factories import (
+    AddToCartCallbackFactory,
+    CategoryCallbackFactory,
+    EditCartCallbackFactory,
+    ProductCallbackFactory,
+)
+from services.catalog_snapshot import CatalogSnapshot
+from services.preload_services import get_catalog_path, preload_callback_context
+
+
+@pytest.fixture
+def snapshot():
+    catalog_snapshot = CatalogSnapshot()
+    catalog_snapshot.load(
+        {
+            "version": 1,
+            "root_id": 1,
+            "categories": [
+                {
+                    "id": 1,
+                    "name": "root",
+                    "url": "http://web:8000/categories/1/",
+                    "description": None,
+                    "picture": None,
+                    "parent_id": None,
+                },
+            ],
+            "products": [
+                {
+                    "id": 1,
+                    "name": "espresso",
+                    "picture": None,
+                    "description": None,
+                    "category": "http://web:8000/categories/1/",
+                    "price": "100.00",
+                    "parent_id": "1",
+                },
+            ],
+        }
+    )
+    yield catalog_snapshot
+
+
+@pytest.fixture
+async def redis_with_context(redis_connection, callback):
+    await redis_connection.set(f"token:{callback.from_user.id}", "token")
+    await redis_connection.hset(f"cart:{callback.from_user.id}", "1", "1:espresso:100.00:2:200.00")
+    await redis_connection.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, "espresso", "espresso_hash")
+    await redis_connection.hset(constants.PHOTO_FILE_ID_HASH_NAME, "espresso_hash", "espresso_file_id")
+    with patch("services.preload_services.get_redis_connection", return_value=redis_connection):
+        yield redis_connection
+
+
+def test_get_catalog_path():
+    category_data = CategoryCallbackFactory(category_id=2)
+    assert get_catalog_path("make_order") == ("category", None, 1)
+    assert get_catalog_path(category_data.pack(), category_data) == ("category", "2", 1)
+    category_data = CategoryCallbackFactory(category_id=2, page=3)
+    assert get_catalog_path(category_data.pack(), category_data) == ("category", "2", 3)
+    product_data = ProductCallbackFactory(product_id=3)
+    assert get_catalog_path(product_data.pack(), product_data) == ("product", "3", 1)
+    assert get_catalog_path("category:abc:1") is None
+    assert get_catalog_path("cart") is None
+    assert get_catalog_path(None) is None
+
+
+def test_get_catalog_path_does_not_unpack_data():
+    with (
+        patch.object(CategoryCallbackFactory, "unpack") as category_unpack_mock,
+        patch.object(ProductCallbackFactory, "unpack") as product_unpack_mock,
+    ):
+        get_catalog_path("category:2:1", CategoryCallbackFactory(category_id=2))
+        get_catalog_path("product:3", ProductCallbackFactory(product_id=3))
+
+    category_unpack_mock.assert_not_called()
+    product_unpack_mock.assert_not_called()
+
+
+async def test_preload_callback_context_from_snapshot(callback, api_client, snapshot, redis_with_context):
+    callback_data = ProductCallbackFactory(product_id=1)
+    callback.data = callback_data.pack()
+    with patch("services.preload_services.catalog_snapshot", snapshot):
+        with patch("services.preload_services.get_catalog_data", new_callable=AsyncMock) as get_catalog_data_mock:
+            preloaded = await preload_callback_context(callback, api_client, callback_data)
+
+    get_catalog_data_mock.assert_not_called()
+    assert preloaded.auth_token == "token"
+    assert preloaded.cart_lines is None
+    assert preloaded.cart_info == {"len": 1, "item_count": 2, "total_cost": Decimal("200.00")}
+    assert preloaded.cart_quantities == {"1": 2}
+    assert preloaded.photo_file_ids == {"espresso": "espresso_file_id"}
+    assert preloaded.catalog_data["name"] == "espresso"
+
+
+async def test_preload_callback_context_from_api(callback, api_client, redis_with_context):
+    callback_data = CategoryCallbackFactory(category_id=2)
+    callback.data = callback_data.pack()
+    with patch("services.preload_services.catalog_snapshot", CatalogSnapshot()):
+        with patch("services.preload_services.get_catalog_data", new_callable=AsyncMock) as get_catalog_data_mock:
+
+            async def get_catalog_data(callback, api_client, path, auth_token):
+                # Токен для запроса к API берётся из конвейера.
+                assert await auth_token() == "token"
+                return {"id": 2, "name": "coffee"}
+
+            get_catalog_data_mock.side_effect = get_catalog_data
+            preloaded = await preload_callback_context(callback, api_client, callback_data)
+
+    get_catalog_data_mock.assert_awaited_once()
+    assert get_catalog_data_mock.call_args.args[:3] == (callback, api_client, "/categories/2/?page=1&page_size=4")
+    assert preloaded.catalog_data == {"id": 2, "name": "coffee"}
+    assert preloaded.cart_lines is None
+    assert preloaded.cart_info == {"len": 1, "item_count": 2, "total_cost": Decimal("200.00")}
+    assert preloaded.cart_quantities == {}
+    assert preloaded.photo_file_ids == {"coffee": None}
+    assert not preloaded.get_photo_file_id("coffee")
+    assert preloaded.has_photo_key("coffee")
+
+
+async def test_preload_callback_context_for_cart(callback, api_client, redis_with_context):
+    callback.data = "cart"
+    await redis_with_context.hset(constants.PHOTO_NAME_INDEX_HASH_NAME, "cart", "cart_hash")
+    await redis_with_context.hset(constants.PHOTO_FILE_ID_HASH_NAME, "cart_hash", "cart_file_id")
+
+    preloaded = await preload_callback_context(callback, api_client)
+
+    assert preloaded.catalog_data is None
+    assert preloaded.cart_lines == {"1": "1:espresso:100.00:2:200.00"}
+    assert preloaded.photo_file_ids == {"cart": "cart_file_id"}
+
+
+async def test_preload_callback_context_for_edit_cart(callback, api_client, redis_with_context):
+    callback_data = EditCartCallbackFactory()
+    callback.data = callback_data.pack()
+
+    preloaded = await preload_callback_context(callback, api_client, callback_data)
+
+    assert preloaded.cart_lines == {"1": "1:espresso:100.00:2:200.00"}
+    assert preloaded.cart_info is None
+
+
+async def test_preload_callback_context_skips_cart_for_cart_taps(callback, api_client, redis_with_context):
+    callback_data = AddToCartCallbackFactory.unpack(AddToCartCallbackFactory.pack_compact(1))
+    callback.data = AddToCartCallbackFactory.pack_compact(1)
+
+    preloaded = await preload_callback_context(callback, api_client, callback_data)
+
+    assert preloaded.auth_token == "token"
+    assert preloaded.cart_lines is None
+    assert preloaded.cart_info is None
+    assert preloaded.cart_quantities is None
+    assert not await redis_with_context.exists(f"cart:{callback.from_user.id}:info")
+
+
+async def test_preload_callback_context_reads_screen_state(callback, api_client, redis_with_context):
+    callback.data = "cart"
+    await redis_with_context.hset("screen:1:1", mapping={"media": "cart_file_id", "caption": "", "markup_hash": ""})
+
+    preloaded = await preload_callback_context(callback, api_client)
+
+    assert preloaded.screen_state == {"media": "cart_file_id", "caption": "", "markup_hash": ""}
@@ -0,0 +1,64 @@
+import asyncio
+
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeConnection
+from redis.asyncio import Redis
+from services.redis_services import InstrumentedConnectionPool
+
+
+def get_pool(max_connections: int = 2) -> InstrumentedConnectionPool:
+    return InstrumentedConnectionPool(
+        connection_class=FakeConnection,
+        server=FakeServer(),
+        max_connections=max_connections,
+        timeout=1,
+        decode_responses=True,
+    )
+
+
+async def test_instrumented_connection_pool_counts_commands():
+    pool = get_pool()
+    redis_client = Redis(connection_pool=pool)
+
+    await redis_client.set("key", "value")
+    assert await redis_client.get("key") == "value"
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.get("key")
+    pipe.get("key")
+    await pipe.execute()
+
+    stats = pool.get_stats()
+    assert stats["commands"] == 3
+    assert stats["commands_per_second"] > 0
+    assert stats["in_use_connections"] == 0
+    assert stats["idle_connections"] == 1
+    assert stats["max_connections"] == 2
+    assert stats["acquire_wait_avg"] >= 0
+
+    # Чтение статистики не начинает новое окно.
+    assert pool.get_stats()["commands_per_second"] > 0
+    pool.start_window()
+    assert pool.get_stats()["commands_per_second"] == 0
+    assert pool.get_stats()["commands"] == 3
+    await redis_client.aclose()
+    await pool.disconnect()
+
+
+async def test_instrumented_connection_pool_waits_for_connection():
+    pool = get_pool(max_connections=1)
+    connection = await pool.get_connection("GET")
+    assert pool.get_stats()["in_use_connections"] == 1
+
+    async def release_later():
+        await asyncio.sleep(0.05)
+        await pool.release(connection)
+
+    release_task = asyncio.create_task(release_later())
+    second_connection = await pool.get_connection("GET")
+    await release_task
+
+    assert second_connection is connection
+    assert pool.get_stats()["acquire_wait_max"] >= 0.04
+    await pool.release(second_connection)
+    await pool.disconnect()
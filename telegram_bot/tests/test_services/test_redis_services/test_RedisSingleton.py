@@ -12,29 +12,27 @@ async def test_redis_sengleton():
 
 
 def test_redis_sengleton_init_pool():
-    with patch("services.redis_services.ConnectionPool", new_callable=MagicMock()) as mock_connection_pool:
-        mock_redis_config = MagicMock()
-        mock_redis_config.model_dump.return_value = {
-            "host": "localhost",
-            "port": 6379,
-        }
-
-        redis_singleton = RedisSengleton()
-        assert not hasattr(redis_singleton, "_redis_pool")
-        pool = redis_singleton.init_pool(mock_redis_config)
-        assert hasattr(redis_singleton, "_redis_pool")
-        mock_connection_pool.assert_called_once_with(**mock_redis_config.model_dump())
-        assert pool == mock_connection_pool.return_value
+    with patch("services.redis_services.InstrumentedConnectionPool", new_callable=MagicMock()) as mock_connection_pool:
+        with patch("services.redis_services.Redis", new_callable=MagicMock()) as mock_redis:
+            mock_redis_config = MagicMock()
+            mock_redis_config.model_dump.return_value = {
+                "host": "localhost",
+                "port": 6379,
+            }
+            mock_redis_config.pool_timeout = 5
+
+            redis_singleton = RedisSengleton()
+            assert not hasattr(redis_singleton, "_redis_pool")
+            pool = redis_singleton.init_pool(mock_redis_config)
+            assert hasattr(redis_singleton, "_redis_pool")
+            mock_redis_config.model_dump.assert_called_once_with(exclude={"pool_timeout"})
+            mock_connection_pool.assert_called_once_with(host="localhost", port=6379, timeout=5)
+            assert pool == mock_connection_pool.return_value
+            mock_redis.assert_called_once_with(connection_pool=pool)
+            assert redis_singleton.get_client() == mock_redis.return_value
 
 
 def test_redis_sengleton_get_pool():
-    with patch("services.redis_services.ConnectionPool", new_callable=MagicMock()) as mock_connection_pool:
-        mock_redis_config = MagicMock()
-        mock_redis_config.model_dump.return_value = {
-            "host": "localhost",
-            "port": 6379,
-        }
-
-        redis_singleton = RedisSengleton()
-        assert hasattr(redis_singleton, "_redis_pool")
-        assert redis_singleton.get_pool() == redis_singleton._redis_pool
+    redis_singleton = RedisSengleton()
+    assert hasattr(redis_singleton, "_redis_pool")
+    assert redis_singleton.get_pool() == redis_singleton._redis_pool
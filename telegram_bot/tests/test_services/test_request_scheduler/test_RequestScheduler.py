@@ -0,0 +1,43 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, EditMessageReplyMarkup, SendMessage
+from services.request_scheduler import RequestScheduler
+
+
+def get_retry_after(method, retry_after: float) -> TelegramRetryAfter:
+    return TelegramRetryAfter(method=method, message="Flood control exceeded", retry_after=retry_after)
+
+
+async def test_request_scheduler_limits_only_message_methods():
+    scheduler = RequestScheduler(global_rate=1000, chat_rate=1000, chat_burst=1)
+    make_request = AsyncMock(return_value="result")
+    bot = MagicMock()
+
+    assert await scheduler(make_request, bot, AnswerCallbackQuery(callback_query_id="1")) == "result"
+    assert scheduler.stats["scheduled"] == 0
+    assert await scheduler(make_request, bot, SendMessage(chat_id=1, text="test")) == "result"
+    assert scheduler.stats["scheduled"] == 1
+    assert list(scheduler._chat_buckets) == [1]
+
+
+async def test_request_scheduler_retries_after_flood_wait():
+    scheduler = RequestScheduler(global_rate=1000, chat_rate=1000, chat_burst=1)
+    method = EditMessageReplyMarkup(chat_id=1, message_id=1)
+    make_request = AsyncMock(side_effect=[get_retry_after(method, 0.01), "result"])
+
+    assert await scheduler(make_request, MagicMock(), method) == "result"
+
+    assert make_request.await_count == 2
+    assert scheduler.stats == {"scheduled": 2, "retried": 1}
+
+
+async def test_request_scheduler_raises_long_flood_wait():
+    scheduler = RequestScheduler(max_retry_after=1)
+    method = SendMessage(chat_id=1, text="test")
+    make_request = AsyncMock(side_effect=get_retry_after(method, 30))
+
+    with pytest.raises(TelegramRetryAfter):
+        await scheduler(make_request, MagicMock(), method)
+    make_request.assert_awaited_once()
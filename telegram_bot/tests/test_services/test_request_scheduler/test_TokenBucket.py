@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from services.request_scheduler import RequestPriority, TokenBucket
+
+
+async def test_token_bucket_rate():
+    bucket = TokenBucket(rate=100, capacity=2)
+    started_at = time.monotonic()
+
+    for _ in range(6):
+        await bucket.acquire()
+
+    # Два места есть сразу, остальные четыре появляются с частотой 100 в секунду.
+    assert time.monotonic() - started_at >= 0.035
+
+
+async def test_token_bucket_priority():
+    bucket = TokenBucket(rate=100, capacity=1)
+    await bucket.acquire()
+    order = []
+
+    async def acquire(name: str, priority: RequestPriority):
+        await bucket.acquire(priority)
+        order.append(name)
+
+    await asyncio.gather(
+        acquire("background", RequestPriority.BACKGROUND),
+        acquire("interactive_1", RequestPriority.INTERACTIVE),
+        acquire("interactive_2", RequestPriority.INTERACTIVE),
+    )
+
+    assert order == ["interactive_1", "interactive_2", "background"]
+
+
+async def test_token_bucket_block():
+    bucket = TokenBucket(rate=1000, capacity=10)
+    bucket.block(0.05)
+    started_at = time.monotonic()
+
+    await bucket.acquire()
+
+    assert time.monotonic() - started_at >= 0.05
+    assert not bucket.is_idle
+
+
+async def test_token_bucket_cancelled_waiter_is_removed():
+    bucket = TokenBucket(rate=1, capacity=1)
+    await bucket.acquire()
+    task = asyncio.create_task(bucket.acquire())
+    await asyncio.sleep(0)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert bucket._waiters == []
@@ -0,0 +1,135 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import (
+    FSInputFile,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputMediaPhoto,
+    Message,
+)
+from models.models import PreloadedContext
+from services.screen_state import ScreenState, ScreenStateTracker, get_markup_hash
+
+
+def get_keyboard(text: str = "button") -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=text, callback_data="pass")]])
+
+
+@pytest.fixture
+def tracker(redis_connection):
+    with patch("services.screen_state.get_redis_connection", return_value=redis_connection):
+        yield ScreenStateTracker(ttl=60)
+
+
+@pytest.fixture
+def screen_message():
+    message = MagicMock(spec=Message)
+    message.chat = MagicMock()
+    message.chat.id = 1
+    message.message_id = 10
+    message.reply_markup = get_keyboard()
+    message.edit_media = AsyncMock(return_value=True)
+    message.edit_caption = AsyncMock(return_value=True)
+    message.edit_reply_markup = AsyncMock(return_value=True)
+    yield message
+
+
+async def test_unknown_screen_is_edited_with_media(tracker: ScreenStateTracker, screen_message, redis_connection):
+    photo = InputMediaPhoto(media="file_id", caption="caption")
+
+    assert await tracker.show(screen_message, photo, get_keyboard()) is screen_message
+
+    screen_message.edit_media.assert_awaited_once_with(media=photo, reply_markup=get_keyboard())
+    assert await tracker.get(screen_message) == ScreenState("file_id", "caption", get_markup_hash(get_keyboard()))
+    assert 0 < await redis_connection.ttl(tracker.get_name(1, 10)) <= 60
+
+
+async def test_only_caption_is_edited(tracker: ScreenStateTracker, screen_message):
+    await tracker.save(screen_message, ScreenState("file_id", "old caption", get_markup_hash(get_keyboard())))
+
+    await tracker.show(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard("new"))
+
+    screen_message.edit_media.assert_not_called()
+    screen_message.edit_caption.assert_awaited_once_with(caption="caption", reply_markup=get_keyboard("new"))
+    assert tracker.stats["edit_caption"] == 1
+
+
+async def test_only_keyboard_is_edited(tracker: ScreenStateTracker, screen_message):
+    await tracker.save(screen_message, ScreenState("file_id", "caption", get_markup_hash(get_keyboard())))
+
+    await tracker.show(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard("new"))
+
+    screen_message.edit_media.assert_not_called()
+    screen_message.edit_caption.assert_not_called()
+    screen_message.edit_reply_markup.assert_awaited_once_with(reply_markup=get_keyboard("new"))
+
+
+async def test_keyboard_is_compared_with_message_keyboard(tracker: ScreenStateTracker, screen_message):
+    # Клавиатуру изменил другой хэндлер, поэтому записанный хэш устарел.
+    await tracker.save(screen_message, ScreenState("file_id", "caption", get_markup_hash(get_keyboard("new"))))
+
+    await tracker.show(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard("new"))
+
+    screen_message.edit_reply_markup.assert_awaited_once()
+
+
+async def test_unchanged_screen_is_not_edited(tracker: ScreenStateTracker, screen_message):
+    await tracker.save(screen_message, ScreenState("file_id", "caption", get_markup_hash(get_keyboard())))
+
+    await tracker.show(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard())
+
+    screen_message.edit_media.assert_not_called()
+    screen_message.edit_caption.assert_not_called()
+    screen_message.edit_reply_markup.assert_not_called()
+    assert tracker.stats["skipped"] == 1
+
+
+async def test_uploaded_photo_is_always_edited_with_media(tracker: ScreenStateTracker, screen_message):
+    await tracker.save(screen_message, ScreenState("file_id", "caption", get_markup_hash(get_keyboard())))
+    answer = MagicMock(spec=Message)
+    answer.photo = [MagicMock()]
+    answer.photo[-1].file_id = "uploaded_file_id"
+    screen_message.edit_media.return_value = answer
+
+    result = await tracker.show(
+        screen_message, InputMediaPhoto(media=FSInputFile("images/cart.jpg"), caption="caption"), get_keyboard()
+    )
+
+    assert result is answer
+    screen_message.edit_media.assert_awaited_once()
+    assert (await tracker.get(screen_message)).media == "uploaded_file_id"
+
+
+async def test_preloaded_state_is_used(tracker: ScreenStateTracker, screen_message):
+    preloaded = PreloadedContext(
+        screen_state={"media": "file_id", "caption": "caption", "markup_hash": get_markup_hash(get_keyboard())}
+    )
+
+    await tracker.show(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard(), preloaded)
+
+    screen_message.edit_media.assert_not_called()
+    assert tracker.stats["skipped"] == 1
+
+
+async def test_not_modified_error_is_ignored(tracker: ScreenStateTracker, screen_message):
+    screen_message.edit_media.side_effect = TelegramBadRequest(MagicMock(), "Bad Request: message is not modified")
+
+    await tracker.show(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard())
+
+    assert tracker.stats["skipped"] == 1
+    assert (await tracker.get(screen_message)).media == "file_id"
+
+
+async def test_other_errors_are_raised(tracker: ScreenStateTracker, screen_message):
+    screen_message.edit_media.side_effect = TelegramBadRequest(MagicMock(), "Bad Request: message to edit not found")
+
+    with pytest.raises(TelegramBadRequest):
+        await tracker.show(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard())
+
+
+async def test_remember_new_message(tracker: ScreenStateTracker, screen_message):
+    await tracker.remember(screen_message, InputMediaPhoto(media="file_id", caption="caption"), get_keyboard())
+
+    assert await tracker.get(screen_message) == ScreenState("file_id", "caption", get_markup_hash(get_keyboard()))
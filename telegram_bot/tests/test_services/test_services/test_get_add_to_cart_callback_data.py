@@ -0,0 +1,49 @@
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from aiogram.types import CallbackQuery
+from filters.callback_factories import AddToCartCallbackFactory
+from services.services import get_add_to_cart_callback_data
+
+
+@patch("services.services.get_catalog_data", new_callable=AsyncMock)
+@patch("services.services.catalog_snapshot")
+async def test_compact_callback_data_is_filled_from_snapshot(
+    catalog_snapshot_mock, get_catalog_data_mock: AsyncMock, callback: CallbackQuery, extra: dict
+):
+    catalog_snapshot_mock.get_product_data.return_value = {"id": 1, "name": "test", "price": "200.00"}
+    callback_data = AddToCartCallbackFactory.unpack(AddToCartCallbackFactory.pack_compact(1))
+
+    result = await get_add_to_cart_callback_data(callback, extra["api_client"], callback_data, 3)
+
+    assert result == AddToCartCallbackFactory(id=1, name="test", price="200.00", quantity=3, cost="200.00")
+    assert result.get_product_str_for_redis() == "1:test:200.00:3:200.00"
+    get_catalog_data_mock.assert_not_called()
+
+
+@patch("services.services.get_catalog_data", new_callable=AsyncMock)
+@patch("services.services.catalog_snapshot")
+async def test_compact_callback_data_is_filled_from_api(
+    catalog_snapshot_mock, get_catalog_data_mock: AsyncMock, callback: CallbackQuery, extra: dict
+):
+    catalog_snapshot_mock.get_product_data.return_value = None
+    get_catalog_data_mock.return_value = {"id": 1, "name": "test", "price": 200}
+    callback_data = AddToCartCallbackFactory.unpack(AddToCartCallbackFactory.pack_compact(1))
+
+    result = await get_add_to_cart_callback_data(callback, extra["api_client"], callback_data, 1)
+
+    get_catalog_data_mock.assert_awaited_once_with(callback, extra["api_client"], "/product/1/")
+    assert result.name == "test"
+    assert result.price == Decimal("200")
+
+
+@patch("services.services.get_catalog_data", new_callable=AsyncMock)
+async def test_callback_data_of_old_buttons_is_not_looked_up(
+    get_catalog_data_mock: AsyncMock, callback: CallbackQuery, extra: dict
+):
+    callback_data = AddToCartCallbackFactory.unpack("item:1:test:10:1:10")
+
+    result = await get_add_to_cart_callback_data(callback, extra["api_client"], callback_data, 2)
+
+    assert result == callback_data.model_copy(update={"quantity": 2})
+    get_catalog_data_mock.assert_not_called()
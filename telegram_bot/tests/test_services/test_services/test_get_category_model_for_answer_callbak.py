@@ -2,12 +2,17 @@ from unittest.mock import patch
 
 from aiogram.types import CallbackQuery
 from aioresponses import aioresponses
-from models.models import CategoryModel
-from services.services import get_category_model_for_answer_callback
+from models.models import CategoryModel, PreloadedContext, ProductModel
+from services.catalog_cache import CatalogCacheEntry
+from services.keyboard_cache import CategoryKeyboardCache
+from services.services import (
+    get_category_keyboard_pages,
+    get_category_model_for_answer_callback,
+)
 
 
 async def test_get_category_model_for_answer_callback_if_category_id_is_None(
-    callback: CallbackQuery, extra: dict, category_init_data
+    callback: CallbackQuery, extra: dict, category_init_data, catalog_cache
 ):
 
     response_payload = category_init_data
@@ -16,9 +21,9 @@ async def test_get_category_model_for_answer_callback_if_category_id_is_None(
         with patch("services.services.get_redis_connection") as get_redis_connection_mock:
             get_redis_connection_mock.return_value = extra["redis_connection"]
 
-            url = f"{extra['api_url']}/categories/"
+            url = f"{extra['api_url']}/categories/?page=1&page_size=4"
             mock_response.get(url, status=200, payload=response_payload)
-            result: CategoryModel = await get_category_model_for_answer_callback(callback, extra["api_url"])
+            result: CategoryModel = await get_category_model_for_answer_callback(callback, extra["api_client"])
 
     assert isinstance(result, CategoryModel)
     assert result.id == category_init_data["id"]
@@ -31,16 +36,18 @@ async def test_get_category_model_for_answer_callback_if_category_id_is_None(
     assert result.parent_id == category_init_data["parent_id"]
 
 
-async def test_get_category_model_for_answer_callback(callback: CallbackQuery, extra: dict, category_init_data):
+async def test_get_category_model_for_answer_callback(
+    callback: CallbackQuery, extra: dict, category_init_data, catalog_cache
+):
     response_payload = category_init_data
 
     with aioresponses() as mock_response:
         with patch("services.services.get_redis_connection") as get_redis_connection_mock:
             get_redis_connection_mock.return_value = extra["redis_connection"]
 
-            url = f"{extra['api_url']}/categories/1/"
+            url = f"{extra['api_url']}/categories/1/?page=1&page_size=4"
             mock_response.get(url, status=200, payload=response_payload)
-            result: CategoryModel = await get_category_model_for_answer_callback(callback, extra["api_url"], 1)
+            result: CategoryModel = await get_category_model_for_answer_callback(callback, extra["api_client"], 1)
 
     assert isinstance(result, CategoryModel)
     assert result.id == category_init_data["id"]
@@ -51,3 +58,127 @@ async def test_get_category_model_for_answer_callback(callback: CallbackQuery, e
     assert result.products == category_init_data["products"]
     assert result.products == category_init_data["products"]
     assert result.parent_id == category_init_data["parent_id"]
+
+
+async def test_get_category_model_for_answer_callback_from_cache(
+    callback: CallbackQuery, extra: dict, category_init_data, catalog_cache
+):
+    with aioresponses() as mock_response:
+        with patch("services.services.get_redis_connection") as get_redis_connection_mock:
+            get_redis_connection_mock.return_value = extra["redis_connection"]
+
+            url = f"{extra['api_url']}/categories/1/?page=1&page_size=4"
+            mock_response.get(url, status=200, payload=category_init_data)
+            first_result: CategoryModel = await get_category_model_for_answer_callback(callback, extra["api_client"], 1)
+            second_result: CategoryModel = await get_category_model_for_answer_callback(
+                callback, extra["api_client"], 1
+            )
+
+    assert len(mock_response.requests) == 1
+    assert first_result.id == second_result.id == category_init_data["id"]
+    assert catalog_cache.stats["l1_hits"] == 1
+
+
+async def test_get_category_model_for_answer_callback_not_modified(
+    callback: CallbackQuery, extra: dict, category_init_data, catalog_cache
+):
+    catalog_cache._put_local(
+        "categories/1/?page=1&page_size=4", CatalogCacheEntry(data=category_init_data, etag='"catalog-1"', expires_at=0)
+    )
+
+    with aioresponses() as mock_response:
+        with patch("services.services.get_redis_connection") as get_redis_connection_mock:
+            get_redis_connection_mock.return_value = extra["redis_connection"]
+
+            url = f"{extra['api_url']}/categories/1/?page=1&page_size=4"
+            mock_response.get(url, status=304)
+            result: CategoryModel = await get_category_model_for_answer_callback(callback, extra["api_client"], 1)
+
+    request = list(mock_response.requests.values())[0][0]
+    assert request.kwargs["headers"]["If-None-Match"] == '"catalog-1"'
+    assert result.id == category_init_data["id"]
+    assert catalog_cache.stats["revalidated"] == 1
+    assert await catalog_cache.get("categories/1/?page=1&page_size=4") == category_init_data
+
+
+async def test_get_category_model_for_answer_callback_uses_keyboard_cache(
+    callback: CallbackQuery, extra: dict, category_init_data, catalog_cache
+):
+    products = [{"id": i, "name": f"product {i}", "price": "100.00", "parent_id": 1} for i in range(1, 6)]
+    category_data = {**category_init_data, "products": products}
+    keyboard_cache = CategoryKeyboardCache()
+    with (
+        patch("services.services.catalog_snapshot") as catalog_snapshot_mock,
+        patch("services.services.category_keyboard_cache", keyboard_cache),
+        patch("services.services.get_redis_connection", return_value=extra["redis_connection"]),
+    ):
+        catalog_snapshot_mock.version = 1
+        catalog_snapshot_mock.get_category_data.side_effect = lambda category_id: dict(category_data)
+
+        first = await get_category_model_for_answer_callback(callback, extra["api_client"], 1)
+        with (
+            patch.object(CategoryModel, "get_category_inline_keyboard") as get_category_inline_keyboard_mock,
+            patch.object(ProductModel, "get_product_inline_keyboard") as get_product_inline_keyboard_mock,
+        ):
+            second = await get_category_model_for_answer_callback(callback, extra["api_client"], 1)
+
+    get_category_inline_keyboard_mock.assert_not_called()
+    get_product_inline_keyboard_mock.assert_not_called()
+    assert second.products is None
+    assert second.children is None
+    assert second.keyboard == first.keyboard
+    assert second.keyboard is not first.keyboard
+    assert keyboard_cache.stats == {"hits": 1, "misses": 1}
+
+
+async def test_get_category_model_for_answer_callback_from_api_page(
+    callback: CallbackQuery, extra: dict, category_init_data, catalog_cache
+):
+    products = [
+        {
+            "id": i,
+            "name": f"product {i}",
+            "picture": None,
+            "description": None,
+            "category": "http://web:8000/categories/1/",
+            "price": "100.00",
+            "parent_id": "1",
+        }
+        for i in range(1, 11)
+    ]
+    full_data = {**category_init_data, "products": products, "parent_id": 7}
+    page_data = {
+        **full_data,
+        "products": products[4:8],
+        "pagination": {"page": 2, "page_size": 4, "num_pages": 3, "children_count": 0, "products_count": 10},
+    }
+
+    with aioresponses() as mock_response:
+        with patch("services.services.get_redis_connection", return_value=extra["redis_connection"]):
+            url = f"{extra['api_url']}/categories/1/?page=2&page_size=4"
+            mock_response.get(url, status=200, payload=page_data)
+            result: CategoryModel = await get_category_model_for_answer_callback(
+                callback, extra["api_client"], 1, page=2
+            )
+
+    # Клавиатура страницы из API совпадает со страницей клавиатуры, построенной по всей категории.
+    assert result.keyboard == get_category_keyboard_pages(CategoryModel(**full_data))[1]
+
+
+async def test_get_category_model_for_answer_callback_uses_preloaded_token(
+    callback: CallbackQuery, extra: dict, category_init_data, catalog_cache
+):
+    with aioresponses() as mock_response:
+        with (
+            patch("services.services.get_redis_connection", return_value=extra["redis_connection"]),
+            patch("services.services.get_auth_token") as get_auth_token_mock,
+        ):
+            url = f"{extra['api_url']}/categories/1/?page=1&page_size=4"
+            mock_response.get(url, status=200, payload=category_init_data)
+            await get_category_model_for_answer_callback(
+                callback, extra["api_client"], 1, PreloadedContext(auth_token="preloaded_token")
+            )
+
+    get_auth_token_mock.assert_not_called()
+    request = list(mock_response.requests.values())[0][0]
+    assert request.kwargs["headers"]["Authorization"] == "Token preloaded_token"
@@ -7,7 +7,9 @@ from models.models import ProductModel
 from services.services import get_product_model_for_answer_callback
 
 
-async def test_get_product_model_for_answer_callback(callback: CallbackQuery, extra: dict, product_init_data: dict):
+async def test_get_product_model_for_answer_callback(
+    callback: CallbackQuery, extra: dict, product_init_data: dict, catalog_cache
+):
     with aioresponses() as mock_response:
         with patch("services.services.get_redis_connection") as get_redis_connection_mock:
             get_redis_connection_mock.return_value = extra["redis_connection"]
@@ -16,7 +18,7 @@ async def test_get_product_model_for_answer_callback(callback: CallbackQuery, ex
             mock_response.get(url, status=200, payload=product_init_data)
             result: ProductModel = await get_product_model_for_answer_callback(
                 callback,
-                extra["api_url"],
+                extra["api_client"],
                 1,
             )
 
@@ -52,3 +52,11 @@ def test_pagination_keyboard_function_when_cat_edit(keyboard):
         assert new_keyboard.inline_keyboard[-2][0].text == LEXICON_RU["inline"]["previous"]
         assert new_keyboard.inline_keyboard[-2][1].text == LEXICON_RU["inline"]["next"]
         assert new_keyboard.inline_keyboard[-1][0].text == LEXICON_RU["inline"]["back"]
+
+
+def test_pagination_keyboard_does_not_change_keyboard(keyboard):
+    buttons = [list(row) for row in keyboard.inline_keyboard]
+    with patch("config_data.constants.PAGINATION_PAGE_SIZE", 2):
+        for page in (1, 2, 3):
+            pagination_keyboard(keyboard=keyboard, page=page, category_id=1, factory=CategoryCallbackFactory)
+    assert keyboard.inline_keyboard == buttons
@@ -0,0 +1,100 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from aioresponses import aioresponses
+from services.services import get_category_model_for_answer_callback
+from services.single_flight import SingleFlight
+
+
+async def test_single_flight_collapses_concurrent_calls():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await release.wait()
+        return {"id": 1}
+
+    tasks = [asyncio.create_task(single_flight.do("key", func)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert single_flight.get_stats()["in_flight"] == 1
+
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.get_stats() == {"executed": 1, "collapsed": 4, "in_flight": 0, "collapsed_ratio": 0.8}
+
+
+async def test_single_flight_different_keys():
+    single_flight = SingleFlight()
+
+    async def func():
+        return 1
+
+    await asyncio.gather(single_flight.do("key_1", func), single_flight.do("key_2", func))
+    assert single_flight.stats == {"executed": 2, "collapsed": 0}
+
+
+async def test_single_flight_sequential_calls_are_not_collapsed():
+    single_flight = SingleFlight()
+
+    async def func():
+        return 1
+
+    await single_flight.do("key", func)
+    await single_flight.do("key", func)
+    assert single_flight.stats == {"executed": 2, "collapsed": 0}
+
+
+async def test_single_flight_exception_is_shared():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0)
+        raise ValueError("Test exception")
+
+    results = await asyncio.gather(*(single_flight.do("key", func) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert single_flight.get_stats()["in_flight"] == 0
+
+
+async def test_single_flight_cancelled_caller_does_not_cancel_request():
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def func():
+        await release.wait()
+        return 1
+
+    first = asyncio.create_task(single_flight.do("key", func))
+    second = asyncio.create_task(single_flight.do("key", func))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == 1
+
+
+async def test_get_category_model_for_answer_callback_collapses_requests(
+    callback, extra: dict, category_init_data, catalog_cache
+):
+    single_flight = SingleFlight()
+    with patch("services.services.catalog_single_flight", single_flight):
+        with patch("services.services.get_redis_connection", return_value=extra["redis_connection"]):
+            with aioresponses() as mock_response:
+                mock_response.get(
+                    "http://web:8000/categories/1/?page=1&page_size=4", status=200, payload=category_init_data
+                )
+                results = await asyncio.gather(
+                    *(get_category_model_for_answer_callback(callback, extra["api_client"], 1) for _ in range(5))
+                )
+
+    assert len(list(mock_response.requests.values())[0]) == 1
+    assert all(result.id == category_init_data["id"] for result in results)
+    assert single_flight.stats == {"executed": 1, "collapsed": 4}
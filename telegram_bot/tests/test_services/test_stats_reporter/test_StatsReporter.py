@@ -0,0 +1,38 @@
+import asyncio
+import logging
+from unittest.mock import MagicMock
+
+from services.stats_reporter import StatsReporter
+
+
+def test_stats_reporter_report(caplog):
+    reporter = StatsReporter()
+    start_window = MagicMock()
+    reporter.register("pool", lambda: {"commands": 3}, start_window)
+    reporter.register("broken", MagicMock(side_effect=RuntimeError("not initialized")))
+
+    assert reporter.collect() == {"pool": {"commands": 3}}
+    start_window.assert_not_called()
+
+    with caplog.at_level(logging.INFO, logger="services.stats_reporter"):
+        reporter.report()
+
+    assert "Stats of pool: {'commands': 3}" in caplog.text
+    assert "Stats of broken were not collected" in caplog.text
+    start_window.assert_called_once()
+
+
+async def test_stats_reporter_reports_periodically():
+    reporter = StatsReporter()
+    get_stats = MagicMock(return_value={})
+    reporter.register("pool", get_stats)
+
+    reporter.start(0.01)
+    await asyncio.sleep(0.035)
+    await reporter.stop()
+
+    # Статистика пишется каждый интервал и ещё раз при остановке.
+    assert get_stats.call_count >= 3
+    calls_count = get_stats.call_count
+    await asyncio.sleep(0.02)
+    assert get_stats.call_count == calls_count
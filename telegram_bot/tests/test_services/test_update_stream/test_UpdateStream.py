@@ -0,0 +1,47 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from services.update_stream import UpdateStream, get_update_user_id
+
+
+def get_message_update(update_id: int, user_id: int, text: str = "test") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "update, user_id",
+    [
+        (get_message_update(1, 42), 42),
+        ({"update_id": 1, "callback_query": {"id": "1", "from": {"id": 7}, "chat_instance": "1"}}, 7),
+        ({"update_id": 1, "poll_answer": {"poll_id": "1", "user": {"id": 8}, "option_ids": []}}, 8),
+        ({"update_id": 1, "channel_post": {"message_id": 1, "date": 0, "chat": {"id": -100, "type": "channel"}}}, -100),
+        ({"update_id": 1, "poll": {"id": "1"}}, 0),
+    ],
+)
+def test_get_update_user_id(update: dict, user_id: int):
+    assert get_update_user_id(update) == user_id
+
+
+async def test_update_stream_publish(redis_connection: FakeRedis):
+    update_stream = UpdateStream(name="updates", partitions=4)
+
+    with patch("services.update_stream.get_redis_connection", return_value=redis_connection):
+        await update_stream.publish(get_message_update(1, 5))
+        await update_stream.publish(get_message_update(2, 9))
+        await update_stream.publish(get_message_update(3, 6))
+
+    entries = await redis_connection.xrange("updates:1")
+    assert [json.loads(fields["update"])["update_id"] for _, fields in entries] == [1, 2]
+    assert await redis_connection.xlen("updates:2") == 1
+    assert await redis_connection.xlen("updates:0") == 0
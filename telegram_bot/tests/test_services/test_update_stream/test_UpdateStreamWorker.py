@@ -0,0 +1,171 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram import Bot, Dispatcher, F
+from aiogram.types import Message
+from fakeredis.aioredis import FakeRedis
+from services.update_stream import UpdateStream, UpdateStreamWorker
+from tests.test_services.test_update_stream.test_UpdateStream import get_message_update
+
+
+@pytest.fixture
+def redis_for_stream(redis_connection: FakeRedis):
+    with patch("services.update_stream.get_redis_connection", return_value=redis_connection):
+        yield redis_connection
+
+
+@pytest.fixture
+def handled() -> list[tuple[int, str]]:
+    return []
+
+
+@pytest.fixture
+def dp(handled: list[tuple[int, str]]) -> Dispatcher:
+    dispatcher = Dispatcher()
+
+    @dispatcher.message(F.text == "error")
+    async def error_handler(message: Message):
+        raise ValueError("error")
+
+    @dispatcher.message(F.text)
+    async def handler(message: Message):
+        # Первые сообщения обрабатываются дольше, чтобы проверить порядок.
+        await asyncio.sleep(0.01 / int(message.text))
+        handled.append((message.from_user.id, message.text))
+
+    return dispatcher
+
+
+@pytest.fixture
+async def bot():
+    bot = Bot(token="42:TEST")
+    yield bot
+    await bot.session.close()
+
+
+def get_worker(dp: Dispatcher, bot: Bot, consumer: str, partitions: int = 1) -> UpdateStreamWorker:
+    return UpdateStreamWorker(
+        UpdateStream(name="updates", partitions=partitions), dp, bot, consumer=consumer, block_ms=None
+    )
+
+
+async def test_worker_keeps_order_of_user_updates(
+    redis_for_stream: FakeRedis, dp: Dispatcher, bot: Bot, handled: list[tuple[int, str]]
+):
+    worker = get_worker(dp, bot, "worker")
+    await worker.create_groups()
+    for update_id, (user_id, text) in enumerate([(1, "1"), (2, "1"), (1, "2"), (2, "2"), (1, "3"), (1, "error")]):
+        await worker.update_stream.publish(get_message_update(update_id, user_id, text))
+
+    assert await worker.read(0) == 6
+
+    assert [text for user_id, text in handled if user_id == 1] == ["1", "2", "3"]
+    assert [text for user_id, text in handled if user_id == 2] == ["1", "2"]
+    # Пользователи обрабатываются параллельно.
+    assert handled[:2] != [(1, "1"), (1, "2")]
+    # Все обновления подтверждены, в том числе ошибочное.
+    assert (await redis_for_stream.xpending("updates:0", worker.group))["pending"] == 0
+
+
+async def test_worker_claims_pending_updates(
+    redis_for_stream: FakeRedis, dp: Dispatcher, bot: Bot, handled: list[tuple[int, str]]
+):
+    worker = get_worker(dp, bot, "worker")
+    await worker.create_groups()
+    await worker.update_stream.publish(get_message_update(1, 1, "1"))
+    await worker.update_stream.publish(get_message_update(2, 1, "2"))
+    # Обработчик прочитал обновления и умер, не подтвердив их.
+    await redis_for_stream.xreadgroup(worker.group, "dead_worker", {"updates:0": ">"}, count=10)
+
+    assert await worker.read(0) == 0
+    assert await worker.claim_pending(0) == 2
+
+    assert handled == [(1, "1"), (1, "2")]
+    assert (await redis_for_stream.xpending("updates:0", worker.group))["pending"] == 0
+
+
+async def test_workers_share_partitions(redis_for_stream: FakeRedis, dp: Dispatcher, bot: Bot):
+    first_worker = get_worker(dp, bot, "first_worker", partitions=4)
+    second_worker = get_worker(dp, bot, "second_worker", partitions=4)
+
+    async def consume(self, partition: int):
+        while partition not in self._stopping:
+            await asyncio.sleep(0.001)
+
+    with patch.object(UpdateStreamWorker, "_consume", consume):
+        await first_worker.balance()
+        assert first_worker.partitions == [0, 1, 2, 3]
+
+        # Все разделы заняты, первый обработчик освобождает лишние при следующей проверке.
+        await second_worker.balance()
+        assert second_worker.partitions == []
+        await first_worker.balance()
+        assert first_worker.partitions == [0, 1]
+        await second_worker.balance()
+        assert second_worker.partitions == [2, 3]
+        assert await redis_for_stream.get("updates:2:owner") == "second_worker"
+
+        await second_worker.stop()
+        assert second_worker.partitions == []
+        assert await redis_for_stream.get("updates:2:owner") is None
+        await first_worker.stop()
+
+
+async def test_worker_acks_malformed_entries(
+    redis_for_stream: FakeRedis, dp: Dispatcher, bot: Bot, handled: list[tuple[int, str]]
+):
+    worker = get_worker(dp, bot, "worker")
+    await worker.create_groups()
+    await redis_for_stream.xadd("updates:0", {"update": "not json"})
+    await redis_for_stream.xadd("updates:0", {"other": "field"})
+    await worker.update_stream.publish(get_message_update(1, 1, "1"))
+
+    assert await worker.read(0) == 3
+
+    assert handled == [(1, "1")]
+    assert (await redis_for_stream.xpending("updates:0", worker.group))["pending"] == 0
+
+
+async def test_worker_claims_pending_updates_from_redis_6(
+    redis_for_stream: FakeRedis, dp: Dispatcher, bot: Bot, handled: list[tuple[int, str]]
+):
+    worker = get_worker(dp, bot, "worker")
+    await worker.create_groups()
+    await worker.update_stream.publish(get_message_update(1, 1, "1"))
+    [[_, [entry]]] = await redis_for_stream.xreadgroup(worker.group, "dead_worker", {"updates:0": ">"}, count=10)
+
+    # Redis 6.2 возвращает два элемента, а вместо удалённой записи - None.
+    with patch.object(redis_for_stream, "xautoclaim", AsyncMock(return_value=["0-0", [None, entry]])):
+        assert await worker.claim_pending(0) == 1
+
+    assert handled == [(1, "1")]
+
+
+async def test_worker_restarts_stopped_partition(redis_for_stream: FakeRedis, dp: Dispatcher, bot: Bot):
+    worker = get_worker(dp, bot, "worker")
+    calls = 0
+
+    async def consume(self, partition: int):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ValueError("error")
+        while partition not in self._stopping:
+            await asyncio.sleep(0.001)
+
+    with patch.object(UpdateStreamWorker, "_consume", consume):
+        await worker.balance()
+        first_task = worker._partition_tasks[0]
+        await asyncio.sleep(0)
+        assert first_task.done()
+
+        # Завершившийся раздел освобождается и запускается заново, а не продлевается.
+        await worker.balance()
+        assert worker.partitions == [0]
+        assert worker._partition_tasks[0] is not first_task
+        await asyncio.sleep(0)
+        assert not worker._partition_tasks[0].done()
+        assert await redis_for_stream.get("updates:0:owner") == "worker"
+
+        await worker.stop()
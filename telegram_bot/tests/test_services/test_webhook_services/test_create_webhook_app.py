@@ -0,0 +1,64 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram import Bot, Dispatcher, F
+from aiogram.types import Message
+from config_data.config import UpdatesConfig
+from services.webhook_services import MAX_WEBHOOK_CONNECTIONS, create_webhook_app
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+        "text": "test",
+    },
+}
+
+
+@pytest.fixture
+def updates_config():
+    return UpdatesConfig(
+        mode="webhook",
+        max_concurrent=500,
+        webhook_base_url="https://bot.example.com/",
+        webhook_secret="secret",
+    )
+
+
+async def test_create_webhook_app(aiohttp_client, updates_config: UpdatesConfig):
+    dp = Dispatcher()
+    handled = []
+
+    @dp.message(F.text)
+    async def handler(message: Message):
+        handled.append(message.text)
+
+    bot = Bot(token="42:TEST")
+    with patch.object(Bot, "set_webhook", AsyncMock()) as set_webhook_mock:
+        client = await aiohttp_client(create_webhook_app(dp, bot, updates_config))
+
+        response = await client.post("/webhook", json=UPDATE)
+        assert response.status == 401
+
+        response = await client.post("/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+        assert response.status == 401
+
+        response = await client.post("/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "secret"})
+        assert response.status == 200
+        await client.close()
+
+    assert handled == ["test"]
+    set_webhook_mock.assert_awaited_once()
+    assert set_webhook_mock.await_args.kwargs["url"] == "https://bot.example.com/webhook"
+    assert set_webhook_mock.await_args.kwargs["secret_token"] == "secret"
+    assert set_webhook_mock.await_args.kwargs["max_connections"] == MAX_WEBHOOK_CONNECTIONS
+    await bot.session.close()
+
+
+def test_updates_config_requires_webhook_settings():
+    with pytest.raises(ValueError):
+        UpdatesConfig(mode="webhook", webhook_secret="secret")
+    assert UpdatesConfig().mode == "polling"
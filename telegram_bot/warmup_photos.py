@@ -0,0 +1,49 @@
+import asyncio
+import logging
+
+from aiogram import Bot
+from config_data.config import Config, load_config
+from lexicon.lexicon_ru import LEXICON_RU
+from services.api_client import ApiClient
+from services.catalog_snapshot import catalog_snapshot
+from services.photo_file_id_cache import photo_file_id_cache
+from services.photo_warmup import warm_up_photos
+from services.redis_services import redis_singleton
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """
+    Загружает в Telegram все изображения каталога и интерфейса, для которых ещё нет file_id.
+
+    Запуск: python warmup_photos.py. Нужна настройка PHOTO_WARMUP_CHAT_ID.
+    """
+    logging.basicConfig(
+        format="%(asctime)s:%(levelname)s:%(name)s:%(filename)s:%(funcName)s:%(message)s",
+        level=logging.INFO,
+    )
+
+    config: Config = load_config()
+    if config.photo_warmup.chat_id is None:
+        logger.error("PHOTO_WARMUP_CHAT_ID is not set")
+        return
+
+    redis_singleton.init_pool(config.redis)
+    await photo_file_id_cache.load()
+
+    api_client = ApiClient.from_config(config.api)
+    await catalog_snapshot.start(api_client, refresh_interval=0)
+
+    bot = Bot(token=config.bot.bot_token.get_secret_value())
+    logging.info(LEXICON_RU["system"]["photo_warmup_started"])
+    try:
+        await warm_up_photos(bot, config.photo_warmup.chat_id, catalog_snapshot, config.photo_warmup.concurrency)
+    finally:
+        await bot.session.close()
+        await api_client.close()
+        await redis_singleton.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())